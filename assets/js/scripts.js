@@ -162,4 +162,55 @@ document.addEventListener('DOMContentLoaded', function() {
             initSynth();
         }
     });
+
+    // Plugin search typeahead (inputs with data-suggest-url)
+    document.querySelectorAll('input[data-suggest-url]').forEach(function(input) {
+        const autocomplete = M.Autocomplete.init(input, {
+            data: {},
+            limit: 10,
+            minLength: 1,
+            onAutocomplete: function() {
+                if (input.form) {
+                    input.form.submit();
+                }
+            }
+        });
+        const cache = new Map();
+        let timer = null;
+        let controller = null;
+
+        function showSuggestions(data) {
+            const options = {};
+            data.plugins.forEach(p => { options[p.name] = null; });
+            data.tags.forEach(name => { options[name] = null; });
+            data.categories.forEach(name => { options[name] = null; });
+            autocomplete.updateData(options);
+            autocomplete.open();
+        }
+
+        input.addEventListener('input', function() {
+            const term = input.value.trim();
+            clearTimeout(timer);
+            if (!term) {
+                return;
+            }
+            if (cache.has(term)) {
+                showSuggestions(cache.get(term));
+                return;
+            }
+            timer = setTimeout(function() {
+                if (controller) {
+                    controller.abort();
+                }
+                controller = new AbortController();
+                fetch(`${input.dataset.suggestUrl}?q=${encodeURIComponent(term)}`, {signal: controller.signal})
+                    .then(response => response.json())
+                    .then(data => {
+                        cache.set(term, data);
+                        showSuggestions(data);
+                    })
+                    .catch(() => {});
+            }, 150);
+        });
+    });
 });
@@ -39,6 +39,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'corsheaders',
@@ -72,7 +73,7 @@ LOGOUT_REDIRECT_URL = 'home' # Redirect to home page after logout
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'django.middleware.gzip.GZipMiddleware',
+    'plugins.encodings.QualityGZipMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -87,6 +88,8 @@ CORS_ALLOW_ALL_ORIGINS = config('CORS_ALLOW_ALL_ORIGINS', default=False, cast=bo
 CORS_ALLOWED_ORIGIN_REGEXES = [
     r"^http://localhost:\d+$",
 ]
+# Unpaginated plugin lists send their facet counts in a header
+CORS_EXPOSE_HEADERS = ['X-Facet-Counts']
 
 SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
 USE_X_FORWARDED_HOST = True
@@ -124,6 +127,21 @@ DATABASES = {
     )
 }
 
+# Cache
+# Each gunicorn worker has its own local-memory cache, so anything that must
+# be dropped in every worker (cached token lookups) is only cached when this
+# points at a shared backend, e.g. CACHE_BACKEND=django.core.cache.backends.db.DatabaseCache
+# with CACHE_LOCATION=cauldron_cache (run.sh creates the table), or Redis/Memcached.
+# The Docker image and docker-compose default to that database cache; the
+# local-memory default below leaves authentication uncached.
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -165,11 +183,31 @@ STATICFILES_DIRS = [
     BASE_DIR / 'assets',
 ]
 
+# Precomputed approved-plugin catalogue (see plugins/registry_index.py).
+# Lives next to STATIC_ROOT so nginx can serve it without touching Django.
+REGISTRY_INDEX_ROOT = config('REGISTRY_INDEX_ROOT', default=str(BASE_DIR / 'registry'))
+REGISTRY_INDEX_URL = '/registry/'
+# Plugin changes mark the index stale; `build_registry_index --watch` rebuilds it
+REGISTRY_INDEX_AUTO_BUILD = config('REGISTRY_INDEX_AUTO_BUILD', default=True, cast=bool)
+
+# /api/plugins/changes/ holds back entries younger than this, so a
+# transaction that commits late can't be skipped (see plugins/changes.py)
+PLUGIN_CHANGES_SETTLE_SECONDS = config('PLUGIN_CHANGES_SETTLE_SECONDS', default=2, cast=int)
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'plugins.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.BasicAuthentication',
+        'plugins.authentication.CachedBasicAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'plugins.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'plugins.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
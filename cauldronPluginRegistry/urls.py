@@ -15,9 +15,9 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from rest_framework.authtoken import views
-from plugins.views import home_view, CustomLoginView, logout_view
+from plugins.views import home_view, CustomLoginView, logout_view, registry_index_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -29,4 +29,5 @@ urlpatterns = [
     path('login/', CustomLoginView.as_view(), name='login'),
     path('logout/', logout_view, name='logout'),
     path('plugins/', include('plugins.urls')),
+    re_path(r'^registry/(?P<name>latest\.json|index\.[0-9a-f]{16}\.(?:json|msgpack))$', registry_index_view, name='registry-index'),
 ]
\ No newline at end of file
@@ -0,0 +1,40 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import QuerySet
+from rest_framework.authtoken.models import Token
+
+BATCH_SIZE = 1000
+
+
+def create_missing_tokens(users=None, batch_size=BATCH_SIZE, progress=None):
+    """
+    API tokens for users (default: everyone) that have none, batch_size at
+    a time. Each batch is one anti-join over the next primary-key range
+    plus one bulk insert, so memory stays bounded by the batch size. Users
+    a sign-in gave a token since the anti-join are skipped rather than
+    failing the batch, and are not counted. users may be a queryset, a list
+    of saved users, or None for everyone. Returns how many were created;
+    progress, if given, is called with the running total.
+    """
+    if users is None:
+        users = User.objects.all()
+    elif not isinstance(users, QuerySet):
+        users = User.objects.filter(pk__in=[user.pk for user in users])
+    queryset = users.filter(auth_token__isnull=True)
+    created = 0
+    last_pk = None
+    while True:
+        batch = queryset.order_by('pk')
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        pks = list(batch.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return created
+        tokens = [Token(user_id=pk, key=Token.generate_key()) for pk in pks]
+        with transaction.atomic():
+            Token.objects.bulk_create(tokens, batch_size=batch_size, ignore_conflicts=True)
+            # The keys are fresh, so the ones now stored are exactly the rows this batch inserted
+            created += Token.objects.filter(key__in=[token.key for token in tokens]).count()
+        last_pk = pks[-1]
+        if progress:
+            progress(created)
@@ -3,17 +3,20 @@ import os
 
 import git
 import yaml
-import markdown
-import re
 
 from django.contrib import admin, messages
+from django.contrib.admin.views.main import ChangeList
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.utils.html import format_html
 from .models import (
     Author,
     Category,
     Plugin,
+    PluginWebhook,
     UserProfile,
     Runtime,
     Input,
@@ -25,6 +28,12 @@ from .models import (
     Example,
     RepositorySSHKey,
 )
+from .forms import PluginAdminForm
+from .manifests import render_readme
+from .signals import plugin_updated, plugins_status_changed
+from .spec import store_plugin_spec
+from .updates import check_remote, record_check
+from .viewsets import sync_plugin_components
 
 
 admin.site.site_header = "Cauldron Plugin Registry"
@@ -101,175 +110,6 @@ class ExampleInline(admin.StackedInline):
     max_num = 1
 
 
-def sync_plugin_components(plugin, plugin_data):
-    """Sync all plugin components from plugin data."""
-    runtime_info = plugin_data.get('runtime', {})
-    Runtime.objects.filter(plugin=plugin).delete()
-    if runtime_info:
-        Runtime.objects.create(
-            plugin=plugin,
-            environments=runtime_info.get('environments', []),
-            entrypoint=runtime_info.get('entrypoint', ''),
-            docker=runtime_info.get('docker')
-        )
-
-    Input.objects.filter(plugin=plugin).delete()
-    inputs_data = plugin_data.get('inputs', [])
-    for inp in inputs_data:
-        Input.objects.create(
-            plugin=plugin,
-            name=inp.get('name', ''),
-            label=inp.get('label', ''),
-            type=inp.get('type', ''),
-            required=inp.get('required', False),
-            default=str(inp.get('default', '')) if inp.get('default') is not None else None,
-            description=inp.get('description', ''),
-            placeholder=inp.get('placeholder', ''),
-            file_types=inp.get('file_types', []),
-            accept=inp.get('accept', ''),
-            multiple=inp.get('multiple', False),
-            sourceFile=inp.get('sourceFile', ''),
-            min=inp.get('min'),
-            max=inp.get('max'),
-            step=inp.get('step'),
-            options=inp.get('options'),
-            optionsFromFile=inp.get('optionsFromFile', ''),
-            groups=inp.get('groups'),
-            groupsFromFile=inp.get('groupsFromFile', ''),
-            visibleWhen=inp.get('visibleWhen'),
-            disableAnnotationManagement=inp.get('disableAnnotationManagement', False),
-            tableColumns=inp.get('tableColumns')
-        )
-
-    Output.objects.filter(plugin=plugin).delete()
-    outputs_data = plugin_data.get('outputs', [])
-    for out in outputs_data:
-        Output.objects.create(
-            plugin=plugin,
-            name=out.get('name', ''),
-            path=out.get('path', ''),
-            type=out.get('type', ''),
-            description=out.get('description', ''),
-            format=out.get('format', '')
-        )
-
-    PluginEnvVariable.objects.filter(plugin=plugin).delete()
-    execution_info = plugin_data.get('execution', {})
-    env_vars_data = execution_info.get('envVariables', [])
-    for ev in env_vars_data:
-        PluginEnvVariable.objects.create(
-            plugin=plugin,
-            name=ev.get('name', ''),
-            label=ev.get('label', ''),
-            type=ev.get('type', ''),
-            required=ev.get('required', False),
-            default=str(ev.get('default', '')) if ev.get('default') is not None else None,
-            description=ev.get('description', ''),
-            placeholder=ev.get('placeholder', ''),
-            accept=ev.get('accept', ''),
-            multiple=ev.get('multiple', False),
-            sourceFile=ev.get('sourceFile', ''),
-            min=ev.get('min'),
-            max=ev.get('max'),
-            step=ev.get('step')
-        )
-
-    Execution.objects.filter(plugin=plugin).delete()
-    if execution_info:
-        Execution.objects.create(
-            plugin=plugin,
-            argsMapping=execution_info.get('argsMapping'),
-            outputDir=execution_info.get('outputDir', ''),
-            requirements=execution_info.get('requirements')
-        )
-
-    Plot.objects.filter(plugin=plugin).delete()
-    plots_data = plugin_data.get('plots', [])
-    for plot in plots_data:
-        Plot.objects.create(
-            plugin=plugin,
-            plot_id=plot.get('id', ''),
-            name=plot.get('name', ''),
-            type=plot.get('type', ''),
-            component=plot.get('component', ''),
-            dataSource=plot.get('dataSource', ''),
-            config=plot.get('config'),
-            customization=plot.get('customization')
-        )
-
-    Annotation.objects.filter(plugin=plugin).delete()
-    annotation_data = plugin_data.get('annotation')
-    if annotation_data:
-        Annotation.objects.create(
-            plugin=plugin,
-            samplesFrom=annotation_data.get('samplesFrom', ''),
-            annotationFile=annotation_data.get('annotationFile', '')
-        )
-
-    Example.objects.filter(plugin=plugin).delete()
-    example_data = plugin_data.get('example')
-    if example_data:
-        Example.objects.create(
-            plugin=plugin,
-            enabled=example_data.get('enabled', False),
-            values=example_data.get('values')
-        )
-
-
-def get_primary_environment(runtime_info):
-    """Get the primary environment from runtime info."""
-    environments = runtime_info.get('environments', [])
-    if environments and len(environments) > 0:
-        return environments[0]
-    return ''
-
-
-def generate_mermaid_diagram(script_path, runtime_info):
-    """Generate mermaid diagram from script."""
-    if not os.path.exists(script_path):
-        return ""
-
-    try:
-        with open(script_path, 'r') as f:
-            content = f.read()
-    except Exception:
-        return ""
-
-    lines = content.split('\n')
-    steps = []
-
-    primary_env = get_primary_environment(runtime_info)
-
-    if primary_env == 'r':
-        pattern = re.compile(r'message\(.*\[(\d+)/(\d+)\]\s*(.+?)["\')]')
-    elif primary_env == 'python':
-        pattern = re.compile(r'(?:print|logger\.info)\(.*\[(\d+)/(\d+)\]\s*(.+?)["\')]')
-    else:
-        return ""
-
-    for line in lines:
-        match = pattern.search(line.strip())
-        if match:
-            label = match.group(3).strip()
-            if label and not label.startswith('='):
-                steps.append(label)
-
-    if not steps:
-        return ""
-
-    mermaid = ["```mermaid", "flowchart TD", "    Start([Start]) --> step1"]
-    for i, label in enumerate(steps):
-        step_id = f"step{i+1}"
-        mermaid.append(f"    {step_id}[{label}]")
-        if i < len(steps) - 1:
-            mermaid.append(f"    {step_id} --> step{i+2}")
-
-    mermaid.append(f"    step{len(steps)} --> End([End])")
-    mermaid.append("```")
-
-    return "\n## Workflow Diagram\n\n" + "\n".join(mermaid) + "\n"
-
-
 @admin.action(description="Check for updates")
 def check_updates(modeladmin, request, queryset):
     """Check for updates on selected plugins."""
@@ -283,28 +123,18 @@ def check_updates(modeladmin, request, queryset):
             failed += 1
             continue
 
-        try:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                repo = git.Repo.clone_from(plugin.repository, temp_dir, depth=1)
-                latest_commit = repo.head.commit.hexsha
-
-                recommended = plugin.recommended_commit if plugin.recommended_commit else latest_commit
-                has_update = recommended != plugin.commit_hash
-
-                if has_update:
-                    has_updates += 1
-                    current = plugin.commit_hash[:7] if plugin.commit_hash else "none"
-                    latest = recommended[:7]
-                    messages.info(request, f"{plugin.name}: Update available ({current} → {latest})")
-                else:
-                    up_to_date += 1
-
-        except git.exc.GitCommandError as e:
-            messages.error(request, f"{plugin.name}: Git error - {str(e)[:100]}")
-            failed += 1
-        except Exception as e:
-            messages.error(request, f"{plugin.name}: Error - {str(e)[:100]}")
+        # Same ls-remote as the check_updates scheduler, and recorded like it
+        record_check(plugin, check_remote(plugin.id, plugin.repository))
+        if plugin.last_check_error:
+            messages.error(request, f"{plugin.name}: Git error - {plugin.last_check_error[:100]}")
             failed += 1
+        elif plugin.has_update:
+            has_updates += 1
+            current = plugin.commit_hash[:7] if plugin.commit_hash else "none"
+            latest = (plugin.recommended_commit or plugin.latest_commit)[:7]
+            messages.info(request, f"{plugin.name}: Update available ({current} → {latest})")
+        else:
+            up_to_date += 1
 
     messages.success(
         request,
@@ -359,24 +189,7 @@ def sync_to_latest(modeladmin, request, queryset):
                 citation_config = plugin_data.get('citation', {})
                 citation_enabled = citation_config.get('enabled', False)
 
-                readme_path = os.path.join(temp_dir, 'README.md')
-                raw_readme = ""
-                if os.path.exists(readme_path):
-                    with open(readme_path, 'r') as f:
-                        raw_readme = f.read()
-
-                if diagram_enabled and "```mermaid" not in raw_readme:
-                    runtime_info = plugin_data.get('runtime', {})
-                    entrypoint = runtime_info.get('entrypoint')
-                    if entrypoint and runtime_info:
-                        script_path = os.path.join(temp_dir, entrypoint)
-                        diagram_md = generate_mermaid_diagram(script_path, runtime_info)
-                        raw_readme += diagram_md
-
-                readme_content = markdown.markdown(raw_readme, extensions=['fenced_code', 'tables'])
-
-                mermaid_pattern = re.compile(r'<pre><code class="language-mermaid">([\s\S]*?)</code></pre>')
-                readme_content = mermaid_pattern.sub(r'<pre class="mermaid">\1</pre>', readme_content)
+                readme_content = render_readme(temp_dir, plugin_data)
 
                 old_commit = plugin.commit_hash[:7] if plugin.commit_hash else "none"
                 plugin.name = plugin_info.get('name', plugin.name)
@@ -390,9 +203,9 @@ def sync_to_latest(modeladmin, request, queryset):
                 plugin.readme = readme_content
                 plugin.diagram_enabled = diagram_enabled
                 plugin.citation_enabled = citation_enabled
-                plugin.save()
-
-                sync_plugin_components(plugin, plugin_data)
+                with transaction.atomic():
+                    plugin.save()
+                    sync_plugin_components(plugin, plugin_data)
 
                 synced += 1
                 messages.info(request, f"{plugin.name}: Synced ({old_commit} → {latest_commit[:7]})")
@@ -410,31 +223,58 @@ def sync_to_latest(modeladmin, request, queryset):
 @admin.action(description="Approve selected plugins")
 def approve_plugins(modeladmin, request, queryset):
     """Approve selected plugins."""
+    plugin_ids = list(queryset.values_list('id', flat=True))
     updated = queryset.update(status='approved')
+    plugins_status_changed.send(sender=Plugin, plugin_ids=plugin_ids, status='approved')
     messages.success(request, f"{updated} plugins approved")
 
 
 @admin.action(description="Reject selected plugins")
 def reject_plugins(modeladmin, request, queryset):
     """Reject selected plugins."""
+    plugin_ids = list(queryset.values_list('id', flat=True))
     updated = queryset.update(status='rejected')
+    plugins_status_changed.send(sender=Plugin, plugin_ids=plugin_ids, status='rejected')
     messages.success(request, f"{updated} plugins rejected")
 
 
 @admin.action(description="Set to pending")
 def set_pending(modeladmin, request, queryset):
     """Set selected plugins to pending status."""
+    plugin_ids = list(queryset.values_list('id', flat=True))
     updated = queryset.update(status='pending')
+    plugins_status_changed.send(sender=Plugin, plugin_ids=plugin_ids, status='pending')
     messages.success(request, f"{updated} plugins set to pending")
 
 
+def related_count(model, field):
+    """
+    Number of model rows pointing at each row, as a correlated subquery so
+    the changelist's own queries (pagination, date hierarchy) stay free of
+    joins and GROUP BY.
+    """
+    rows = model.objects.filter(**{field: OuterRef('pk')}).order_by().values(field)
+    return Coalesce(Subquery(rows.annotate(count=Count('pk')).values('count')), 0)
+
+
+class PluginChangeList(ChangeList):
+    # Nothing in list_display reads these; the change form still loads full rows.
+    # Selected-row actions get this queryset too, so only heavy columns they
+    # never read are left out.
+    deferred_fields = ('description', 'spec', 'search_document', 'search_vector')
+
+    def get_queryset(self, request, exclude_parameters=None):
+        return super().get_queryset(request, exclude_parameters).defer(*self.deferred_fields)
+
+
 @admin.register(Plugin)
 class PluginAdmin(admin.ModelAdmin):
+    form = PluginAdminForm
     list_display = (
         'name', 'id', 'version', 'status', 'author', 'category',
         'short_commit', 'repo_link', 'input_count', 'output_count', 'updated_at'
     )
-    list_filter = ('status', 'category', 'author', 'diagram_enabled', 'citation_enabled', 'requires_authentication')
+    list_filter = ('status', 'has_update', 'category', 'author', 'diagram_enabled', 'citation_enabled', 'requires_authentication')
     list_editable = ('status',)
     search_fields = ('id', 'name', 'description', 'author__name', 'repository')
     ordering = ('-updated_at',)
@@ -452,6 +292,10 @@ class PluginAdmin(admin.ModelAdmin):
         ('Repository', {
             'fields': ('repository', 'commit_hash', 'recommended_commit', 'latest_stable_tag', 'requires_authentication')
         }),
+        ('Update checks', {
+            'fields': ('latest_commit', 'has_update', 'last_checked_at', 'next_check_at', 'check_failures', 'last_check_error'),
+            'classes': ('collapse',)
+        }),
         ('Features', {
             'fields': ('diagram_enabled', 'citation_enabled'),
             'classes': ('collapse',)
@@ -470,9 +314,26 @@ class PluginAdmin(admin.ModelAdmin):
         }),
     )
 
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = (
+        'created_at', 'updated_at',
+        'latest_commit', 'has_update', 'last_checked_at', 'next_check_at', 'check_failures', 'last_check_error',
+    )
     inlines = [RuntimeInline, InputInline, OutputInline, PluginEnvVariableInline, ExecutionInline, PlotInline, AnnotationInline, ExampleInline]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('author', 'category').annotate(
+            input_count=related_count(Input, 'plugin'),
+            output_count=related_count(Output, 'plugin'),
+        )
+
+    def get_changelist(self, request, **kwargs):
+        return PluginChangeList
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        store_plugin_spec(form.instance)
+        plugin_updated.send(sender=Plugin, plugin=form.instance, created=not change)
+
     @admin.display(description='Status')
     def status_badge(self, obj):
         colors = {
@@ -505,15 +366,13 @@ class PluginAdmin(admin.ModelAdmin):
             )
         return "-"
 
-    @admin.display(description='Inputs')
+    @admin.display(description='Inputs', ordering='input_count')
     def input_count(self, obj):
-        count = obj.inputs.count()
-        return format_html('<span style="color: #007bff;">{}</span>', count)
+        return format_html('<span style="color: #007bff;">{}</span>', obj.input_count)
 
-    @admin.display(description='Outputs')
+    @admin.display(description='Outputs', ordering='output_count')
     def output_count(self, obj):
-        count = obj.outputs.count()
-        return format_html('<span style="color: #28a745;">{}</span>', count)
+        return format_html('<span style="color: #28a745;">{}</span>', obj.output_count)
 
 
 @admin.register(Author)
@@ -521,9 +380,12 @@ class AuthorAdmin(admin.ModelAdmin):
     list_display = ('name', 'email', 'plugin_count')
     search_fields = ('name', 'email')
 
-    @admin.display(description='Plugins')
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(plugin_count=related_count(Plugin, 'author'))
+
+    @admin.display(description='Plugins', ordering='plugin_count')
     def plugin_count(self, obj):
-        return obj.plugin_set.count()
+        return obj.plugin_count
 
 
 @admin.register(Category)
@@ -531,27 +393,59 @@ class CategoryAdmin(admin.ModelAdmin):
     list_display = ('name', 'description', 'plugin_count')
     search_fields = ('name', 'description')
 
-    @admin.display(description='Plugins')
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(plugin_count=related_count(Plugin, 'category'))
+
+    @admin.display(description='Plugins', ordering='plugin_count')
     def plugin_count(self, obj):
-        return obj.plugin_set.count()
+        return obj.plugin_count
+
+
+class PluginComponentAdmin(admin.ModelAdmin):
+    """Standalone edits of a manifest component count as an update of its plugin."""
+
+    def component_changed(self, plugin):
+        # Moves updated_at, which cached representations are keyed on
+        plugin.save(update_fields=['updated_at'])
+        store_plugin_spec(plugin)
+        plugin_updated.send(sender=Plugin, plugin=plugin, created=False)
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        previous = form.initial.get('plugin') if change else None
+        if previous and previous != obj.plugin_id:
+            for plugin in Plugin.objects.filter(pk=previous):
+                self.component_changed(plugin)
+        self.component_changed(obj.plugin)
+
+    def delete_model(self, request, obj):
+        plugin = obj.plugin
+        super().delete_model(request, obj)
+        self.component_changed(plugin)
+
+    def delete_queryset(self, request, queryset):
+        plugin_ids = set(queryset.values_list('plugin_id', flat=True))
+        super().delete_queryset(request, queryset)
+        for plugin in Plugin.objects.filter(pk__in=plugin_ids):
+            self.component_changed(plugin)
 
 
 @admin.register(Input)
-class InputAdmin(admin.ModelAdmin):
+class InputAdmin(PluginComponentAdmin):
     list_display = ('name', 'plugin', 'type', 'required', 'label')
     list_filter = ('type', 'required', 'plugin')
     search_fields = ('name', 'label', 'plugin__name')
 
 
 @admin.register(Output)
-class OutputAdmin(admin.ModelAdmin):
+class OutputAdmin(PluginComponentAdmin):
     list_display = ('name', 'plugin', 'type', 'format', 'path')
     list_filter = ('type', 'format', 'plugin')
     search_fields = ('name', 'path', 'plugin__name')
 
 
 @admin.register(Runtime)
-class RuntimeAdmin(admin.ModelAdmin):
+class RuntimeAdmin(PluginComponentAdmin):
     list_display = ('plugin', 'entrypoint', 'environment_list', 'has_docker')
     list_filter = ('environments',)
     search_fields = ('plugin__name', 'entrypoint')
@@ -568,7 +462,7 @@ class RuntimeAdmin(admin.ModelAdmin):
 
 
 @admin.register(Execution)
-class ExecutionAdmin(admin.ModelAdmin):
+class ExecutionAdmin(PluginComponentAdmin):
     list_display = ('plugin', 'outputDir', 'has_requirements', 'has_args_mapping')
     search_fields = ('plugin__name',)
 
@@ -582,20 +476,20 @@ class ExecutionAdmin(admin.ModelAdmin):
 
 
 @admin.register(Plot)
-class PlotAdmin(admin.ModelAdmin):
+class PlotAdmin(PluginComponentAdmin):
     list_display = ('name', 'plugin', 'type', 'component', 'dataSource')
     list_filter = ('type', 'plugin')
     search_fields = ('name', 'plugin__name', 'plot_id')
 
 
 @admin.register(Annotation)
-class AnnotationAdmin(admin.ModelAdmin):
+class AnnotationAdmin(PluginComponentAdmin):
     list_display = ('plugin', 'samplesFrom', 'annotationFile')
     search_fields = ('plugin__name',)
 
 
 @admin.register(Example)
-class ExampleAdmin(admin.ModelAdmin):
+class ExampleAdmin(PluginComponentAdmin):
     list_display = ('plugin', 'enabled')
     list_filter = ('enabled',)
     search_fields = ('plugin__name',)
@@ -624,8 +518,16 @@ class RepositorySSHKeyAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(PluginWebhook)
+class PluginWebhookAdmin(admin.ModelAdmin):
+    list_display = ('plugin', 'created_at')
+    search_fields = ('plugin__id', 'plugin__name')
+    readonly_fields = ('created_at',)
+    fields = ('plugin', 'secret', 'created_at')
+
+
 @admin.register(PluginEnvVariable)
-class PluginEnvVariableAdmin(admin.ModelAdmin):
+class PluginEnvVariableAdmin(PluginComponentAdmin):
     list_display = ('name', 'plugin', 'type', 'required', 'label')
     list_filter = ('type', 'required', 'plugin')
     search_fields = ('name', 'label', 'plugin__name')
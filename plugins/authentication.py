@@ -0,0 +1,87 @@
+import hashlib
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.crypto import salted_hmac
+from rest_framework.authentication import BasicAuthentication, TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+# How long a verified token -> user lookup is reused. Token deletion and
+# user saves drop entries early; this bounds anything that bypasses save()
+# or delete(), such as User.objects.update(is_active=False) without a
+# forget_user_tokens() call.
+TOKEN_CACHE_TIMEOUT = 5 * 60
+
+# How long verified Basic credentials skip the password hasher.
+BASIC_CACHE_TIMEOUT = 60
+
+
+def shared_cache():
+    """
+    Whether every worker reads the same default cache. A per-process cache
+    can't be told about revoked tokens or deactivated users in the other
+    workers, so token lookups are only cached in a shared one.
+    """
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def token_cache_key(key):
+    # Raw tokens never appear in cache keys
+    return 'auth-token:' + hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def forget_token(key):
+    cache.delete(token_cache_key(key))
+
+
+def forget_user_tokens(user):
+    """Drop cached lookups for every token of the user, e.g. after deactivation."""
+    keys = Token.objects.filter(user=user).values_list('key', flat=True)
+    cache.delete_many([token_cache_key(key) for key in keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that remembers verified tokens for TOKEN_CACHE_TIMEOUT,
+    so polling clients skip the Token/User join on every request. Without a
+    shared cache (see CACHES in settings) it is plain TokenAuthentication.
+    """
+
+    def authenticate_credentials(self, key):
+        if not shared_cache():
+            return super().authenticate_credentials(key)
+        cache_key = token_cache_key(key)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+        user, token = super().authenticate_credentials(key)
+        cache.set(cache_key, (user, token), TOKEN_CACHE_TIMEOUT)
+        return user, token
+
+
+class CachedBasicAuthentication(BasicAuthentication):
+    """
+    BasicAuthentication that runs the password hasher once per
+    BASIC_CACHE_TIMEOUT. Later requests with the same credentials cost a
+    primary-key lookup, which also notices deactivation or a password change
+    (the stored hash is compared) straight away, so a per-process cache is
+    safe here.
+    """
+
+    def authenticate_credentials(self, userid, password, request=None):
+        cache_key = 'auth-basic:' + salted_hmac(
+            'plugins.basic-auth', f'{userid}:{password}', algorithm='sha256',
+        ).hexdigest()
+        cached = cache.get(cache_key)
+        if cached is not None:
+            pk, password_hash = cached
+            user = get_user_model()._default_manager.filter(pk=pk).first()
+            if user is not None and user.is_active and user.password == password_hash:
+                return user, None
+            cache.delete(cache_key)
+
+        user, auth = super().authenticate_credentials(userid, password, request)
+        cache.set(cache_key, (user.pk, user.password), BASIC_CACHE_TIMEOUT)
+        return user, auth
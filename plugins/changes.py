@@ -0,0 +1,75 @@
+"""
+Reading and compacting the PluginChange log behind /api/plugins/changes/.
+
+Change ids come from a sequence, and a transaction commits whenever it
+finishes. A transaction still open on a lower id can therefore commit
+after a higher id has already been served, and a client whose cursor
+passed that higher id would never see the lower one. The feed serves
+only ids below its horizon: the first change that is younger than
+PLUGIN_CHANGES_SETTLE_SECONDS, or younger than the oldest open writing
+transaction on PostgreSQL. Everything below the horizon has committed.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Exists, Min, OuterRef
+from django.utils import timezone
+
+from .models import PluginChange
+
+# Superseded changes are kept this long before prune_changes deletes them
+COMPACT_AFTER_DAYS = 30
+
+# Sessions of other roles show a NULL xact_start unless granted
+# pg_read_all_stats; the registry writes through a single role.
+OLDEST_WRITER_SQL = """
+    SELECT min(xact_start) FROM pg_stat_activity
+    WHERE backend_xid IS NOT NULL AND pid <> pg_backend_pid() AND datname = current_database()
+"""
+
+
+def oldest_open_writer():
+    """Start time of the oldest other transaction that has written, on PostgreSQL."""
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(OLDEST_WRITER_SQL)
+        return cursor.fetchone()[0]
+
+
+def change_horizon(since):
+    """
+    The lowest change id after `since` that must not be served yet, or
+    None when every change after `since` has settled.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.PLUGIN_CHANGES_SETTLE_SECONDS)
+    writer = oldest_open_writer()
+    if writer is not None:
+        cutoff = min(cutoff, writer)
+    return (
+        PluginChange.objects.filter(id__gt=since, created_at__gte=cutoff)
+        .aggregate(horizon=Min('id'))['horizon']
+    )
+
+
+def settled_changes(since, limit):
+    """[(id, plugin_id)] after `since` and below the horizon, oldest first."""
+    changes = PluginChange.objects.filter(id__gt=since)
+    horizon = change_horizon(since)
+    if horizon is not None:
+        changes = changes.filter(id__lt=horizon)
+    return list(changes.order_by('id').values_list('id', 'plugin_id')[:limit])
+
+
+def compact_changes(older_than):
+    """
+    Delete changes older than `older_than` that a newer change to the same
+    plugin supersedes. The feed answers from the plugin's current row, so
+    a client at any cursor still gets the newer entry and ends up in the
+    same state; the newest entry per plugin (and every tombstone) is kept,
+    so since=0 still replays the whole catalogue. Returns the number deleted.
+    """
+    newer = PluginChange.objects.filter(plugin_id=OuterRef('plugin_id'), id__gt=OuterRef('id'))
+    deleted, _ = PluginChange.objects.filter(created_at__lt=older_than).filter(Exists(newer)).delete()
+    return deleted
@@ -0,0 +1,43 @@
+"""
+Accept-Encoding negotiation that honours q-values: "gzip;q=0" refuses
+gzip, and "*" covers codings the header doesn't name.
+"""
+from django.middleware.gzip import GZipMiddleware
+
+
+def encoding_qualities(header):
+    """
+    {coding: q} from an Accept-Encoding header. Codings are lower-cased,
+    q defaults to 1 and entries with an unreadable q are dropped.
+    """
+    qualities = {}
+    for entry in header.split(','):
+        coding, *params = [part.strip() for part in entry.split(';')]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = None
+        if q is not None:
+            qualities[coding.lower()] = q
+    return qualities
+
+
+def accepts_encoding(request, coding):
+    """Whether the client accepts `coding` with a non-zero q, directly or through '*'."""
+    qualities = encoding_qualities(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    return qualities.get(coding, qualities.get('*', 0)) > 0
+
+
+class QualityGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that leaves responses alone for clients that refuse gzip with q=0."""
+
+    def process_response(self, request, response):
+        if not accepts_encoding(request, 'gzip'):
+            return response
+        return super().process_response(request, response)
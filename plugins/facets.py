@@ -0,0 +1,121 @@
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from .models import PluginFacet, FacetCount
+
+FACETS = [facet for facet, _ in PluginFacet.FACET_CHOICES]
+BOOLEAN_FACETS = ('requires_authentication', 'diagram_enabled')
+
+
+def _bool_value(value):
+    return 'true' if value else 'false'
+
+
+def plugin_facet_values(plugin):
+    """Set of (facet, value) pairs describing one plugin."""
+    values = {
+        ('requires_authentication', _bool_value(plugin.requires_authentication)),
+        ('diagram_enabled', _bool_value(plugin.diagram_enabled)),
+    }
+    values.update(('tag', name) for name in plugin.tags.values_list('name', flat=True))
+    try:
+        environments = plugin.runtime.environments or []
+    except ObjectDoesNotExist:
+        environments = []
+    values.update(('environment', str(env)) for env in environments)
+    values.update(('input_type', t) for t in plugin.inputs.values_list('type', flat=True).distinct() if t)
+    values.update(('output_type', t) for t in plugin.outputs.values_list('type', flat=True).distinct() if t)
+    return values
+
+
+def _adjust_counts(keys, delta):
+    if not keys:
+        return
+    if delta > 0:
+        FacetCount.objects.bulk_create(
+            [FacetCount(facet=facet, value=value) for facet, value in keys],
+            ignore_conflicts=True,
+        )
+    condition = reduce(or_, (Q(facet=facet, value=value) for facet, value in keys))
+    FacetCount.objects.filter(condition).update(count=F('count') + delta)
+
+
+def sync_plugin_facets(plugin):
+    """
+    Bring one plugin's facet rows up to date and apply only the difference
+    to FacetCount, so counts never need a GROUP BY over the catalogue.
+    """
+    new_values = plugin_facet_values(plugin)
+    counted = plugin.status == 'approved'
+
+    with transaction.atomic():
+        existing = {
+            (row.facet, row.value): row
+            for row in PluginFacet.objects.select_for_update().filter(plugin=plugin)
+        }
+        decrement = [key for key, row in existing.items() if row.counted and (key not in new_values or not counted)]
+        increment = [key for key in new_values if counted and not (key in existing and existing[key].counted)]
+
+        removed = [row.pk for key, row in existing.items() if key not in new_values]
+        if removed:
+            PluginFacet.objects.filter(pk__in=removed).delete()
+        kept = [row.pk for key, row in existing.items() if key in new_values and row.counted != counted]
+        if kept:
+            PluginFacet.objects.filter(pk__in=kept).update(counted=counted)
+        PluginFacet.objects.bulk_create([
+            PluginFacet(plugin=plugin, facet=facet, value=value, counted=counted)
+            for facet, value in new_values if (facet, value) not in existing
+        ])
+
+        _adjust_counts(decrement, -1)
+        _adjust_counts(increment, 1)
+
+
+def release_plugin_facets(plugin):
+    """Take a plugin that is about to be deleted out of the counts."""
+    keys = list(PluginFacet.objects.filter(plugin=plugin, counted=True).values_list('facet', 'value'))
+    _adjust_counts(keys, -1)
+
+
+def facet_counts(plugins=None):
+    """
+    {facet: {value: count}}. Without a queryset these are the approved
+    catalogue's totals, read from the summary table. Given the plugins a
+    filter or search matched, they are counted over just those plugins'
+    facet rows, which the (facet, value, plugin) index keeps to the size
+    of the result rather than of the catalogue.
+    """
+    if plugins is None:
+        rows = FacetCount.objects.filter(count__gt=0).values_list('facet', 'value', 'count')
+    else:
+        rows = (
+            PluginFacet.objects.filter(plugin_id__in=plugins.order_by().values('pk'))
+            .values('facet', 'value').order_by()
+            .annotate(count=Count('plugin_id'))
+            .values_list('facet', 'value', 'count')
+        )
+    counts = {facet: {} for facet in FACETS}
+    for facet, value, count in rows:
+        counts.setdefault(facet, {})[value] = count
+    return counts
+
+
+def filter_by_facets(queryset, query_params):
+    """
+    Apply facet query params (?tag=a&tag=b&environment=python...).
+    Values of one facet are OR'd, different facets are AND'd.
+    """
+    for facet in FACETS:
+        values = [value for value in query_params.getlist(facet) if value != '']
+        if not values:
+            continue
+        if facet in BOOLEAN_FACETS:
+            values = [_bool_value(value.lower() in ('1', 'true', 'yes')) for value in values]
+        queryset = queryset.filter(
+            id__in=PluginFacet.objects.filter(facet=facet, value__in=values).values('plugin_id')
+        )
+    return queryset
@@ -1,5 +1,5 @@
 from django import forms
-from .models import RepositorySSHKey
+from .models import Plugin, RepositorySSHKey
 
 class PluginSubmitForm(forms.Form):
     repo_url = forms.URLField(
@@ -49,3 +49,22 @@ class SSHKeyForm(forms.ModelForm):
             'ssh_private_key': 'SSH Private Key',
             'passphrase': 'Passphrase (optional)'
         }
+
+
+class PluginAdminForm(forms.ModelForm):
+    # The README is stored in PluginReadme, not on the plugin row
+    readme = forms.CharField(widget=forms.Textarea, required=False)
+
+    class Meta:
+        model = Plugin
+        fields = '__all__'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            self.fields['readme'].initial = self.instance.readme
+
+    def save(self, commit=True):
+        if 'readme' in self.changed_data:
+            self.instance.readme = self.cleaned_data['readme']
+        return super().save(commit)
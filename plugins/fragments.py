@@ -0,0 +1,39 @@
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+
+from .serializer_cache import representation_key
+
+# Lifetime of rendered {% cache %} fragments; entries are keyed per plugin
+# revision, so this only bounds how long unused ones linger.
+FRAGMENT_TIMEOUT = 60 * 60 * 24
+
+# Fragment name used by plugin_list.html
+ROW_FRAGMENT = 'plugin_row'
+
+# Fragments of plugin_detail.html that only change when the plugin row is
+# written; they vary on (pk, updated_at), which every worker reads the same.
+DETAIL_FRAGMENTS = ('plugin_readme', 'plugin_env')
+
+
+def with_row_keys(plugins):
+    """
+    Tag each plugin with the key its list row is cached under: the same
+    revision key as its API representation, so a row is re-rendered exactly
+    when the representation would be.
+    """
+    plugins = list(plugins)
+    for plugin in plugins:
+        plugin.row_key = representation_key(plugin)
+    return plugins
+
+
+def forget_plugin_fragments(plugin):
+    """
+    Drop the rendered row and detail fragments for the plugin's current
+    revision early; the next write moves their keys in any case.
+    """
+    key = representation_key(plugin)
+    cache.delete_many([
+        make_template_fragment_key(ROW_FRAGMENT, [key]),
+        *(make_template_fragment_key(name, [plugin.pk, plugin.updated_at]) for name in DETAIL_FRAGMENTS),
+    ])
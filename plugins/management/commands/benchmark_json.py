@@ -0,0 +1,67 @@
+import io
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from plugins import renderers
+from plugins.parsers import FastJSONParser
+from plugins.registry_index import approved_plugins_queryset
+from plugins.renderers import FastJSONRenderer
+from plugins.serializers import PluginSerializer
+
+
+def _timings(func, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+class Command(BaseCommand):
+    help = 'Compare stdlib and fast JSON encode/decode time on the full approved-catalogue payload'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20, help='Timed runs per encoder (default: 20)')
+        parser.add_argument(
+            '--copies', type=int, default=1,
+            help='Repeat the catalogue this many times to model a larger registry (default: 1)',
+        )
+
+    def handle(self, *args, **options):
+        iterations = max(1, options['iterations'])
+        data = list(PluginSerializer(approved_plugins_queryset(), many=True).data) * max(1, options['copies'])
+        if not data:
+            raise CommandError('No approved plugins to benchmark; import some first.')
+
+        if renderers.orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed; the fast classes use the stdlib path.'))
+
+        stdlib_renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+        expected = stdlib_renderer.render(data)
+        if fast_renderer.render(data) != expected:
+            raise CommandError('FastJSONRenderer output differs from JSONRenderer output.')
+
+        stdlib_parser, fast_parser = JSONParser(), FastJSONParser()
+        results = [
+            ('encode', 'stdlib', _timings(lambda: stdlib_renderer.render(data), iterations)),
+            ('encode', 'fast', _timings(lambda: fast_renderer.render(data), iterations)),
+            ('decode', 'stdlib', _timings(lambda: stdlib_parser.parse(io.BytesIO(expected)), iterations)),
+            ('decode', 'fast', _timings(lambda: fast_parser.parse(io.BytesIO(expected)), iterations)),
+        ]
+
+        self.stdout.write(f"Payload: {len(data)} plugins, {len(expected)} bytes, {iterations} iterations")
+        best = {}
+        for operation, name, samples in results:
+            best[operation, name] = min(samples)
+            self.stdout.write(
+                f"  {operation} {name:<6} best {min(samples) * 1000:8.2f} ms"
+                f"  median {statistics.median(samples) * 1000:8.2f} ms"
+            )
+        for operation in ('encode', 'decode'):
+            speedup = best[operation, 'stdlib'] / best[operation, 'fast'] if best[operation, 'fast'] else 0
+            self.stdout.write(self.style.SUCCESS(f"{operation}: {speedup:.1f}x faster"))
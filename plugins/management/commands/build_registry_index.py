@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from plugins.registry_index import build_registry_index, build_stale_registry_index
+
+
+class Command(BaseCommand):
+    help = 'Write the precomputed approved-plugin index (JSON + gzip/brotli) under REGISTRY_INDEX_ROOT'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--watch', action='store_true',
+            help='Keep running and rebuild whenever plugin changes have marked the index stale',
+        )
+        parser.add_argument(
+            '--poll', type=float, default=5,
+            help='Seconds between stale checks with --watch; bounds how far the index lags (default: 5)',
+        )
+
+    def handle(self, *args, **options):
+        if not options['watch']:
+            self.report(build_registry_index())
+            return
+        try:
+            while True:
+                # The watcher runs unattended, so a failed round (the database
+                # going away, a full disk) is reported and retried next poll
+                try:
+                    manifest = build_stale_registry_index()
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f"Rebuild failed: {str(e) or type(e).__name__}"))
+                else:
+                    if manifest is not None:
+                        self.report(manifest)
+                time.sleep(options['poll'])
+                # A long-lived loop must not hold on to a dropped connection
+                close_old_connections()
+        except KeyboardInterrupt:
+            self.stdout.write('Stopped.')
+
+    def report(self, manifest):
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {manifest['count']} plugins ({manifest['size']} bytes) to {manifest['url']}"
+        ))
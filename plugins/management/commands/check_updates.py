@@ -0,0 +1,153 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from plugins.repositories import GIT_TIMEOUT, HostRateLimiter, find_ssh_key
+from plugins.sync import apply_plugin_source, fetch_plugin_source
+from plugins.updates import CHECK_INTERVAL, JITTER, MAX_BACKOFF, check_remote, due_plugins, record_check
+from plugins.viewsets import MANIFEST_ERRORS
+from plugins.webhooks import finish_refresh, pending_refreshes
+
+
+def ssh_key_for(plugin):
+    if plugin.requires_authentication and plugin.submitted_by_id:
+        return find_ssh_key(plugin.repository, plugin.submitted_by_id)
+    return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Periodically resolve remote refs for approved plugins and record which have updates; '
+        'also drains the refreshes queued by repository webhooks'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Check the plugins that are due and exit instead of looping',
+        )
+        parser.add_argument(
+            '--interval', type=int, default=CHECK_INTERVAL,
+            help=f'Seconds between checks of the same plugin (default: {CHECK_INTERVAL})',
+        )
+        parser.add_argument(
+            '--max-backoff', type=int, default=MAX_BACKOFF,
+            help=f'Longest wait before retrying a failing remote (default: {MAX_BACKOFF})',
+        )
+        parser.add_argument(
+            '--jitter', type=float, default=JITTER,
+            help=f'Fraction by which intervals are randomly spread (default: {JITTER})',
+        )
+        parser.add_argument(
+            '--poll', type=int, default=5,
+            help='Seconds the loop sleeps between rounds; bounds webhook latency (default: 5)',
+        )
+        parser.add_argument(
+            '--limit', type=int, default=500,
+            help='Most plugins checked per round (default: 500)',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=8,
+            help='Concurrent ls-remote calls (default: 8)',
+        )
+        parser.add_argument(
+            '--per-host-rate', type=float, default=2.0,
+            help='ls-remote calls per second against any one host, 0 for unlimited (default: 2)',
+        )
+        parser.add_argument(
+            '--timeout', type=int, default=GIT_TIMEOUT,
+            help=f'Seconds allowed per ls-remote (default: {GIT_TIMEOUT})',
+        )
+
+    def handle(self, *args, **options):
+        limiter = HostRateLimiter(options['per_host_rate'])
+        try:
+            while True:
+                try:
+                    self.drain_queue(limiter, options)
+                    self.check_due(limiter, options)
+                except Exception as e:
+                    if options['once']:
+                        raise
+                    # One bad round (the database going away mid-write) must not stop the scheduler
+                    self.stdout.write(self.style.ERROR(f"Round failed: {str(e) or type(e).__name__}"))
+                if options['once']:
+                    break
+                time.sleep(options['poll'] * random.uniform(1 - options['jitter'], 1 + options['jitter']))
+                # A long-lived loop must not hold on to a dropped connection
+                close_old_connections()
+        except KeyboardInterrupt:
+            self.stdout.write('Stopped.')
+
+    def drain_queue(self, limiter, options):
+        """Run the refreshes and checks webhooks queued, ahead of the scheduled checks."""
+        requests = list(pending_refreshes(options['limit']))
+        if not requests:
+            return
+
+        def run(job):
+            request, ssh_key = job
+            plugin = request.plugin
+            if request.kind == 'refresh':
+                return fetch_plugin_source(
+                    plugin.id, plugin.repository, ssh_key=ssh_key,
+                    limiter=limiter, timeout=options['timeout'], force=True,
+                )
+            return check_remote(plugin.id, plugin.repository, ssh_key, limiter=limiter, timeout=options['timeout'])
+
+        jobs = [(request, ssh_key_for(request.plugin)) for request in requests]
+        started = time.perf_counter()
+        counts = {'refresh': 0, 'check': 0, 'failed': 0}
+        with ThreadPoolExecutor(max_workers=max(1, min(options['workers'], len(jobs)))) as pool:
+            for request, result in zip(requests, pool.map(run, jobs)):
+                error = result['error']
+                if request.kind == 'refresh' and error is None:
+                    try:
+                        apply_plugin_source(request.plugin, result)
+                    except MANIFEST_ERRORS as e:
+                        error = str(e) or type(e).__name__
+                elif request.kind == 'check':
+                    record_check(request.plugin, result, options['interval'], options['max_backoff'], options['jitter'])
+                finish_refresh(request, error)
+                if error is not None:
+                    counts['failed'] += 1
+                    self.stdout.write(self.style.ERROR(f"{request.plugin_id} ({request.kind}): {error}"))
+                else:
+                    counts[request.kind] += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {len(requests)} queued requests ({counts['refresh']} refreshed, {counts['check']} checked, "
+            f"{counts['failed']} failed) in {time.perf_counter() - started:.2f}s"
+        ))
+
+    def check_due(self, limiter, options):
+        plugins = list(due_plugins(limit=options['limit']))
+        if not plugins:
+            if options['verbosity'] > 1:
+                self.stdout.write('No plugins due.')
+            return
+
+        jobs = [(plugin.id, plugin.repository, ssh_key_for(plugin)) for plugin in plugins]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, min(options['workers'], len(jobs)))) as pool:
+            results = pool.map(
+                lambda job: check_remote(*job, limiter=limiter, timeout=options['timeout']), jobs,
+            )
+            counts = {'updates': 0, 'failed': 0}
+            for plugin, result in zip(plugins, results):
+                record_check(plugin, result, options['interval'], options['max_backoff'], options['jitter'])
+                if result['error'] is not None:
+                    counts['failed'] += 1
+                    self.stdout.write(self.style.ERROR(
+                        f"{plugin.id}: {result['error']} (attempt {plugin.check_failures}, retry at {plugin.next_check_at:%Y-%m-%d %H:%M})"
+                    ))
+                elif plugin.has_update:
+                    counts['updates'] += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {len(plugins)} plugins ({counts['updates']} with updates, {counts['failed']} failed) "
+            f"in {time.perf_counter() - started:.2f}s"
+        ))
@@ -1,11 +1,25 @@
+import time
+
 from django.core.management.base import BaseCommand
-from django.contrib.auth.models import User
-from rest_framework.authtoken.models import Token
+
+from plugins.accounts import BATCH_SIZE, create_missing_tokens
 
 class Command(BaseCommand):
     help = 'Create tokens for all existing users who do not have one'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help=f'Tokens inserted per query (default: {BATCH_SIZE})',
+        )
+
     def handle(self, *args, **options):
-        for user in User.objects.all():
-            Token.objects.get_or_create(user=user)
-        self.stdout.write(self.style.SUCCESS('Successfully created tokens for all existing users.'))
+        started = time.perf_counter()
+        created = create_missing_tokens(
+            batch_size=max(1, options['batch_size']),
+            progress=lambda total: self.stdout.write(f'{total} tokens created...'),
+        )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully created tokens for all existing users ({created} new in {elapsed:.2f}s).'
+        ))
@@ -1,94 +1,80 @@
 import os
-import yaml
-from django.core.management.base import BaseCommand
-from plugins.models import Plugin, Author, Category, Runtime, Input, Output
+import time
+from concurrent.futures import ProcessPoolExecutor
 
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 
-class Command(BaseCommand):
-    help = 'Import a plugin from a plugin.yaml file'
-
-    def add_arguments(self, parser):
-        parser.add_argument('plugin_yaml_path', type=str, help='Path to the plugin.yaml file')
-
-    def handle(self, *args, **options):
-        yaml_path = options['plugin_yaml_path']
+from plugins.manifests import find_manifests, load_manifest
+from plugins.viewsets import MANIFEST_ERRORS, ingest_manifest
 
-        if not os.path.exists(yaml_path):
-            self.stdout.write(self.style.ERROR(f'File not found: {yaml_path}'))
-            return
 
-        with open(yaml_path, 'r') as f:
-            data = yaml.safe_load(f)
-
-        plugin_data = data.get('plugin', {})
-        plugin_id = plugin_data.get('id')
-
-        if not plugin_id:
-            self.stdout.write(self.style.ERROR('Plugin ID not found in YAML'))
-            return
-
-        author_name = plugin_data.get('author', 'CauldronGO Team')
-        author, _ = Author.objects.get_or_create(name=author_name)
-
-        category_name = plugin_data.get('category', 'utilities')
-        category, _ = Category.objects.get_or_create(name=category_name)
+class Command(BaseCommand):
+    help = 'Import plugins from plugin.yaml files, directory trees of them, or a list of paths'
 
-        plugin, created = Plugin.objects.update_or_create(
-            id=plugin_id,
-            defaults={
-                'name': plugin_data.get('name', plugin_id),
-                'description': plugin_data.get('description', ''),
-                'version': plugin_data.get('version', '1.0.0'),
-                'author': author,
-                'category': category,
-                'subcategory': plugin_data.get('subcategory'),
-                'icon': plugin_data.get('icon'),
-                'status': 'approved',
-            }
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*', type=str,
+            help='plugin.yaml files, or directories searched recursively for plugin.yaml',
         )
-
-        if created:
-            self.stdout.write(self.style.SUCCESS(f'Created plugin: {plugin.name}'))
-        else:
-            self.stdout.write(self.style.SUCCESS(f'Updated plugin: {plugin.name}'))
-
-        runtime_data = data.get('runtime', {})
-        Runtime.objects.update_or_create(
-            plugin=plugin,
-            defaults={
-                'environments': runtime_data.get('environments', []),
-                'entrypoint': runtime_data.get('entrypoint', ''),
-            }
+        parser.add_argument(
+            '--manifest-list', type=str,
+            help='File with one plugin.yaml or directory path per line',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1,
+            help='Processes parsing manifests and rendering READMEs (default: CPU count)',
         )
 
-        Input.objects.filter(plugin=plugin).delete()
-        for input_data in data.get('inputs', []):
-            Input.objects.create(
-                plugin=plugin,
-                name=input_data.get('name'),
-                label=input_data.get('label'),
-                type=input_data.get('type'),
-                required=input_data.get('required', False),
-                default=input_data.get('default'),
-                description=input_data.get('description'),
-                placeholder=input_data.get('placeholder'),
-                file_types=input_data.get('accept', '').split(',') if input_data.get('accept') else [],
-                multiple=input_data.get('multiple', False),
-                sourceFile=input_data.get('sourceFile'),
-                min=input_data.get('min'),
-                max=input_data.get('max'),
-                step=input_data.get('step'),
-            )
-
-        Output.objects.filter(plugin=plugin).delete()
-        for output_data in data.get('outputs', []):
-            Output.objects.create(
-                plugin=plugin,
-                name=output_data.get('name'),
-                path=output_data.get('path'),
-                type=output_data.get('type'),
-                description=output_data.get('description'),
-                format=output_data.get('format'),
-            )
-
-        self.stdout.write(self.style.SUCCESS(f'Successfully imported plugin {plugin.name} with {plugin.inputs.count()} inputs and {plugin.outputs.count()} outputs'))
+    def handle(self, *args, **options):
+        paths = list(options['paths'])
+        if options['manifest_list']:
+            with open(options['manifest_list'], 'r') as f:
+                paths += [line.strip() for line in f if line.strip() and not line.startswith('#')]
+        if not paths:
+            raise CommandError('Give at least one plugin.yaml, directory or --manifest-list.')
+
+        manifests = find_manifests(paths)
+        if not manifests:
+            raise CommandError('No plugin.yaml found.')
+        workers = max(1, min(options['workers'], len(manifests)))
+
+        started = time.perf_counter()
+        if workers == 1:
+            loaded = [load_manifest(path) for path in manifests]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                chunksize = max(1, len(manifests) // (workers * 4))
+                loaded = list(pool.map(load_manifest, manifests, chunksize=chunksize))
+        parsed = time.perf_counter()
+
+        counts = {'created': 0, 'updated': 0, 'failed': 0}
+        with transaction.atomic():
+            for path, plugin_data, readme, error in loaded:
+                if error is None:
+                    try:
+                        # A failing plugin rolls back to here and the rest carry on
+                        with transaction.atomic():
+                            plugin, created = ingest_manifest(
+                                plugin_data, readme,
+                                default_author='CauldronGO Team', default_category='utilities',
+                                status='approved',
+                            )
+                    except MANIFEST_ERRORS as e:
+                        error = str(e)
+                if error is not None:
+                    counts['failed'] += 1
+                    self.stdout.write(self.style.ERROR(f'{path}: {error}'))
+                    continue
+                counts['created' if created else 'updated'] += 1
+                if options['verbosity'] > 1:
+                    self.stdout.write(f"{'Created' if created else 'Updated'} plugin: {plugin.name}")
+        finished = time.perf_counter()
+
+        imported = counts['created'] + counts['updated']
+        total = finished - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {imported} plugins ({counts['created']} created, {counts['updated']} updated, "
+            f"{counts['failed']} failed) in {total:.2f}s: parsing {parsed - started:.2f}s on {workers} "
+            f"worker(s), saving {finished - parsed:.2f}s, {imported / total if total else 0:.1f} plugins/s"
+        ))
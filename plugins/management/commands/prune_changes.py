@@ -0,0 +1,20 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from plugins.changes import COMPACT_AFTER_DAYS, compact_changes
+
+
+class Command(BaseCommand):
+    help = 'Delete change log entries superseded by a newer change to the same plugin'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=COMPACT_AFTER_DAYS,
+            help=f'Only delete entries older than this many days (default: {COMPACT_AFTER_DAYS})',
+        )
+
+    def handle(self, *args, **options):
+        deleted = compact_changes(timezone.now() - timedelta(days=max(0, options['days'])))
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} superseded change log entries.'))
@@ -0,0 +1,169 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from plugins.models import Plugin
+from plugins.repositories import GIT_TIMEOUT, HostRateLimiter, find_ssh_key
+from plugins.sync import SyncCheckpoint, apply_plugin_source, fetch_plugin_source
+from plugins.viewsets import MANIFEST_ERRORS
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+class Command(BaseCommand):
+    help = 'Sync plugins to the latest commit of their repositories, resuming an interrupted run'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'plugin_ids', nargs='*', type=str,
+            help='Only sync these plugins (default: every plugin with a repository)',
+        )
+        parser.add_argument(
+            '--status', type=str, default='approved',
+            help="Only sync plugins with this status (default: approved, 'all' for any)",
+        )
+        parser.add_argument(
+            '--category', type=str,
+            help='Only sync plugins in this category',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=8,
+            help='Concurrent ls-remote/clone operations (default: 8)',
+        )
+        parser.add_argument(
+            '--per-host-rate', type=float, default=2.0,
+            help='Git operations per second against any one host, 0 for unlimited (default: 2)',
+        )
+        parser.add_argument(
+            '--timeout', type=int, default=GIT_TIMEOUT,
+            help=f'Seconds allowed per ls-remote or clone (default: {GIT_TIMEOUT})',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=50,
+            help='Plugins written per transaction and checkpoint (default: 50)',
+        )
+        parser.add_argument(
+            '--checkpoint', type=str,
+            help='File recording synced plugins so an interrupted run resumes '
+                 '(default: one per set of filters under the temp directory)',
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Ignore an existing checkpoint and sync everything again',
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Clone and re-ingest even when the remote HEAD matches the stored commit',
+        )
+
+    def handle(self, *args, **options):
+        plugins = Plugin.objects.exclude(repository__isnull=True).exclude(repository='')
+        if options['status'] != 'all':
+            plugins = plugins.filter(status=options['status'])
+        if options['plugin_ids']:
+            plugins = plugins.filter(id__in=options['plugin_ids'])
+        if options['category']:
+            plugins = plugins.filter(category__name=options['category'])
+
+        scope = {
+            'plugin_ids': sorted(options['plugin_ids']),
+            'status': options['status'],
+            'category': options['category'],
+        }
+        checkpoint = SyncCheckpoint(options['checkpoint'] or SyncCheckpoint.default_path(scope), scope)
+        if options['restart']:
+            checkpoint.clear()
+        try:
+            done = checkpoint.load()
+        except ValueError as e:
+            raise CommandError(f'{e}; pass --restart to discard it or --checkpoint to use another file.')
+        if done:
+            self.stdout.write(f'Resuming from {checkpoint.path}: {len(done)} plugins already synced')
+
+        rows = plugins.order_by('id').values_list(
+            'id', 'repository', 'commit_hash', 'requires_authentication', 'submitted_by_id',
+        )
+        jobs = [
+            (plugin_id, repository, commit_hash,
+             find_ssh_key(repository, owner_id) if requires_auth and owner_id else None)
+            for plugin_id, repository, commit_hash, requires_auth, owner_id in rows
+            if plugin_id not in done
+        ]
+        if not jobs:
+            checkpoint.clear()
+            self.stdout.write(self.style.SUCCESS('Nothing to sync.'))
+            return
+
+        workers = max(1, min(options['workers'], len(jobs)))
+        limiter = HostRateLimiter(options['per_host_rate'])
+        self.counts = {'updated': 0, 'unchanged': 0, 'failed': 0}
+        self.latencies = []
+
+        started = time.perf_counter()
+        pool = ThreadPoolExecutor(max_workers=workers)
+        batch = []
+        try:
+            futures = [
+                pool.submit(
+                    fetch_plugin_source, *job,
+                    limiter=limiter, timeout=options['timeout'], force=options['force'],
+                )
+                for job in jobs
+            ]
+            for future in as_completed(futures):
+                batch.append(future.result())
+                if len(batch) >= options['batch_size']:
+                    self.save_batch(batch, checkpoint, options['verbosity'])
+                    batch = []
+        except KeyboardInterrupt:
+            pool.shutdown(wait=False, cancel_futures=True)
+            self.save_batch(batch, checkpoint, options['verbosity'])
+            raise CommandError(f'Interrupted; run again to resume from {checkpoint.path}.')
+        pool.shutdown()
+        self.save_batch(batch, checkpoint, options['verbosity'])
+        total = time.perf_counter() - started
+        checkpoint.clear()
+
+        synced = sum(self.counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Synced {synced} plugins ({self.counts['updated']} updated, {self.counts['unchanged']} unchanged, "
+            f"{self.counts['failed']} failed) in {total:.2f}s on {workers} worker(s), "
+            f"{synced / total if total else 0:.1f} plugins/s; fetch latency p50 {percentile(self.latencies, 0.5):.2f}s, "
+            f"p95 {percentile(self.latencies, 0.95):.2f}s, max {max(self.latencies, default=0):.2f}s"
+        ))
+
+    def save_batch(self, batch, checkpoint, verbosity):
+        """Write fetched plugins in one transaction, then checkpoint everything that didn't fail."""
+        if not batch:
+            return
+        fetched = Plugin.objects.in_bulk([r['plugin_id'] for r in batch if r['status'] == 'fetched'])
+        with transaction.atomic():
+            for result in batch:
+                if result['status'] == 'fetched':
+                    try:
+                        with transaction.atomic():
+                            apply_plugin_source(fetched[result['plugin_id']], result)
+                    except MANIFEST_ERRORS as e:
+                        result.update(status='failed', error=str(e))
+        completed = []
+        for result in batch:
+            self.latencies.append(result['seconds'])
+            if result['status'] == 'failed':
+                self.counts['failed'] += 1
+                self.stdout.write(self.style.ERROR(f"{result['plugin_id']}: {result['error']}"))
+                continue
+            completed.append(result['plugin_id'])
+            if result['status'] == 'fetched':
+                self.counts['updated'] += 1
+                if verbosity > 1:
+                    self.stdout.write(f"Updated {result['plugin_id']} to {result['commit_hash'][:7]}")
+            else:
+                self.counts['unchanged'] += 1
+        checkpoint.add(completed)
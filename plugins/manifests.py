@@ -0,0 +1,141 @@
+"""
+Reading plugin manifests from a checked-out repository or a local tree.
+Nothing here touches Django, so it is safe to run in worker processes.
+"""
+import os
+import re
+
+import markdown
+import yaml
+
+MERMAID_BLOCK = re.compile(r'<pre><code class="language-mermaid">([\s\S]*?)</code></pre>')
+
+
+def get_primary_environment(runtime_info):
+    environments = runtime_info.get('environments', [])
+    if environments and len(environments) > 0:
+        return environments[0]
+    return ''
+
+
+def generate_mermaid_diagram(script_path, runtime_info):
+    if not os.path.exists(script_path):
+        return ""
+
+    try:
+        with open(script_path, 'r') as f:
+            content = f.read()
+    except Exception:
+        return ""
+
+    lines = content.split('\n')
+    steps = []
+
+    primary_env = get_primary_environment(runtime_info)
+
+    if primary_env == 'r':
+        pattern = re.compile(r'message\(.*\[(\d+)/(\d+)\]\s*(.+?)["\')]')
+    elif primary_env == 'python':
+        pattern = re.compile(r'(?:print|logger\.info)\(.*\[(\d+)/(\d+)\]\s*(.+?)["\')]')
+    else:
+        return ""
+
+    for line in lines:
+        match = pattern.search(line.strip())
+        if match:
+            label = match.group(3).strip()
+            if label and not label.startswith('='):
+                steps.append(label)
+
+    if not steps:
+        return ""
+
+    mermaid = ["```mermaid", "flowchart TD", "    Start([Start]) --> step1"]
+    for i, label in enumerate(steps):
+        step_id = f"step{i+1}"
+        mermaid.append(f"    {step_id}[{label}]")
+        if i < len(steps) - 1:
+            mermaid.append(f"    {step_id} --> step{i+2}")
+
+    mermaid.append(f"    step{len(steps)} --> End([End])")
+    mermaid.append("```")
+
+    return "\n## Workflow Diagram\n\n" + "\n".join(mermaid) + "\n"
+
+
+def render_readme(plugin_dir, plugin_data):
+    """
+    README.md next to the manifest rendered to HTML, with a generated
+    workflow diagram appended when the manifest enables one.
+    """
+    readme_path = os.path.join(plugin_dir, 'README.md')
+    raw_readme = ""
+    if os.path.exists(readme_path):
+        with open(readme_path, 'r') as f:
+            raw_readme = f.read()
+
+    diagram_enabled = (plugin_data.get('diagram') or {}).get('enabled', False)
+    if diagram_enabled and "```mermaid" not in raw_readme:
+        runtime_info = plugin_data.get('runtime', {})
+        entrypoint = runtime_info.get('entrypoint')
+        if entrypoint and runtime_info:
+            raw_readme += generate_mermaid_diagram(os.path.join(plugin_dir, entrypoint), runtime_info)
+
+    readme_content = markdown.markdown(raw_readme, extensions=['fenced_code', 'tables'])
+    return MERMAID_BLOCK.sub(r'<pre class="mermaid">\1</pre>', readme_content)
+
+
+# Sections a manifest may carry and the shape each must have
+MAPPING_SECTIONS = ('runtime', 'execution', 'annotation', 'example', 'diagram', 'citation')
+LIST_SECTIONS = ('inputs', 'outputs', 'plots')
+
+
+def manifest_problem(plugin_data):
+    """Why plugin_data can't be imported as a plugin manifest, or None if it can."""
+    if not isinstance(plugin_data, dict):
+        return 'not a plugin manifest'
+    plugin_info = plugin_data.get('plugin')
+    if plugin_info is not None and not isinstance(plugin_info, dict):
+        return "'plugin' must be a mapping"
+    if not (plugin_info or {}).get('id'):
+        return 'Plugin ID not found in YAML'
+    for section in MAPPING_SECTIONS:
+        if plugin_data.get(section) is not None and not isinstance(plugin_data[section], dict):
+            return f"'{section}' must be a mapping"
+    for section in LIST_SECTIONS:
+        items = plugin_data.get(section)
+        if items is not None and not (isinstance(items, list) and all(isinstance(item, dict) for item in items)):
+            return f"'{section}' must be a list of mappings"
+    return None
+
+
+def load_manifest(yaml_path):
+    """
+    Parse a plugin.yaml and render the README beside it.
+    Returns (yaml_path, plugin_data, readme_html, error); on failure only
+    the error is set, so a pool of these never raises mid-import.
+    """
+    try:
+        with open(yaml_path, 'r') as f:
+            plugin_data = yaml.safe_load(f)
+        problem = manifest_problem(plugin_data)
+        if problem:
+            return yaml_path, None, None, problem
+        readme = render_readme(os.path.dirname(os.path.abspath(yaml_path)), plugin_data)
+    except (OSError, yaml.YAMLError, UnicodeDecodeError) as e:
+        return yaml_path, None, None, str(e)
+    return yaml_path, plugin_data, readme, None
+
+
+def find_manifests(paths, filename='plugin.yaml'):
+    """plugin.yaml files among paths: files are taken as-is, directories are walked."""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+                if filename in files:
+                    found.append(os.path.join(root, filename))
+        else:
+            found.append(path)
+    return found
@@ -0,0 +1,26 @@
+# Generated by Django 6.0 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plugins', '0016_add_schema_v2_complete_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PluginChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('plugin_id', models.CharField(max_length=255)),
+                ('action', models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('status', 'Status changed'), ('deleted', 'Deleted')], max_length=10)),
+                ('status', models.CharField(blank=True, max_length=10, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['plugin_id', 'id'], name='pluginchange_plugin_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-19 10:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plugins', '0017_pluginchange'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='plugin',
+            index=models.Index(fields=['updated_at', 'id'], name='plugin_updated_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='plugin',
+            index=models.Index(fields=['name', 'id'], name='plugin_name_id_idx'),
+        ),
+    ]
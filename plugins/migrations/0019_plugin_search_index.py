@@ -0,0 +1,82 @@
+# Generated by Django 6.0 on 2026-10-19 10:41
+
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations, models
+from django.db.models import Value
+
+# Frozen copies of plugins.search as of this migration, so later changes to
+# the app code can't change what the backfill writes.
+SEARCH_CONFIG = 'english'
+
+
+def search_weights(plugin):
+    tags = plugin.tags.values_list('name', flat=True)
+    labels = plugin.inputs.values_list('label', flat=True)
+    classification = [
+        *tags,
+        plugin.author.name if plugin.author else '',
+        plugin.category.name if plugin.category else '',
+        plugin.subcategory or '',
+    ]
+    return {
+        'A': plugin.name or '',
+        'B': ' '.join(filter(None, classification)),
+        'C': plugin.description or '',
+        'D': ' '.join(filter(None, labels)),
+    }
+
+
+def build_search_vector(weights):
+    vector = None
+    for weight, text in weights.items():
+        part = SearchVector(Value(text), weight=weight, config=SEARCH_CONFIG)
+        vector = part if vector is None else vector + part
+    return vector
+
+
+def create_search_vector_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS plugin_search_vector_gin ON plugins_plugin USING gin (search_vector)'
+    )
+
+
+def drop_search_vector_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS plugin_search_vector_gin')
+
+
+def backfill_search_index(apps, schema_editor):
+    Plugin = apps.get_model('plugins', 'Plugin')
+    is_postgres = schema_editor.connection.vendor == 'postgresql'
+    for plugin in Plugin.objects.select_related('author', 'category').iterator():
+        weights = search_weights(plugin)
+        updates = {'search_document': ' '.join(text for text in weights.values() if text).lower()}
+        if is_postgres:
+            updates['search_vector'] = build_search_vector(weights)
+        Plugin.objects.filter(pk=plugin.pk).update(**updates)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plugins', '0018_plugin_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='plugin',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='plugin',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_vector_index, drop_search_vector_index),
+        migrations.RunPython(backfill_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 6.0 on 2026-10-19 11:26
+
+from django.db import DatabaseError, migrations, transaction
+
+TRIGRAM_INDEXES = (
+    ('plugin_name_trgm', 'plugins_plugin'),
+    ('tag_name_trgm', 'plugins_tag'),
+    ('category_name_trgm', 'plugins_category'),
+)
+
+
+def create_trigram_indexes(apps, schema_editor):
+    # pg_trgm is optional: without it (or on other backends) suggestions fall
+    # back to the in-process trie in plugins.suggest.
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    try:
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    except DatabaseError:
+        return
+    for index_name, table in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {index_name} ON {table} USING gin (name gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for index_name, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {index_name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plugins', '0019_plugin_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 6.0 on 2026-10-19 12:15
+
+import django.db.models.deletion
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def plugin_facet_values(plugin):
+    """Frozen copy of plugins.facets.plugin_facet_values as of this migration."""
+    values = {
+        ('requires_authentication', 'true' if plugin.requires_authentication else 'false'),
+        ('diagram_enabled', 'true' if plugin.diagram_enabled else 'false'),
+    }
+    values.update(('tag', name) for name in plugin.tags.values_list('name', flat=True))
+    try:
+        environments = plugin.runtime.environments or []
+    except ObjectDoesNotExist:
+        environments = []
+    values.update(('environment', str(env)) for env in environments)
+    values.update(('input_type', t) for t in plugin.inputs.values_list('type', flat=True).distinct() if t)
+    values.update(('output_type', t) for t in plugin.outputs.values_list('type', flat=True).distinct() if t)
+    return values
+
+
+def backfill_facets(apps, schema_editor):
+    Plugin = apps.get_model('plugins', 'Plugin')
+    PluginFacet = apps.get_model('plugins', 'PluginFacet')
+    FacetCount = apps.get_model('plugins', 'FacetCount')
+    for plugin in Plugin.objects.iterator():
+        counted = plugin.status == 'approved'
+        PluginFacet.objects.bulk_create([
+            PluginFacet(plugin=plugin, facet=facet, value=value, counted=counted)
+            for facet, value in plugin_facet_values(plugin)
+        ])
+    totals = PluginFacet.objects.filter(counted=True).values('facet', 'value').annotate(total=Count('id'))
+    FacetCount.objects.bulk_create([
+        FacetCount(facet=row['facet'], value=row['value'], count=row['total']) for row in totals
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plugins', '0020_trigram_suggest_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FacetCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facet', models.CharField(choices=[('tag', 'Tag'), ('environment', 'Runtime environment'), ('input_type', 'Input type'), ('output_type', 'Output type'), ('requires_authentication', 'Requires authentication'), ('diagram_enabled', 'Diagram enabled')], max_length=50)),
+                ('value', models.CharField(max_length=255)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('facet', 'value')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PluginFacet',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facet', models.CharField(choices=[('tag', 'Tag'), ('environment', 'Runtime environment'), ('input_type', 'Input type'), ('output_type', 'Output type'), ('requires_authentication', 'Requires authentication'), ('diagram_enabled', 'Diagram enabled')], max_length=50)),
+                ('value', models.CharField(max_length=255)),
+                ('counted', models.BooleanField(default=False)),
+                ('plugin', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='facets', to='plugins.plugin')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['facet', 'value', 'plugin'], name='pluginfacet_lookup_idx')],
+                'unique_together': {('plugin', 'facet', 'value')},
+            },
+        ),
+        migrations.RunPython(backfill_facets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-19 13:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plugins', '0021_plugin_facets'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='plugin',
+            index=models.Index(fields=['status', 'updated_at'], name='plugin_status_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='plugin',
+            index=models.Index(fields=['submitted_by', 'updated_at'], name='plugin_owner_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 6.0 on 2026-10-19 13:40
+
+from django.db import migrations, models
+
+# Frozen copy of plugins.spec as of this migration, run against the
+# historical models.
+PLUGIN_FIELDS = ('id', 'name', 'description', 'version', 'subcategory', 'icon', 'diagram_enabled', 'citation_enabled')
+
+COMPONENTS = {
+    'runtime': ('Runtime', False),
+    'inputs': ('Input', True),
+    'outputs': ('Output', True),
+    'env_variables': ('PluginEnvVariable', True),
+    'execution': ('Execution', False),
+    'plots': ('Plot', True),
+    'annotation': ('Annotation', False),
+    'example': ('Example', False),
+}
+
+
+def component_spec(obj):
+    fields = [field for field in obj._meta.concrete_fields if field.name not in ('id', 'plugin')]
+    return {field.name: field.to_python(field.value_from_object(obj)) for field in fields}
+
+
+def backfill_spec(apps, schema_editor):
+    Plugin = apps.get_model('plugins', 'Plugin')
+    models_by_key = {key: (apps.get_model('plugins', name), many) for key, (name, many) in COMPONENTS.items()}
+    for plugin in Plugin.objects.select_related('author', 'category').iterator():
+        spec = {
+            'plugin': {
+                **{name: getattr(plugin, name) for name in PLUGIN_FIELDS},
+                'author': plugin.author.name if plugin.author_id else None,
+                'category': plugin.category.name if plugin.category_id else None,
+            },
+            'tags': sorted(plugin.tags.values_list('name', flat=True)),
+        }
+        for key, (model, many) in models_by_key.items():
+            rows = model.objects.filter(plugin_id=plugin.pk).order_by('pk')
+            if many:
+                spec[key] = [component_spec(row) for row in rows]
+            else:
+                row = rows.first()
+                spec[key] = component_spec(row) if row is not None else None
+        Plugin.objects.filter(pk=plugin.pk).update(spec=spec)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plugins', '0022_plugin_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='plugin',
+            name='spec',
+            field=models.JSONField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_spec, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 6.0 on 2026-10-19 14:05
+
+import hashlib
+import json
+import zlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def encode_spec(spec):
+    """Frozen copy of plugins.revisions.encode_spec as of this migration."""
+    return json.dumps(spec, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def backfill_revisions(apps, schema_editor):
+    Plugin = apps.get_model('plugins', 'Plugin')
+    PluginRevision = apps.get_model('plugins', 'PluginRevision')
+    RevisionBlob = apps.get_model('plugins', 'RevisionBlob')
+
+    def blob(content):
+        return RevisionBlob.objects.get_or_create(
+            sha256=hashlib.sha256(content).hexdigest(),
+            defaults={'data': zlib.compress(content, 9), 'size': len(content)},
+        )[0]
+
+    for plugin in Plugin.objects.exclude(commit_hash__isnull=True).exclude(commit_hash='').exclude(spec__isnull=True).iterator():
+        PluginRevision.objects.create(
+            plugin=plugin,
+            commit_hash=plugin.commit_hash,
+            version=plugin.version,
+            spec_blob=blob(encode_spec(plugin.spec)),
+            readme_blob=blob(plugin.readme.encode('utf-8')) if plugin.readme else None,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plugins', '0023_plugin_spec'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevisionBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('data', models.BinaryField()),
+                ('size', models.PositiveIntegerField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PluginRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('commit_hash', models.CharField(max_length=255)),
+                ('version', models.CharField(blank=True, max_length=255, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('plugin', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='plugins.plugin')),
+                ('readme_blob', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='readme_revisions', to='plugins.revisionblob')),
+                ('spec_blob', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='spec_revisions', to='plugins.revisionblob')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['plugin', 'created_at'], name='pluginrevision_history_idx')],
+                'unique_together': {('plugin', 'commit_hash')},
+            },
+        ),
+        migrations.RunPython(backfill_revisions, migrations.RunPython.noop),
+    ]
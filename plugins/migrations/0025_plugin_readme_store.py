@@ -0,0 +1,53 @@
+# Generated by Django 6.0 on 2026-10-19 15:10
+
+import gzip
+import hashlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def move_readmes(apps, schema_editor):
+    Plugin = apps.get_model('plugins', 'Plugin')
+    PluginReadme = apps.get_model('plugins', 'PluginReadme')
+    rows = Plugin.objects.exclude(readme__isnull=True).values_list('pk', 'readme')
+    for pk, readme in rows.iterator():
+        content = readme.encode('utf-8')
+        PluginReadme.objects.create(
+            plugin_id=pk,
+            data=gzip.compress(content, 9, mtime=0),
+            size=len(content),
+            sha256=hashlib.sha256(content).hexdigest(),
+        )
+
+
+def restore_readmes(apps, schema_editor):
+    Plugin = apps.get_model('plugins', 'Plugin')
+    PluginReadme = apps.get_model('plugins', 'PluginReadme')
+    for store in PluginReadme.objects.iterator():
+        readme = gzip.decompress(bytes(store.data)).decode('utf-8')
+        Plugin.objects.filter(pk=store.plugin_id).update(readme=readme)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plugins', '0024_plugin_revisions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PluginReadme',
+            fields=[
+                ('plugin', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='readme_store', serialize=False, to='plugins.plugin')),
+                ('data', models.BinaryField()),
+                ('size', models.PositiveIntegerField()),
+                ('sha256', models.CharField(max_length=64)),
+            ],
+        ),
+        migrations.RunPython(move_readmes, restore_readmes),
+        migrations.RemoveField(
+            model_name='plugin',
+            name='readme',
+        ),
+    ]
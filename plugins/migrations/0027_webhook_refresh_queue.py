@@ -0,0 +1,62 @@
+# Generated by Django 6.0 on 2026-10-19 16:40
+
+import django.db.models.deletion
+import re
+from urllib.parse import urlparse
+
+from django.db import migrations, models
+
+# Frozen copy of plugins.repository_keys as of this migration
+SCP_LIKE = re.compile(r'^(?:[^@/\s]+@)?([^:/\s]+):(?!//)(.*)$')
+
+
+def repository_key(repo_url):
+    if not repo_url:
+        return ''
+    url = repo_url.strip()
+    scp = SCP_LIKE.match(url)
+    if scp and '://' not in url:
+        host, path = scp.groups()
+    else:
+        parsed = urlparse(url)
+        host, path = parsed.hostname or '', parsed.path
+    path = path.strip('/').removesuffix('.git').rstrip('/')
+    return f'{host}/{path}'.lower()
+
+
+def fill_repository_keys(apps, schema_editor):
+    Plugin = apps.get_model('plugins', 'Plugin')
+    rows = Plugin.objects.exclude(repository__isnull=True).exclude(repository='').values_list('pk', 'repository')
+    for pk, repository in rows.iterator():
+        Plugin.objects.filter(pk=pk).update(repository_key=repository_key(repository))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plugins', '0026_plugin_update_checks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='plugin',
+            name='repository_key',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=500),
+        ),
+        migrations.RunPython(fill_repository_keys, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='PluginRefreshRequest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('refresh', 'Refresh'), ('check', 'Check')], max_length=10)),
+                ('commit', models.CharField(blank=True, max_length=255, null=True)),
+                ('source', models.CharField(blank=True, default='', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('requested_at', models.DateTimeField(auto_now=True, db_index=True)),
+                ('plugin', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='refresh_requests', to='plugins.plugin')),
+            ],
+            options={
+                'unique_together': {('plugin', 'kind')},
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 6.0 on 2026-10-19 17:15
+
+import re
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Frozen copy of plugins.repository_keys as of this migration
+SCP_LIKE = re.compile(r'^(?:[^@/\s]+@)?([^:/\s]+):(?!//)(.*)$')
+
+
+def repository_key(repo_url):
+    if not repo_url:
+        return ''
+    url = repo_url.strip()
+    scp = SCP_LIKE.match(url)
+    if scp and '://' not in url:
+        host, path = scp.groups()
+    else:
+        parsed = urlparse(url)
+        host, path = parsed.hostname or '', parsed.path
+    path = path.strip('/').removesuffix('.git').rstrip('/')
+    return f'{host}/{path}'.lower()
+
+
+def fill_repository_keys(apps, schema_editor):
+    RepositorySSHKey = apps.get_model('plugins', 'RepositorySSHKey')
+    for pk, repository_url in RepositorySSHKey.objects.values_list('pk', 'repository_url').iterator():
+        RepositorySSHKey.objects.filter(pk=pk).update(repository_key=repository_key(repository_url))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plugins', '0027_webhook_refresh_queue'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='repositorysshkey',
+            name='repository_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=500),
+        ),
+        migrations.RunPython(fill_repository_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='repositorysshkey',
+            index=models.Index(fields=['user', 'repository_key'], name='sshkey_user_repo_key_idx'),
+        ),
+    ]
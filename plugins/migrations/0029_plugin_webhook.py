@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-19 17:50
+
+import django.db.models.deletion
+import plugins.encrypted_fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plugins', '0028_ssh_key_repository_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PluginWebhook',
+            fields=[
+                ('plugin', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='webhook', serialize=False, to='plugins.plugin')),
+                ('secret', plugins.encrypted_fields.EncryptedCharField(max_length=512)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
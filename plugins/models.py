@@ -1,6 +1,12 @@
-from django.db import models
+import gzip
+import hashlib
+import secrets
+
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchVectorField
 from .encrypted_fields import EncryptedTextField, EncryptedCharField
+from .repository_keys import repository_key
 
 class UserProfile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -9,6 +15,26 @@ class UserProfile(models.Model):
     def __str__(self):
         return self.user.username
 
+    @classmethod
+    def from_db(cls, db, field_names, values, *args, **kwargs):
+        instance = super().from_db(db, field_names, values, *args, **kwargs)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_values = {field.attname: getattr(self, field.attname) for field in self._meta.concrete_fields}
+
+    def changed_fields(self):
+        """Names of fields edited since the row was loaded or saved; None for unsaved profiles."""
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return None
+        return [
+            field.name for field in self._meta.concrete_fields
+            if field.attname in loaded and getattr(self, field.attname) != loaded[field.attname]
+        ]
+
 class Author(models.Model):
     name = models.CharField(max_length=255, unique=True)
     email = models.EmailField(blank=True, null=True)
@@ -38,10 +64,19 @@ class Plugin(models.Model):
     subcategory = models.CharField(max_length=255, blank=True, null=True)
     icon = models.CharField(max_length=255, blank=True, null=True)
     repository = models.URLField(blank=True, null=True)
+    # repository_key(repository), kept on save; maps webhook deliveries to plugins
+    repository_key = models.CharField(max_length=500, blank=True, default='', editable=False, db_index=True)
     commit_hash = models.CharField(max_length=255, blank=True, null=True)
     recommended_commit = models.CharField(max_length=255, blank=True, null=True)
     latest_stable_tag = models.CharField(max_length=255, blank=True, null=True)
-    readme = models.TextField(blank=True, null=True)
+    # Remote state recorded by the check_updates scheduler; next_check_at
+    # and check_failures drive its interval and backoff.
+    latest_commit = models.CharField(max_length=255, blank=True, null=True, editable=False)
+    has_update = models.BooleanField(default=False, editable=False)
+    last_checked_at = models.DateTimeField(blank=True, null=True, editable=False)
+    next_check_at = models.DateTimeField(blank=True, null=True, editable=False)
+    check_failures = models.PositiveIntegerField(default=0, editable=False)
+    last_check_error = models.TextField(blank=True, default='', editable=False)
     diagram_enabled = models.BooleanField(default=False)
     citation_enabled = models.BooleanField(default=False)
     requires_authentication = models.BooleanField(default=False)
@@ -50,10 +85,223 @@ class Plugin(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     tags = models.ManyToManyField('Tag', through='PluginTag', related_name='plugins', blank=True)
+    # Denormalized search columns maintained by plugins.search.update_search_index.
+    # search_vector is only populated (and GIN-indexed) on Postgres.
+    search_document = models.TextField(blank=True, default='', editable=False)
+    search_vector = SearchVectorField(blank=True, null=True, editable=False)
+    # The whole normalized manifest in one document, written alongside the
+    # component tables by plugins.spec so full-spec reads are a single-row fetch.
+    spec = models.JSONField(blank=True, null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Listing orders; public listings walk them and filter on status
+            models.Index(fields=['updated_at', 'id'], name='plugin_updated_id_idx'),
+            models.Index(fields=['name', 'id'], name='plugin_name_id_idx'),
+            # Staff/admin listings filtered by status, and per-owner listings
+            models.Index(fields=['status', 'updated_at'], name='plugin_status_updated_idx'),
+            models.Index(fields=['submitted_by', 'updated_at'], name='plugin_owner_updated_idx'),
+            models.Index(fields=['next_check_at'], name='plugin_next_check_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    # The rendered README lives in PluginReadme so plugin rows stay small.
+    # Assigning plugin.readme (or passing readme= to create/update_or_create)
+    # is written through on the next save().
+    @property
+    def readme(self):
+        if '_pending_readme' in self.__dict__:
+            return self._pending_readme
+        try:
+            return self.readme_store.html
+        except PluginReadme.DoesNotExist:
+            return None
+
+    @readme.setter
+    def readme(self, value):
+        self._pending_readme = value
+
+    def pending_update(self):
+        """Whether the recommended (else latest known) commit differs from the installed one."""
+        recommended = self.recommended_commit or self.latest_commit
+        return bool(recommended) and recommended != self.commit_hash
+
+    def save(self, *args, **kwargs):
+        if 'repository' in self.__dict__:
+            self.repository_key = repository_key(self.repository)
+        # Deferred instances keep whatever has_update the row already has
+        if {'commit_hash', 'recommended_commit', 'latest_commit'} <= self.__dict__.keys():
+            self.has_update = self.pending_update()
+        if '_pending_readme' not in self.__dict__:
+            return super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            PluginReadme.store(self, self.__dict__.pop('_pending_readme'))
+
+class PluginReadme(models.Model):
+    """
+    A plugin's rendered README, gzip-compressed. The bytes are deterministic
+    (mtime 0) and go out unchanged to clients that accept gzip.
+    """
+    plugin = models.OneToOneField(Plugin, on_delete=models.CASCADE, primary_key=True, related_name='readme_store')
+    data = models.BinaryField()
+    size = models.PositiveIntegerField()
+    sha256 = models.CharField(max_length=64)
+
+    def __str__(self):
+        return f"{self.plugin_id} README ({self.size} bytes)"
+
+    @property
+    def html(self):
+        return gzip.decompress(bytes(self.data)).decode('utf-8')
+
+    @staticmethod
+    def compress(html):
+        content = html.encode('utf-8')
+        return {
+            'data': gzip.compress(content, 9, mtime=0),
+            'size': len(content),
+            'sha256': hashlib.sha256(content).hexdigest(),
+        }
+
+    @classmethod
+    def store(cls, plugin, html):
+        """Replace the plugin's README; None removes it."""
+        if html is None:
+            cls.objects.filter(plugin=plugin).delete()
+            store = None
+        else:
+            store, _ = cls.objects.update_or_create(plugin=plugin, defaults=cls.compress(html))
+        plugin.readme_store = store
+        return store
+
+class PluginWebhook(models.Model):
+    """
+    The secret a plugin's repository signs its push webhooks with. Each
+    plugin has its own, so one leaked secret can't trigger refreshes of
+    other owners' plugins.
+    """
+    plugin = models.OneToOneField(Plugin, on_delete=models.CASCADE, primary_key=True, related_name='webhook')
+    secret = EncryptedCharField(max_length=512)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.plugin_id} webhook"
+
+    @classmethod
+    def rotate(cls, plugin):
+        """Give the plugin a new random secret, replacing any previous one."""
+        webhook, _ = cls.objects.update_or_create(plugin=plugin, defaults={'secret': secrets.token_hex(32)})
+        return webhook
+
+class PluginRefreshRequest(models.Model):
+    """
+    Work queued by repository webhooks and drained by the check_updates
+    command: 'refresh' re-ingests the plugin from its repository, 'check'
+    only re-resolves its remote refs. One row per plugin and kind; a
+    repeat delivery updates it rather than queueing again.
+    """
+    KIND_CHOICES = [
+        ('refresh', 'Refresh'),
+        ('check', 'Check'),
+    ]
+    plugin = models.ForeignKey(Plugin, on_delete=models.CASCADE, related_name='refresh_requests')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    commit = models.CharField(max_length=255, blank=True, null=True)
+    source = models.CharField(max_length=20, blank=True, default='')
+    attempts = models.PositiveIntegerField(default=0)
+    requested_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        unique_together = ('plugin', 'kind')
+
+    def __str__(self):
+        return f"{self.kind} {self.plugin_id}"
+
+class PluginChange(models.Model):
+    """Append-only change log backing the delta-sync endpoint; the id is the client cursor."""
+    ACTION_CHOICES = [
+        ('created', 'Created'),
+        ('updated', 'Updated'),
+        ('status', 'Status changed'),
+        ('deleted', 'Deleted'),
+    ]
+    plugin_id = models.CharField(max_length=255)
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    status = models.CharField(max_length=10, blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['plugin_id', 'id'], name='pluginchange_plugin_idx')]
+
+    def __str__(self):
+        return f"{self.plugin_id} - {self.action}"
+
+class RevisionBlob(models.Model):
+    """zlib-compressed content shared by every revision whose spec or README hashes the same."""
+    sha256 = models.CharField(max_length=64, unique=True)
+    data = models.BinaryField()
+    size = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.size} bytes)"
+
+class PluginRevision(models.Model):
+    """What a plugin's parsed spec and rendered README looked like at one commit."""
+    plugin = models.ForeignKey(Plugin, on_delete=models.CASCADE, related_name='revisions')
+    commit_hash = models.CharField(max_length=255)
+    version = models.CharField(max_length=255, blank=True, null=True)
+    spec_blob = models.ForeignKey(RevisionBlob, on_delete=models.PROTECT, related_name='spec_revisions')
+    readme_blob = models.ForeignKey(
+        RevisionBlob, on_delete=models.PROTECT, related_name='readme_revisions', null=True, blank=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('plugin', 'commit_hash')
+        indexes = [models.Index(fields=['plugin', 'created_at'], name='pluginrevision_history_idx')]
+
+    def __str__(self):
+        return f"{self.plugin_id} @ {self.commit_hash[:7]}"
+
+class PluginFacet(models.Model):
+    """Facet values of one plugin; the indexed filter path for faceted browsing."""
+    FACET_CHOICES = [
+        ('tag', 'Tag'),
+        ('environment', 'Runtime environment'),
+        ('input_type', 'Input type'),
+        ('output_type', 'Output type'),
+        ('requires_authentication', 'Requires authentication'),
+        ('diagram_enabled', 'Diagram enabled'),
+    ]
+    plugin = models.ForeignKey(Plugin, on_delete=models.CASCADE, related_name='facets')
+    facet = models.CharField(max_length=50, choices=FACET_CHOICES)
+    value = models.CharField(max_length=255)
+    # Whether this row is currently included in FacetCount (approved plugins only)
+    counted = models.BooleanField(default=False)
+
+    class Meta:
+        unique_together = ('plugin', 'facet', 'value')
+        indexes = [models.Index(fields=['facet', 'value', 'plugin'], name='pluginfacet_lookup_idx')]
+
+    def __str__(self):
+        return f"{self.plugin_id} - {self.facet}={self.value}"
+
+class FacetCount(models.Model):
+    """Approved-plugin counts per facet value, adjusted incrementally by plugins.facets."""
+    facet = models.CharField(max_length=50, choices=PluginFacet.FACET_CHOICES)
+    value = models.CharField(max_length=255)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('facet', 'value')
+
+    def __str__(self):
+        return f"{self.facet}={self.value} ({self.count})"
+
 class Tag(models.Model):
     name = models.CharField(max_length=255, unique=True)
 
@@ -180,6 +428,8 @@ class Example(models.Model):
 class RepositorySSHKey(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='ssh_keys')
     repository_url = models.CharField(max_length=500)
+    # repository_key(repository_url), kept on save; what find_ssh_key matches on
+    repository_key = models.CharField(max_length=500, blank=True, default='', editable=False)
     ssh_private_key = EncryptedTextField()
     passphrase = EncryptedCharField(max_length=1024, blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -187,7 +437,14 @@ class RepositorySSHKey(models.Model):
 
     class Meta:
         unique_together = ('user', 'repository_url')
+        indexes = [
+            models.Index(fields=['user', 'repository_key'], name='sshkey_user_repo_key_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.repository_url}"
 
+    def save(self, *args, **kwargs):
+        self.repository_key = repository_key(self.repository_url)
+        super().save(*args, **kwargs)
+
@@ -0,0 +1,154 @@
+import json
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, CursorPagination, LimitOffsetPagination
+
+
+class PluginCursorPagination(CursorPagination):
+    """
+    Keyset pagination over (updated_at, id) or (name, id). Each page is an
+    indexed range scan from the cursor position, so deep pages cost the same
+    as the first one and do not shift while plugins are being ingested.
+
+    DRF's CursorPagination filters on the first ordering field alone and
+    steps over ties with an offset, so rows sharing an updated_at or name
+    can be skipped or repeated. Here the cursor position is the whole
+    (value, id) tuple and pages start strictly after it in tuple order;
+    the id makes every position unique, so the offset is always 0.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    orderings = {
+        '-updated_at': ('-updated_at', '-id'),
+        'updated_at': ('updated_at', 'id'),
+        'name': ('name', 'id'),
+        '-name': ('-name', '-id'),
+    }
+    default_ordering = '-updated_at'
+
+    def get_ordering(self, request, queryset, view):
+        ordering = request.query_params.get('ordering', self.default_ordering)
+        return self.orderings.get(ordering, self.orderings[self.default_ordering])
+
+    def _get_position_from_instance(self, instance, ordering):
+        return json.dumps([str(getattr(instance, term.lstrip('-'))) for term in ordering])
+
+    def decode_position(self, position):
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    @staticmethod
+    def following(ordering, values):
+        """
+        Rows strictly after `values` in `ordering`:
+        (a > x) OR (a = x AND b > y), with < for descending terms. The
+        leading a >= x bound keeps it a range scan on the (a, id) index.
+        """
+        fields = [term.lstrip('-') for term in ordering]
+        lookups = ['__lt' if term.startswith('-') else '__gt' for term in ordering]
+        clauses = [
+            Q(**dict(zip(fields[:i], values[:i])), **{fields[i] + lookups[i]: values[i]})
+            for i in range(len(fields))
+        ]
+        leading = Q(**{fields[0] + ('__lte' if ordering[0].startswith('-') else '__gte'): values[0]})
+        return leading & reduce(or_, clauses)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # CursorPagination.paginate_queryset with the tuple comparison in place of its single-field filter
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            offset, reverse, current_position = 0, False, None
+        else:
+            offset, reverse, current_position = self.cursor
+
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(term[1:] if term.startswith('-') else f'-{term}' for term in ordering)
+        queryset = queryset.order_by(*ordering)
+        if current_position is not None:
+            queryset = queryset.filter(self.following(ordering, self.decode_position(current_position)))
+
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = current_position is not None or offset > 0
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None or offset > 0
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+
+class PluginPagination(BasePagination):
+    """
+    Keeps LimitOffsetPagination as the default and switches to cursor
+    pagination when the client sends ?cursor= or ?pagination=cursor.
+    """
+
+    def __init__(self):
+        self.offset_pagination = LimitOffsetPagination()
+        self.cursor_pagination = PluginCursorPagination()
+        self.active = self.offset_pagination
+
+    def use_cursor(self, request):
+        params = request.query_params
+        return self.cursor_pagination.cursor_query_param in params or params.get('pagination') == 'cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request):
+            self.active = self.cursor_pagination
+        return self.active.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.active.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.active.get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        return (
+            self.offset_pagination.get_schema_operation_parameters(view)
+            + self.cursor_pagination.get_schema_operation_parameters(view)
+        )
+
+    @property
+    def display_page_controls(self):
+        return self.active.display_page_controls
+
+    def to_html(self):
+        return self.active.to_html()
@@ -0,0 +1,22 @@
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+
+from .encodings import accepts_encoding
+
+
+def readme_response(request, store):
+    """
+    A stored README as text/html. Clients that accept gzip get the stored
+    bytes as they are; anyone else gets them decompressed.
+    """
+    etag = f'"{store.sha256}"'
+    if etag in request.META.get('HTTP_IF_NONE_MATCH', ''):
+        response = HttpResponseNotModified()
+    elif accepts_encoding(request, 'gzip'):
+        response = HttpResponse(bytes(store.data), content_type='text/html; charset=utf-8')
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(store.html, content_type='text/html; charset=utf-8')
+    response['ETag'] = etag
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
@@ -0,0 +1,157 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Plugin
+from .renderers import FastJSONRenderer, MessagePackRenderer
+from .serializer_cache import KEY_FIELDS, plugin_representations, with_representation_relations
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+INDEX_PREFIX = 'index'
+MANIFEST_NAME = 'latest.json'
+KEEP_PREVIOUS = 3
+
+# Touched when the catalogue changes; build_registry_index --watch rebuilds
+# once per poll however many changes landed in between.
+STALE_MARKER = '.stale'
+
+
+def get_index_root():
+    return str(settings.REGISTRY_INDEX_ROOT)
+
+
+def approved_plugins_queryset():
+    """Approved plugins with every relation the serializer walks loaded up front."""
+    return with_representation_relations(Plugin.objects.filter(status='approved')).order_by('id')
+
+
+def _write_atomic(path, content):
+    directory = os.path.dirname(path)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def _write_compressed(path, content):
+    _write_atomic(path, content)
+    _write_atomic(path + '.gz', gzip.compress(content, compresslevel=9, mtime=0))
+    if brotli is not None:
+        _write_atomic(path + '.br', brotli.compress(content, quality=11))
+
+
+def _prune_old_indexes(root, current_name):
+    """Keep a few previous artifacts around for clients mid-download."""
+    names = [
+        name for name in os.listdir(root)
+        if name.startswith(f'{INDEX_PREFIX}.') and name.endswith('.json')
+        and name != current_name and name != MANIFEST_NAME
+    ]
+    names.sort(key=lambda name: os.path.getmtime(os.path.join(root, name)), reverse=True)
+    for name in names[KEEP_PREVIOUS:]:
+        stem = name[:-len('.json')]
+        for candidate in os.listdir(root):
+            if candidate.startswith(stem + '.'):
+                try:
+                    os.unlink(os.path.join(root, candidate))
+                except OSError:
+                    pass
+
+
+def build_registry_index():
+    """
+    Write the approved catalogue as a content-hashed JSON document (and a
+    MessagePack twin when msgpack is installed) plus pre-compressed
+    gzip/brotli variants, then point latest.json at it.
+    Returns the manifest dict.
+    """
+    root = get_index_root()
+    os.makedirs(root, exist_ok=True)
+
+    # Reuses the per-plugin serializer cache, so a rebuild after one plugin
+    # changed only serializes that plugin.
+    approved = Plugin.objects.filter(status='approved').only(*KEY_FIELDS).order_by('id')
+    data = plugin_representations(approved)
+    content = FastJSONRenderer().render(data)
+
+    digest = hashlib.sha256(content).hexdigest()
+    name = f'{INDEX_PREFIX}.{digest[:16]}.json'
+    path = os.path.join(root, name)
+
+    if not os.path.exists(path):
+        _write_compressed(path, content)
+
+    manifest = {
+        'url': settings.REGISTRY_INDEX_URL + name,
+        'sha256': digest,
+        'size': len(content),
+        'count': len(data),
+        'generated_at': timezone.now().isoformat(),
+    }
+
+    if msgpack is not None:
+        # Same stem as the JSON artifact so both are pruned together.
+        packed = MessagePackRenderer().render(data)
+        packed_name = f'{INDEX_PREFIX}.{digest[:16]}.msgpack'
+        packed_path = os.path.join(root, packed_name)
+        if not os.path.exists(packed_path):
+            _write_compressed(packed_path, packed)
+        manifest['msgpack'] = {
+            'url': settings.REGISTRY_INDEX_URL + packed_name,
+            'sha256': hashlib.sha256(packed).hexdigest(),
+            'size': len(packed),
+        }
+
+    _write_atomic(os.path.join(root, MANIFEST_NAME), json.dumps(manifest).encode('utf-8'))
+    _prune_old_indexes(root, name)
+    return manifest
+
+
+def mark_registry_index_stale():
+    root = get_index_root()
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, STALE_MARKER), 'ab'):
+        pass
+
+
+def build_stale_registry_index():
+    """
+    Rebuild if the index was marked stale, returning the manifest, else
+    None. The marker is claimed by renaming it first, so a change that
+    lands during the build leaves a fresh marker for the next round.
+    """
+    marker = os.path.join(get_index_root(), STALE_MARKER)
+    claimed = marker + '.building'
+    try:
+        os.replace(marker, claimed)
+    except FileNotFoundError:
+        return None
+    try:
+        manifest = build_registry_index()
+    except Exception:
+        mark_registry_index_stale()
+        raise
+    finally:
+        os.unlink(claimed)
+    return manifest
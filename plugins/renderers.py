@@ -0,0 +1,181 @@
+import json
+import re
+import secrets
+from collections.abc import Mapping
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+# orjson spells exponents differently from float.__repr__ (1e-7 vs 1e-07,
+# 1e16 vs 1e+16). Such output is re-rendered through the stdlib encoder so
+# clients always see the same bytes.
+EXPONENT = re.compile(rb'[0-9]e[-+0-9]')
+
+LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+# Stand-in strings for pre-encoded fragments; JSON-escaped as \u0000<nonce>:<n>\u0000.
+FRAGMENT_NONCE = secrets.token_hex(8)
+FRAGMENT_TOKEN = re.compile(rb'"\\u0000' + FRAGMENT_NONCE.encode() + rb':([0-9]+)\\u0000"')
+
+
+class EncodedJSON(Mapping):
+    """
+    A JSON object that has already been encoded by FastJSONRenderer.
+    FastJSONRenderer splices the bytes into its output untouched; everything
+    else sees a read-only mapping, parsed on first access.
+    """
+    __slots__ = ('content', '_data')
+
+    def __init__(self, content):
+        self.content = content
+        self._data = None
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = json.loads(self.content)
+        return self._data
+
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __repr__(self):
+        return f'EncodedJSON({self.content!r})'
+
+
+class JSONEncoder(encoders.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, EncodedJSON):
+            return obj.data
+        return super().default(obj)
+
+
+def _extract_fragments(data, fragments):
+    """
+    Swap EncodedJSON values for token strings. Only looks where responses put
+    them: the top level, items of a top-level list, and items of a list held
+    by a top-level dict (paginated results), so the walk stays O(page size).
+    """
+    def token(value):
+        if isinstance(value, EncodedJSON):
+            fragments.append(value.content)
+            return f'\x00{FRAGMENT_NONCE}:{len(fragments) - 1}\x00'
+        return value
+
+    def items(values):
+        if any(isinstance(value, EncodedJSON) for value in values):
+            return [token(value) for value in values]
+        return values
+
+    if isinstance(data, EncodedJSON):
+        return token(data)
+    if isinstance(data, list):
+        return items(data)
+    if isinstance(data, dict) and any(isinstance(value, (list, EncodedJSON)) for value in data.values()):
+        return {
+            key: items(value) if isinstance(value, list) else token(value)
+            for key, value in data.items()
+        }
+    return data
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson when it is installed and falls back
+    to the stdlib encoder otherwise. The output is byte-for-byte what
+    JSONRenderer produces with the default compact, unicode, strict settings;
+    any payload or setting orjson cannot reproduce goes through the stdlib path.
+    The one exception is non-finite floats, which JSONRenderer refuses to
+    encode and orjson writes as null.
+
+    EncodedJSON values in the response (cached plugin representations) are
+    copied into compact output as-is instead of being encoded again.
+    """
+    encoder_class = JSONEncoder
+
+    def uses_orjson(self, accepted_media_type, renderer_context):
+        return (
+            orjson is not None
+            and api_settings.COMPACT_JSON
+            and api_settings.UNICODE_JSON
+            and api_settings.STRICT_JSON
+            and self.get_indent(accepted_media_type, renderer_context) is None
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        fragments = []
+        if api_settings.COMPACT_JSON and self.get_indent(accepted_media_type, renderer_context) is None:
+            data = _extract_fragments(data, fragments)
+        ret = self.encode(data, accepted_media_type, renderer_context)
+        if fragments:
+            ret = FRAGMENT_TOKEN.sub(lambda match: fragments[int(match[1])], ret)
+        return ret
+
+    def encode(self, data, accepted_media_type, renderer_context):
+        if not self.uses_orjson(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS,
+            )
+        except TypeError:
+            # Non-string keys, integers wider than 64 bits, nesting orjson
+            # refuses: let the stdlib encoder render or raise as it would.
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if EXPONENT.search(ret):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        for raw, escaped in LINE_SEPARATORS:
+            ret = ret.replace(raw, escaped)
+        return ret
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Binary MessagePack rendering of the same data the JSON renderer emits,
+    for machine clients that send Accept: application/msgpack or ?format=msgpack.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+    encoder_class = JSONEncoder
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=self.encoder_class().default, use_bin_type=True)
+
+
+def machine_renderer_classes():
+    """Default API renderers plus MessagePack when msgpack is installed."""
+    renderer_classes = list(api_settings.DEFAULT_RENDERER_CLASSES)
+    if msgpack is not None:
+        renderer_classes.append(MessagePackRenderer)
+    return renderer_classes
@@ -0,0 +1,30 @@
+"""
+Canonical repository URLs, so the many spellings of one repository
+(https, ssh://, scp-style git@host:path, with or without .git, any case)
+can be matched with an indexed equality lookup. No Django imports: models
+and migrations both use this.
+"""
+import re
+from urllib.parse import urlparse
+
+# user@host:path, the scp-like syntax git accepts for SSH
+SCP_LIKE = re.compile(r'^(?:[^@/\s]+@)?([^:/\s]+):(?!//)(.*)$')
+
+
+def repository_key(repo_url):
+    """
+    'host/owner/repo' for any URL of a repository: scheme, user, port,
+    trailing slashes and .git are dropped and the result is lower-cased.
+    Local paths and file:// URLs give their path. Empty input gives ''.
+    """
+    if not repo_url:
+        return ''
+    url = repo_url.strip()
+    scp = SCP_LIKE.match(url)
+    if scp and '://' not in url:
+        host, path = scp.groups()
+    else:
+        parsed = urlparse(url)
+        host, path = parsed.hostname or '', parsed.path
+    path = path.strip('/').removesuffix('.git').rstrip('/')
+    return f'{host}/{path}'.lower()
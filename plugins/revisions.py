@@ -0,0 +1,107 @@
+import hashlib
+import json
+import zlib
+
+from django.db import transaction
+
+from .models import PluginRevision, RevisionBlob, Author, Category
+from .spec import COMPONENTS, PLUGIN_FIELDS, plugin_spec_from_rows, store_plugin_spec
+
+
+def encode_spec(spec):
+    return json.dumps(spec, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def store_blob(content):
+    """Stored (or existing) blob for the given bytes, keyed by their sha256."""
+    digest = hashlib.sha256(content).hexdigest()
+    blob, _ = RevisionBlob.objects.get_or_create(
+        sha256=digest,
+        defaults={'data': zlib.compress(content, 9), 'size': len(content)},
+    )
+    return blob
+
+
+def read_blob(blob):
+    return zlib.decompress(bytes(blob.data))
+
+
+def prune_revision_blobs():
+    """Delete blobs no revision points at any more."""
+    RevisionBlob.objects.filter(spec_revisions__isnull=True, readme_revisions__isnull=True).delete()
+
+
+def record_plugin_revision(plugin):
+    """
+    Remember the plugin's current spec and README under its commit hash.
+    Re-recording the same commit repoints it at the latest content.
+    """
+    if not plugin.commit_hash:
+        return None
+    spec = plugin.spec if plugin.spec is not None else plugin_spec_from_rows(plugin)
+    with transaction.atomic():
+        spec_blob = store_blob(encode_spec(spec))
+        readme_blob = store_blob(plugin.readme.encode('utf-8')) if plugin.readme else None
+        revision, _ = PluginRevision.objects.update_or_create(
+            plugin=plugin,
+            commit_hash=plugin.commit_hash,
+            defaults={'version': plugin.version, 'spec_blob': spec_blob, 'readme_blob': readme_blob},
+        )
+    return revision
+
+
+def find_revision(plugin, commit_hash):
+    """Revision for a full commit hash or an unambiguous prefix of one, else None."""
+    revisions = PluginRevision.objects.filter(plugin=plugin).select_related('spec_blob', 'readme_blob')
+    exact = revisions.filter(commit_hash=commit_hash).first()
+    if exact is not None:
+        return exact
+    matches = list(revisions.filter(commit_hash__startswith=commit_hash)[:2])
+    return matches[0] if len(matches) == 1 else None
+
+
+def revision_content(revision):
+    return {
+        'commit_hash': revision.commit_hash,
+        'version': revision.version,
+        'created_at': revision.created_at,
+        'spec': json.loads(read_blob(revision.spec_blob)),
+        'readme': read_blob(revision.readme_blob).decode('utf-8') if revision.readme_blob_id else '',
+    }
+
+
+def restore_plugin_revision(plugin, revision):
+    """
+    Put a stored revision back as the plugin's current manifest, README and
+    commit, entirely from the database. Callers send plugin_updated.
+    """
+    content = revision_content(revision)
+    spec = content['spec']
+    meta = spec.get('plugin', {})
+
+    with transaction.atomic():
+        for key in PLUGIN_FIELDS:
+            if key != 'id' and key in meta:
+                setattr(plugin, key, meta[key])
+        plugin.author = Author.objects.get_or_create(name=meta['author'])[0] if meta.get('author') else None
+        plugin.category = Category.objects.get_or_create(name=meta['category'])[0] if meta.get('category') else None
+        plugin.readme = content['readme']
+        plugin.commit_hash = revision.commit_hash
+        plugin.recommended_commit = revision.commit_hash
+        plugin.save()
+
+        for key, (model, many) in COMPONENTS.items():
+            model.objects.filter(plugin=plugin).delete()
+            values = spec.get(key)
+            if many:
+                model.objects.bulk_create([_component(model, plugin, fields) for fields in values or []])
+            elif values:
+                _component(model, plugin, values).save()
+        store_plugin_spec(plugin, spec)
+    return spec
+
+
+def _component(model, plugin, fields):
+    # Older revisions may carry fields the model no longer has
+    names = {field.name for field in model._meta.concrete_fields}
+    return model(plugin=plugin, **{name: value for name, value in fields.items() if name in names})
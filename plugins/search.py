@@ -0,0 +1,86 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import Case, F, IntegerField, Value, When
+from rest_framework import filters
+
+from .models import Plugin
+
+SEARCH_CONFIG = 'english'
+
+
+def uses_postgres_search():
+    return connection.vendor == 'postgresql'
+
+
+def search_weights(plugin):
+    """Text fed into each tsvector weight, from A (strongest) to D."""
+    tags = plugin.tags.values_list('name', flat=True)
+    labels = plugin.inputs.values_list('label', flat=True)
+    classification = [
+        *tags,
+        plugin.author.name if plugin.author else '',
+        plugin.category.name if plugin.category else '',
+        plugin.subcategory or '',
+    ]
+    return {
+        'A': plugin.name or '',
+        'B': ' '.join(filter(None, classification)),
+        'C': plugin.description or '',
+        'D': ' '.join(filter(None, labels)),
+    }
+
+
+def build_search_vector(weights):
+    vector = None
+    for weight, text in weights.items():
+        part = SearchVector(Value(text), weight=weight, config=SEARCH_CONFIG)
+        vector = part if vector is None else vector + part
+    return vector
+
+
+def update_search_index(plugin):
+    """
+    Refresh the denormalized search columns for one plugin. Uses a queryset
+    update so updated_at and the save signals are left alone.
+    """
+    weights = search_weights(plugin)
+    updates = {'search_document': ' '.join(text for text in weights.values() if text).lower()}
+    if uses_postgres_search():
+        updates['search_vector'] = build_search_vector(weights)
+    Plugin.objects.filter(pk=plugin.pk).update(**updates)
+
+
+def search_plugins(queryset, terms):
+    """
+    Ranked full-text search. Postgres matches the GIN-indexed tsvector;
+    other backends fall back to matching every term against the
+    denormalized search_document, ranking name matches first.
+    """
+    terms = (terms or '').strip()
+    if not terms:
+        return queryset
+
+    if uses_postgres_search():
+        query = SearchQuery(terms, search_type='websearch', config=SEARCH_CONFIG)
+        return (
+            queryset.filter(search_vector=query)
+            .annotate(search_rank=SearchRank(F('search_vector'), query))
+            .order_by('-search_rank', 'name')
+        )
+
+    for word in terms.lower().split():
+        queryset = queryset.filter(search_document__icontains=word)
+    return queryset.annotate(
+        search_rank=Case(
+            When(name__icontains=terms, then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+    ).order_by('-search_rank', 'name')
+
+
+class PluginSearchFilter(filters.SearchFilter):
+    """Drop-in for SearchFilter that keeps ?search= but queries the search index."""
+
+    def filter_queryset(self, request, queryset, view):
+        return search_plugins(queryset, request.query_params.get(self.search_param, ''))
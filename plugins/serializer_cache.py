@@ -0,0 +1,77 @@
+import hashlib
+
+from django.core.cache import cache
+
+from .models import Plugin
+from .renderers import EncodedJSON, FastJSONRenderer
+from .serializers import PluginSerializer
+
+# Bump whenever PluginSerializer's output changes shape.
+SERIALIZER_VERSION = 2
+CACHE_TIMEOUT = 60 * 60 * 24
+
+# Plugin columns the cache key is built from; enough to load a listing page.
+KEY_FIELDS = ('id', 'updated_at', 'commit_hash', 'status', 'latest_stable_tag')
+
+
+def with_representation_relations(queryset):
+    """Load every relation PluginSerializer walks up front."""
+    return (
+        queryset
+        .select_related('author', 'category', 'readme_store', 'runtime', 'execution', 'annotation', 'example')
+        .prefetch_related('tags', 'inputs', 'outputs', 'env_variables', 'plots')
+    )
+
+
+def representation_key(plugin):
+    """
+    Cache key of a plugin's representation. Every part is a column, so a
+    write changes the key for every process sharing the cache or not; edits
+    to embedded authors, categories and tags touch updated_at on the plugins
+    that embed them (see signals.touch_plugins).
+    """
+    # status and latest_stable_tag are part of the key because the admin
+    # status actions and the update checker write them with queryset.update()
+    parts = (
+        SERIALIZER_VERSION, plugin.pk,
+        plugin.updated_at.isoformat() if plugin.updated_at else '',
+        plugin.commit_hash or '', plugin.status, plugin.latest_stable_tag or '',
+    )
+    digest = hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+    return f'plugin-repr:{digest}'
+
+
+def plugin_representations(plugins):
+    """
+    EncodedJSON for each plugin, serialized at most once per
+    (id, updated_at, commit_hash, status, latest_stable_tag, serializer version). Only the
+    KEY_FIELDS of the given plugins are read; misses are reloaded with
+    their relations in one batch.
+    """
+    plugins = list(plugins)
+    keys = [representation_key(plugin) for plugin in plugins]
+    cached = cache.get_many(keys)
+
+    missing = [plugin.pk for plugin, key in zip(plugins, keys) if key not in cached]
+    fresh = {}
+    if missing:
+        renderer = FastJSONRenderer()
+        stored = {}
+        # Columns the serializer excludes are never loaded
+        rows = Plugin.objects.filter(pk__in=missing).defer(*PluginSerializer.Meta.exclude)
+        for plugin in with_representation_relations(rows):
+            content = renderer.render(PluginSerializer(plugin).data)
+            fresh[plugin.pk] = content
+            stored[representation_key(plugin)] = content
+        cache.set_many(stored, timeout=CACHE_TIMEOUT)
+
+    return [
+        EncodedJSON(cached[key] if key in cached else fresh[plugin.pk])
+        for plugin, key in zip(plugins, keys)
+        if key in cached or plugin.pk in fresh
+    ]
+
+
+def forget_plugin_representation(plugin):
+    """Drop the entry for the plugin's current row; its next write moves the key anyway."""
+    cache.delete(representation_key(plugin))
@@ -94,7 +94,11 @@ class PluginSerializer(serializers.ModelSerializer):
     plots = PlotSerializer(many=True, read_only=True)
     annotation = AnnotationSerializer(read_only=True)
     example = ExampleSerializer(read_only=True)
+    readme = serializers.CharField(read_only=True, allow_null=True)
 
     class Meta:
         model = Plugin
-        fields = '__all__'
+        exclude = [
+            'search_document', 'search_vector', 'spec', 'repository_key',
+            'latest_commit', 'has_update', 'last_checked_at', 'next_check_at', 'check_failures', 'last_check_error',
+        ]
@@ -1,23 +1,196 @@
 from django.conf import settings
-from django.db.models.signals import post_save
-from django.dispatch import receiver
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver, Signal
+from django.utils import timezone
 from rest_framework.authtoken.models import Token
 from django.contrib.auth.models import User
-from .models import UserProfile
+from .authentication import forget_token, forget_user_tokens
+from .models import UserProfile, Plugin, PluginChange, Author, Category, Tag
+from .registry_index import mark_registry_index_stale
+from .serializer_cache import forget_plugin_representation
+from .fragments import forget_plugin_fragments
+from .search import update_search_index
+from .facets import sync_plugin_facets, release_plugin_facets
+from .revisions import record_plugin_revision, prune_revision_blobs
+from .spec import store_spec_names
+
+# Sent after a plugin and all of its manifest components have been written
+# (API/admin ingestion, management imports, admin edits, recommended commit
+# changes). kwargs: plugin, created
+plugin_updated = Signal()
+
+# Sent after a bulk status change that bypasses Plugin.save(). kwargs: plugin_ids, status
+plugins_status_changed = Signal()
+
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_auth_token(sender, instance=None, created=False, **kwargs):
     if created:
         Token.objects.create(user=instance)
 
+# The only place profiles are created. Users that predate profiles get one
+# from UserProfileView on first visit.
 @receiver(post_save, sender=User)
-def create_user_profile(sender, instance, created, **kwargs):
-    if created:
-        UserProfile.objects.create(user=instance)
+def create_user_profile(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        UserProfile.objects.get_or_create(user=instance)
 
 @receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
+def save_user_profile(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """
+    Write edits made through user.userprofile along with a full user save.
+    Partial saves (logins only write last_login) and users whose profile was
+    never loaded leave the profile alone.
+    """
+    if created or raw or update_fields is not None or not User.userprofile.is_cached(instance):
+        return
     try:
-        instance.userprofile.save()
+        profile = instance.userprofile
     except UserProfile.DoesNotExist:
-        UserProfile.objects.create(user=instance)
\ No newline at end of file
+        return
+    changed = profile.changed_fields()
+    if changed is None:
+        profile.save()
+    elif changed:
+        profile.save(update_fields=changed)
+
+@receiver(post_delete, sender=Token)
+def forget_cached_token(sender, instance, **kwargs):
+    forget_token(instance.key)
+
+@receiver(post_save, sender=User)
+def forget_cached_user_tokens(sender, instance, created, update_fields=None, **kwargs):
+    # Logins only touch last_login, which cached lookups don't depend on
+    if created or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    forget_user_tokens(instance)
+
+
+# Registered ahead of the index rebuild so it never reads a dropped entry.
+@receiver(plugin_updated)
+def forget_cached_representation(sender, plugin, **kwargs):
+    forget_plugin_representation(plugin)
+    forget_plugin_fragments(plugin)
+
+def touch_plugins(plugin_ids):
+    """
+    Record plugins whose representation embeds an edited author, category
+    or tag as updated: updated_at moves, so cached representations and rows
+    are re-rendered in every process, the denormalized search columns,
+    facet rows and stored spec pick up the new names, and delta-sync
+    clients get a change.
+    """
+    with transaction.atomic():
+        plugins = list(Plugin.objects.filter(id__in=plugin_ids).select_related('author', 'category', 'runtime'))
+        if not plugins:
+            return
+        Plugin.objects.filter(id__in=[plugin.id for plugin in plugins]).update(updated_at=timezone.now())
+        for plugin in plugins:
+            update_search_index(plugin)
+            sync_plugin_facets(plugin)
+            store_spec_names(plugin)
+        PluginChange.objects.bulk_create([
+            PluginChange(plugin_id=plugin.id, action='updated', status=plugin.status)
+            for plugin in plugins
+        ])
+    queue_registry_index_rebuild()
+
+def embedding_plugin_ids(instance):
+    if isinstance(instance, Tag):
+        return list(instance.plugins.values_list('id', flat=True))
+    return list(instance.plugin_set.values_list('id', flat=True))
+
+@receiver(post_save, sender=Author)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Tag)
+def touch_plugins_on_edit(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        touch_plugins(embedding_plugin_ids(instance))
+
+# Deleting unlinks the plugins (SET_NULL, or the PluginTag rows) before
+# post_delete, so they are collected up front.
+@receiver(pre_delete, sender=Author)
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Tag)
+def collect_plugins_on_delete(sender, instance, **kwargs):
+    instance._embedding_plugin_ids = embedding_plugin_ids(instance)
+
+@receiver(post_delete, sender=Author)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Tag)
+def touch_plugins_on_delete(sender, instance, **kwargs):
+    touch_plugins(getattr(instance, '_embedding_plugin_ids', []))
+
+
+def queue_registry_index_rebuild():
+    """
+    Mark the registry index stale once the transaction commits. Requests
+    never build it; build_registry_index --watch does, once per poll.
+    """
+    if not settings.REGISTRY_INDEX_AUTO_BUILD:
+        return
+    pending = transaction.get_connection().run_on_commit
+    if any(func is mark_registry_index_stale for _, func, _ in pending):
+        return
+    transaction.on_commit(mark_registry_index_stale)
+
+@receiver(plugin_updated)
+def rebuild_index_on_update(sender, plugin, **kwargs):
+    queue_registry_index_rebuild()
+
+@receiver(plugins_status_changed)
+def rebuild_index_on_status_change(sender, plugin_ids, status, **kwargs):
+    queue_registry_index_rebuild()
+
+@receiver(post_delete, sender=Plugin)
+def rebuild_index_on_delete(sender, instance, **kwargs):
+    queue_registry_index_rebuild()
+
+
+@receiver(plugin_updated)
+def log_plugin_update(sender, plugin, created=False, **kwargs):
+    PluginChange.objects.create(
+        plugin_id=plugin.pk,
+        action='created' if created else 'updated',
+        status=plugin.status,
+    )
+
+@receiver(plugins_status_changed)
+def log_status_change(sender, plugin_ids, status, **kwargs):
+    PluginChange.objects.bulk_create([
+        PluginChange(plugin_id=plugin_id, action='status', status=status)
+        for plugin_id in plugin_ids
+    ])
+
+@receiver(post_delete, sender=Plugin)
+def log_plugin_delete(sender, instance, **kwargs):
+    PluginChange.objects.create(plugin_id=instance.pk, action='deleted')
+
+
+@receiver(plugin_updated)
+def update_plugin_search_index(sender, plugin, **kwargs):
+    update_search_index(plugin)
+
+
+@receiver(plugin_updated)
+def update_plugin_facets(sender, plugin, **kwargs):
+    sync_plugin_facets(plugin)
+
+@receiver(plugins_status_changed)
+def update_facets_on_status_change(sender, plugin_ids, status, **kwargs):
+    for plugin in Plugin.objects.filter(id__in=plugin_ids).select_related('runtime'):
+        sync_plugin_facets(plugin)
+
+@receiver(pre_delete, sender=Plugin)
+def release_facets_on_delete(sender, instance, **kwargs):
+    release_plugin_facets(instance)
+
+
+@receiver(plugin_updated)
+def record_revision(sender, plugin, **kwargs):
+    record_plugin_revision(plugin)
+
+@receiver(post_delete, sender=Plugin)
+def prune_revisions_on_delete(sender, instance, **kwargs):
+    prune_revision_blobs()
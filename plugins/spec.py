@@ -0,0 +1,103 @@
+from .models import Plugin, Runtime, Input, Output, PluginEnvVariable, Execution, Plot, Annotation, Example
+
+# Manifest fields copied from the Plugin row into spec['plugin'].
+PLUGIN_FIELDS = ('id', 'name', 'description', 'version', 'subcategory', 'icon', 'diagram_enabled', 'citation_enabled')
+
+# spec key -> (component model, one row per plugin or many)
+COMPONENTS = {
+    'runtime': (Runtime, False),
+    'inputs': (Input, True),
+    'outputs': (Output, True),
+    'env_variables': (PluginEnvVariable, True),
+    'execution': (Execution, False),
+    'plots': (Plot, True),
+    'annotation': (Annotation, False),
+    'example': (Example, False),
+}
+
+
+def _spec_fields(model):
+    return [field for field in model._meta.concrete_fields if field.name not in ('id', 'plugin')]
+
+
+def component_spec(obj):
+    """
+    One component row as a plain dict. Values go through the field's
+    to_python so an unsaved instance yields what a reload would (1 -> 1.0
+    for float fields and so on).
+    """
+    return {field.name: field.to_python(field.value_from_object(obj)) for field in _spec_fields(type(obj))}
+
+
+def build_plugin_spec(plugin, components, tags):
+    """
+    The normalized manifest as one JSON document: plugin metadata, every
+    component keyed like the API representation, and tag names.
+    components maps spec keys to an instance, a list of instances, or None.
+    """
+    spec = {
+        'plugin': {
+            **{name: getattr(plugin, name) for name in PLUGIN_FIELDS},
+            'author': plugin.author.name if plugin.author_id else None,
+            'category': plugin.category.name if plugin.category_id else None,
+        },
+        'tags': sorted(tags),
+    }
+    for key, (model, many) in COMPONENTS.items():
+        value = components.get(key)
+        if many:
+            spec[key] = [component_spec(obj) for obj in value or []]
+        else:
+            spec[key] = component_spec(value) if value is not None else None
+    return spec
+
+
+def plugin_spec_from_rows(plugin):
+    """Rebuild the spec from the relational tables, e.g. after an admin edit."""
+    components = {}
+    for key, (model, many) in COMPONENTS.items():
+        rows = model.objects.filter(plugin_id=plugin.pk).order_by('pk')
+        components[key] = list(rows) if many else rows.first()
+    return build_plugin_spec(plugin, components, plugin.tags.values_list('name', flat=True))
+
+
+def store_plugin_spec(plugin, spec=None):
+    """Write the spec column without touching updated_at or firing save signals."""
+    if spec is None:
+        spec = plugin_spec_from_rows(plugin)
+    plugin.spec = spec
+    Plugin.objects.filter(pk=plugin.pk).update(spec=spec)
+    return spec
+
+
+def store_spec_names(plugin):
+    """
+    Rewrite the author, category and tag names in a stored spec after one
+    of them was renamed or deleted, without rebuilding the components.
+    Specs never stored are left for load_plugin_spec to rebuild.
+    """
+    if plugin.spec is None:
+        return None
+    spec = {
+        **plugin.spec,
+        'plugin': {
+            **plugin.spec['plugin'],
+            'author': plugin.author.name if plugin.author_id else None,
+            'category': plugin.category.name if plugin.category_id else None,
+        },
+        'tags': sorted(plugin.tags.values_list('name', flat=True)),
+    }
+    return store_plugin_spec(plugin, spec)
+
+
+def load_plugin_spec(queryset, pk):
+    """
+    The full spec for one plugin with a single-row fetch of the spec column.
+    Rows written before the column existed are rebuilt once and stored.
+    Raises Plugin.DoesNotExist.
+    """
+    row = queryset.filter(pk=pk).values_list('spec', flat=True).first()
+    if row is not None:
+        return row
+    plugin = queryset.select_related('author', 'category').get(pk=pk)
+    return store_plugin_spec(plugin)
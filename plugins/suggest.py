@@ -0,0 +1,152 @@
+import threading
+from functools import lru_cache
+
+from django.db import connection
+from django.contrib.postgres.search import TrigramWordSimilarity
+
+from .models import Plugin, PluginChange, Tag, Category
+
+KINDS = ('plugins', 'tags', 'categories')
+
+
+@lru_cache(maxsize=None)
+def _trigram_extension_installed(alias):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def uses_trigram_suggest():
+    return connection.vendor == 'postgresql' and _trigram_extension_installed(connection.alias)
+
+
+def registry_generation():
+    """The newest change log cursor; it moves whenever the catalogue does."""
+    return PluginChange.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+class SuggestionTrie:
+    """
+    Prefix trie over lowercased names and the individual words in them.
+    Lookups tolerate small typos by walking the trie with a Levenshtein row
+    per node and pruning branches that can no longer match.
+    """
+
+    def __init__(self):
+        self.root = {}
+        self.entries = []
+
+    def add(self, kind, label, value):
+        index = len(self.entries)
+        self.entries.append((kind, label, value))
+        text = label.lower()
+        keys = {text, *text.split()}
+        for key in keys:
+            node = self.root
+            for char in key:
+                node = node.setdefault(char, {})
+            node.setdefault(None, set()).add(index)
+
+    def _collect(self, node, found, distance):
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            for key, child in current.items():
+                if key is None:
+                    for index in child:
+                        if distance < found.get(index, distance + 1):
+                            found[index] = distance
+                else:
+                    stack.append(child)
+
+    def search(self, prefix, max_distance=1):
+        """Return {entry index: edit distance} for entries matching prefix."""
+        prefix = prefix.lower()
+        found = {}
+        first_row = list(range(len(prefix) + 1))
+        stack = [(self.root, first_row)]
+        while stack:
+            node, row = stack.pop()
+            if row[-1] <= max_distance:
+                self._collect(node, found, row[-1])
+                if row[-1] == 0:
+                    continue
+            if min(row) > max_distance:
+                continue
+            for char, child in node.items():
+                if char is None:
+                    continue
+                next_row = [row[0] + 1]
+                for i, query_char in enumerate(prefix, start=1):
+                    cost = 0 if query_char == char else 1
+                    next_row.append(min(next_row[i - 1] + 1, row[i] + 1, row[i - 1] + cost))
+                stack.append((child, next_row))
+        return found
+
+    def suggest(self, prefix, limit):
+        max_distance = 0 if len(prefix) < 3 else 1 if len(prefix) < 6 else 2
+        found = self.search(prefix, max_distance)
+        ranked = sorted(found, key=lambda index: (found[index], len(self.entries[index][1]), self.entries[index][1]))
+        results = {kind: [] for kind in KINDS}
+        for index in ranked:
+            kind, label, value = self.entries[index]
+            if len(results[kind]) < limit:
+                results[kind].append(value)
+        return results
+
+
+def build_suggestion_trie():
+    trie = SuggestionTrie()
+    approved = Plugin.objects.filter(status='approved')
+    for plugin_id, name in approved.values_list('id', 'name'):
+        trie.add('plugins', name, {'id': plugin_id, 'name': name})
+    for name in Tag.objects.filter(plugins__status='approved').distinct().values_list('name', flat=True):
+        trie.add('tags', name, name)
+    for name in Category.objects.filter(plugin__status='approved').distinct().values_list('name', flat=True):
+        trie.add('categories', name, name)
+    return trie
+
+
+_trie_lock = threading.Lock()
+_trie_state = {'generation': None, 'trie': None}
+
+
+def get_suggestion_trie():
+    """Per-process trie, rebuilt only when the registry generation moves."""
+    generation = registry_generation()
+    if _trie_state['generation'] != generation:
+        with _trie_lock:
+            if _trie_state['generation'] != generation:
+                _trie_state['trie'] = build_suggestion_trie()
+                _trie_state['generation'] = generation
+    return _trie_state['trie']
+
+
+def _trigram_matches(queryset, field, term, limit):
+    # Terms shorter than a trigram cannot use the GIN index; match them as plain prefixes.
+    if len(term) < 3:
+        return queryset.filter(**{f'{field}__istartswith': term}).order_by(field)[:limit]
+    return (
+        queryset.filter(**{f'{field}__trigram_word_similar': term})
+        .annotate(similarity=TrigramWordSimilarity(term, field))
+        .order_by('-similarity', field)[:limit]
+    )
+
+
+def suggest_names(term, limit=8):
+    """Ranked plugin, tag and category names for a typeahead prefix."""
+    term = term.strip()
+    if not term:
+        return {kind: [] for kind in KINDS}
+
+    if not uses_trigram_suggest():
+        return get_suggestion_trie().suggest(term, limit)
+
+    plugins = _trigram_matches(Plugin.objects.filter(status='approved'), 'name', term, limit)
+    tags = _trigram_matches(Tag.objects.filter(plugins__status='approved').distinct(), 'name', term, limit)
+    categories = _trigram_matches(Category.objects.filter(plugin__status='approved').distinct(), 'name', term, limit)
+    return {
+        'plugins': [{'id': plugin.id, 'name': plugin.name} for plugin in plugins],
+        'tags': [tag.name for tag in tags],
+        'categories': [category.name for category in categories],
+    }
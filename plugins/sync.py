@@ -0,0 +1,130 @@
+"""
+Re-syncing plugins from their repositories outside the request cycle.
+
+fetch_plugin_source is the network half (ls-remote, clone, manifest and
+README parsing) and never touches the database, so it can run in worker
+threads; apply_plugin_source writes the result back on the caller's
+connection.
+"""
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+import time
+
+import git
+
+from .manifests import load_manifest
+from .repositories import (
+    GIT_TIMEOUT, cleanup_ssh_key_file, clone_repo_with_timeout, remote_head, repository_host, write_ssh_key,
+)
+from .viewsets import apply_manifest
+
+class SyncCheckpoint:
+    """
+    Ids of plugins a sync run has committed, kept in a JSON file so an
+    interrupted run picks up where it stopped. The file also records the
+    scope (the filters the run was started with) and load() refuses a
+    checkpoint written for a different scope. Writes replace the file
+    atomically; a missing file is an empty checkpoint.
+    """
+
+    def __init__(self, path, scope=None):
+        self.path = path
+        self.scope = scope or {}
+        self.done = set()
+
+    @staticmethod
+    def default_path(scope, directory=None):
+        """A checkpoint file of its own for each scope, under the temp directory."""
+        digest = hashlib.sha1(json.dumps(scope, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+        return os.path.join(directory or tempfile.gettempdir(), f'cauldron-sync-all-{digest}.json')
+
+    def load(self):
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                saved = json.load(f)
+            if saved.get('scope', {}) != self.scope:
+                raise ValueError(
+                    f"{self.path} was written for {saved.get('scope', {})}, not {self.scope}"
+                )
+            self.done = set(saved.get('done', []))
+        return self.done
+
+    def add(self, plugin_ids):
+        self.done.update(plugin_ids)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'scope': self.scope, 'done': sorted(self.done)}, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        self.done = set()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+def fetch_plugin_source(plugin_id, repository, commit_hash=None, ssh_key=None,
+                        limiter=None, timeout=GIT_TIMEOUT, force=False):
+    """
+    Latest manifest and README of a plugin's repository. Unless force is
+    set, a plugin already at the remote HEAD is reported 'unchanged' after
+    an ls-remote instead of a clone.
+
+    Returns a dict with plugin_id, status ('fetched', 'unchanged' or
+    'failed'), seconds, and either error or commit_hash,
+    latest_stable_tag, plugin_data and readme. Never raises for git or
+    manifest problems.
+    """
+    started = time.perf_counter()
+    result = {'plugin_id': plugin_id, 'status': 'failed', 'error': None}
+    key_path = None
+    try:
+        env = None
+        if ssh_key is not None:
+            ssh_command, key_path = write_ssh_key(ssh_key)
+            env = {'GIT_SSH_COMMAND': ssh_command}
+        host = repository_host(repository)
+
+        if commit_hash and not force:
+            if limiter:
+                limiter.wait(host)
+            if remote_head(repository, timeout, env) == commit_hash:
+                result['status'] = 'unchanged'
+                return result
+
+        if limiter:
+            limiter.wait(host)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            repo = clone_repo_with_timeout(repository, temp_dir, timeout=timeout, env=env)
+            latest_commit = repo.head.commit.hexsha
+            tags = sorted(repo.tags, key=lambda t: t.commit.committed_datetime, reverse=True)
+            _, plugin_data, readme, error = load_manifest(os.path.join(temp_dir, 'plugin.yaml'))
+        if error is not None:
+            result['error'] = error
+            return result
+
+        result.update({
+            'status': 'fetched',
+            'commit_hash': latest_commit,
+            'latest_stable_tag': tags[0].name if tags else None,
+            'plugin_data': plugin_data,
+            'readme': readme,
+        })
+    except (git.exc.GitError, subprocess.TimeoutExpired, OSError, ValueError) as e:
+        result['error'] = str(e).strip() or type(e).__name__
+    finally:
+        cleanup_ssh_key_file(key_path)
+        result['seconds'] = time.perf_counter() - started
+    return result
+
+
+def apply_plugin_source(plugin, result):
+    """Write a 'fetched' result onto the plugin, as sync_to_latest does."""
+    return apply_manifest(
+        plugin, result['plugin_data'], result['readme'],
+        commit_hash=result['commit_hash'],
+        latest_commit=result['commit_hash'],
+        latest_stable_tag=result['latest_stable_tag'],
+    )
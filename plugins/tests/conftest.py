@@ -0,0 +1,73 @@
+import subprocess
+
+import pytest
+import yaml
+from django.core.cache import cache
+
+
+@pytest.fixture(autouse=True)
+def registry_index_root(settings, tmp_path):
+    settings.REGISTRY_INDEX_ROOT = str(tmp_path / 'registry')
+    return settings.REGISTRY_INDEX_ROOT
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def deferred_loads(monkeypatch):
+    """
+    Records every deferred column loaded on attribute access ("Plugin.spec"),
+    i.e. the per-row refetch an only()/defer() plan that misses a column causes.
+    """
+    from django.db.models.query_utils import DeferredAttribute
+
+    loads = []
+    original = DeferredAttribute.__get__
+
+    def __get__(self, instance, cls=None):
+        if instance is not None and self.field.attname not in instance.__dict__:
+            loads.append(f"{type(instance).__name__}.{self.field.attname}")
+        return original(self, instance, cls)
+
+    monkeypatch.setattr(DeferredAttribute, '__get__', __get__)
+    return loads
+
+
+@pytest.fixture
+def git_repository(tmp_path):
+    """
+    Factory for local plugin repositories: make(plugin_id, version, tag)
+    commits a plugin.yaml and README.md and returns a file:// URL. Calling
+    it again for the same plugin adds a commit on top.
+    """
+    def git(cwd, *args):
+        subprocess.run(
+            ['git', '-c', 'user.name=Test', '-c', 'user.email=test@example.com', *args],
+            cwd=cwd, check=True, capture_output=True,
+        )
+
+    def make(plugin_id, version='1.0.0', tag=None, files=None):
+        path = tmp_path / 'repositories' / plugin_id
+        if not path.exists():
+            path.mkdir(parents=True)
+            git(path, 'init', '-q')
+        (path / 'plugin.yaml').write_text(yaml.safe_dump({
+            'plugin': {'id': plugin_id, 'name': plugin_id.title(), 'version': version, 'description': 'Synced'},
+            'runtime': {'environments': ['python'], 'entrypoint': 'main.py'},
+            'inputs': [{'name': 'table', 'label': 'Table', 'type': 'file'}],
+        }))
+        (path / 'README.md').write_text(f'# {plugin_id} {version}')
+        for name, content in (files or {}).items():
+            (path / name).write_text(content)
+        git(path, 'add', '-A')
+        git(path, 'commit', '-q', '--allow-empty', '-m', version)
+        if tag:
+            git(path, 'tag', tag)
+        return f'file://{path}'
+
+    return make
@@ -0,0 +1,62 @@
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+
+from plugins.accounts import create_missing_tokens
+
+
+@pytest.mark.django_db
+class TestTokenBackfill:
+    def setup_method(self):
+        # bulk_create skips post_save, like a raw import would
+        User.objects.bulk_create([User(username=f"imported-{i}") for i in range(25)])
+        self.existing = User.objects.create_user(username="existing", password="x")
+        self.existing_key = Token.objects.get(user=self.existing).key
+
+    def test_batches_cover_every_user_without_a_token(self):
+        totals = []
+        with CaptureQueriesContext(connection) as queries:
+            created = create_missing_tokens(batch_size=10, progress=totals.append)
+        assert created == 25
+        assert totals == [10, 20, 25]
+        assert Token.objects.count() == 26
+        assert Token.objects.get(user=self.existing).key == self.existing_key
+        inserts = [q for q in queries if q['sql'].startswith('INSERT')]
+        assert len(inserts) == 3
+        assert create_missing_tokens() == 0
+
+    def test_command_reports_progress(self):
+        out = StringIO()
+        call_command('create_tokens_for_existing_users', '--batch-size', '20', stdout=out)
+        output = out.getvalue()
+        assert '20 tokens created' in output
+        assert '25 new' in output
+        assert not User.objects.filter(auth_token__isnull=True).exists()
+
+    def test_tokens_for_given_users_only(self):
+        imported = User.objects.bulk_create([User(username=f"orcid-{i}") for i in range(3)])
+        assert create_missing_tokens(imported) == 3
+        assert not Token.objects.filter(user__username__startswith="imported-").exists()
+
+    def test_rows_created_concurrently_are_skipped(self):
+        users = User.objects.filter(username__startswith="imported-")
+        racing = users.order_by('pk').first()
+        original = Token.generate_key
+
+        def generate_key():
+            # A sign-in gives this user a token after the anti-join ran
+            if not Token.objects.filter(user=racing).exists():
+                Token.objects.create(user=racing, key=original())
+            return original()
+
+        with mock.patch.object(Token, 'generate_key', side_effect=generate_key):
+            created = create_missing_tokens(users)
+        assert Token.objects.filter(user__in=users).count() == 25
+        # The racing sign-in's token is not counted as one the backfill made
+        assert created == 24
@@ -0,0 +1,108 @@
+import base64
+from unittest import mock
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+URL = '/api/plugins/my_plugins/'
+
+
+@pytest.fixture
+def shared_cache(settings, tmp_path):
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path / 'cache'),
+        },
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('shared_cache')
+class TestCachedTokenAuthentication:
+    def setup_method(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="poller", password="x")
+        self.token = Token.objects.get(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def token_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(URL)
+        return response, sum('authtoken_token' in q['sql'] for q in queries)
+
+    def test_lookup_is_cached(self):
+        response, first = self.token_queries()
+        assert response.status_code == status.HTTP_200_OK
+        assert first == 1
+        response, second = self.token_queries()
+        assert response.status_code == status.HTTP_200_OK
+        assert second == 0
+
+    def test_deleted_token_is_rejected(self):
+        self.token_queries()
+        self.token.delete()
+        response, _ = self.token_queries()
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_deactivated_user_is_rejected(self):
+        self.token_queries()
+        self.user.is_active = False
+        self.user.save()
+        response, _ = self.token_queries()
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_login_does_not_drop_the_entry(self):
+        self.token_queries()
+        self.user.save(update_fields=['last_login'])
+        _, queries = self.token_queries()
+        assert queries == 0
+
+
+@pytest.mark.django_db
+def test_tokens_are_not_cached_per_process():
+    """Another worker's LocMemCache would keep a revoked token alive."""
+    client = APIClient()
+    user = User.objects.create_user(username="poller", password="x")
+    token = Token.objects.get(user=user)
+    client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    with mock.patch('plugins.authentication.forget_token'), mock.patch('plugins.signals.forget_token'):
+        assert client.get(URL).status_code == status.HTTP_200_OK
+        token.delete()
+        assert client.get(URL).status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+class TestCachedBasicAuthentication:
+    def setup_method(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username="scripted", password="secret")
+
+    def get(self, password):
+        credentials = base64.b64encode(f'scripted:{password}'.encode()).decode()
+        return self.client.get(URL, HTTP_AUTHORIZATION=f'Basic {credentials}')
+
+    def test_password_is_hashed_once(self):
+        with mock.patch.object(User, 'check_password', autospec=True, side_effect=User.check_password) as check:
+            assert self.get("secret").status_code == status.HTTP_200_OK
+            assert self.get("secret").status_code == status.HTTP_200_OK
+        assert check.call_count == 1
+
+    def test_wrong_password_is_not_cached(self):
+        self.get("secret")
+        assert self.get("wrong").status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_password_change_and_deactivation_apply_immediately(self):
+        self.get("secret")
+        self.user.set_password("rotated")
+        self.user.save()
+        assert self.get("secret").status_code == status.HTTP_401_UNAUTHORIZED
+        assert self.get("rotated").status_code == status.HTTP_200_OK
+
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        assert self.get("rotated").status_code == status.HTTP_401_UNAUTHORIZED
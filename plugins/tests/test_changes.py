@@ -0,0 +1,104 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from plugins.models import Plugin, PluginChange
+from plugins.signals import plugin_updated, plugins_status_changed
+
+
+@pytest.mark.django_db
+class TestPluginChanges:
+    @pytest.fixture(autouse=True)
+    def no_settle(self, settings):
+        settings.PLUGIN_CHANGES_SETTLE_SECONDS = 0
+        self.settings = settings
+
+    def setup_method(self):
+        self.client = APIClient()
+        self.plugin = Plugin.objects.create(
+            id="delta-plugin", name="Delta Plugin", description="", version="1.0.0", status='approved'
+        )
+        plugin_updated.send(sender=Plugin, plugin=self.plugin, created=True)
+
+    def test_full_sync_returns_plugin_and_cursor(self):
+        response = self.client.get('/api/plugins/changes/', {'since': 0})
+        assert response.status_code == status.HTTP_200_OK
+        assert [p['id'] for p in response.data['changed']] == ['delta-plugin']
+        assert response.data['removed'] == []
+        assert response.data['cursor'] == PluginChange.objects.latest('id').id
+
+    def test_steady_state_sync_is_empty(self):
+        cursor = self.client.get('/api/plugins/changes/').data['cursor']
+        response = self.client.get('/api/plugins/changes/', {'since': cursor})
+        assert response.data == {'cursor': cursor, 'has_more': False, 'changed': [], 'removed': []}
+        assert len(response.content) < 100
+
+    def test_rejection_and_deletion_become_tombstones(self):
+        cursor = self.client.get('/api/plugins/changes/').data['cursor']
+        other = Plugin.objects.create(id="doomed", name="Doomed", description="", version="1", status='approved')
+        plugin_updated.send(sender=Plugin, plugin=other, created=True)
+
+        Plugin.objects.filter(id='delta-plugin').update(status='rejected')
+        plugins_status_changed.send(sender=Plugin, plugin_ids=['delta-plugin'], status='rejected')
+        other.delete()
+
+        response = self.client.get('/api/plugins/changes/', {'since': cursor})
+        assert response.data['changed'] == []
+        assert response.data['removed'] == ['doomed', 'delta-plugin']
+
+    def test_limit_pages_through_changes(self):
+        for i in range(3):
+            plugin_updated.send(sender=Plugin, plugin=self.plugin, created=False)
+        response = self.client.get('/api/plugins/changes/', {'since': 0, 'limit': 2})
+        assert response.data['has_more'] is True
+        assert len(response.data['changed']) == 1
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/plugins/changes/', {'since': 'abc'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_unsettled_changes_hold_back_later_ones(self):
+        self.settings.PLUGIN_CHANGES_SETTLE_SECONDS = 60
+        settled = timezone.now() - timedelta(minutes=5)
+        PluginChange.objects.update(created_at=settled)
+        first = PluginChange.objects.get()
+        # A lower id that only just committed stops the feed before the later, older-looking entry
+        late = PluginChange.objects.create(plugin_id='delta-plugin', action='updated')
+        after = PluginChange.objects.create(plugin_id='delta-plugin', action='updated')
+        PluginChange.objects.filter(pk=after.pk).update(created_at=settled)
+
+        response = self.client.get('/api/plugins/changes/', {'since': 0})
+        assert response.data['cursor'] == first.id
+        assert self.client.get('/api/plugins/changes/', {'since': first.id}).data['changed'] == []
+
+        PluginChange.objects.filter(pk=late.pk).update(created_at=settled)
+        assert self.client.get('/api/plugins/changes/', {'since': first.id}).data['cursor'] == after.id
+
+    def test_prune_keeps_the_newest_entry_per_plugin(self):
+        for i in range(3):
+            plugin_updated.send(sender=Plugin, plugin=self.plugin, created=False)
+        gone = Plugin.objects.create(id="gone", name="Gone", description="", version="1", status='approved')
+        plugin_updated.send(sender=Plugin, plugin=gone, created=True)
+        gone.delete()
+        PluginChange.objects.update(created_at=timezone.now() - timedelta(days=60))
+        newest = PluginChange.objects.filter(plugin_id='delta-plugin').latest('id')
+
+        out = StringIO()
+        call_command('prune_changes', stdout=out)
+        assert 'Deleted 4 superseded' in out.getvalue()
+        assert sorted(PluginChange.objects.values_list('plugin_id', 'action')) == [
+            ('delta-plugin', newest.action), ('gone', 'deleted'),
+        ]
+
+        response = self.client.get('/api/plugins/changes/', {'since': 0})
+        assert [p['id'] for p in response.data['changed']] == ['delta-plugin']
+        assert response.data['removed'] == ['gone']
+
+    def test_prune_spares_recent_entries(self):
+        plugin_updated.send(sender=Plugin, plugin=self.plugin, created=False)
+        call_command('prune_changes', stdout=StringIO())
+        assert PluginChange.objects.count() == 2
@@ -0,0 +1,85 @@
+from unittest import mock
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from plugins.models import Plugin, Author, Category, PluginEnvVariable
+from plugins.signals import plugin_updated
+
+
+@pytest.mark.django_db
+class TestPluginDetailPage:
+    def setup_method(self):
+        self.client = Client()
+        self.owner = User.objects.create_user(username="owner", password="x")
+        self.plugin = Plugin.objects.create(
+            id="detail-plugin",
+            name="Detail Plugin",
+            description="Rendered from cache",
+            version="1.0.0",
+            author=Author.objects.create(name="Detail Author"),
+            category=Category.objects.create(name="Detail Category"),
+            commit_hash='a' * 40,
+            status='approved',
+            submitted_by=self.owner,
+            readme="<h2>Usage</h2>",
+        )
+        PluginEnvVariable.objects.create(plugin=self.plugin, name="API_TOKEN", label="Token", type='text')
+
+    def render(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/plugins/{self.plugin.pk}/')
+        assert response.status_code == 200
+        return response, [q['sql'] for q in queries]
+
+    def test_cached_render_skips_readme_and_env_queries(self, deferred_loads):
+        response, cold = self.render()
+        assert b"<h2>Usage</h2>" in response.content
+        assert b"API_TOKEN" in response.content
+        assert sum('plugins_pluginenvvariable' in sql for sql in cold) == 1
+
+        response, warm = self.render()
+        assert b"<h2>Usage</h2>" in response.content
+        assert b"API_TOKEN" in response.content
+        assert len(warm) == 1
+        assert 'plugins_author' in warm[0] and 'plugins_category' in warm[0]
+        assert deferred_loads == []
+
+    def test_owner_controls_render_per_request(self):
+        response, _ = self.render()
+        assert b"Owner Actions" not in response.content
+
+        self.client.force_login(self.owner)
+        response, _ = self.render()
+        assert b"Owner Actions" in response.content
+        assert b"<h2>Usage</h2>" in response.content
+
+    def test_new_commit_renders_new_content(self):
+        self.render()
+        self.plugin.commit_hash = 'b' * 40
+        self.plugin.readme = "<h2>New usage</h2>"
+        self.plugin.save()
+        response, _ = self.render()
+        assert b"<h2>New usage</h2>" in response.content
+
+    def test_edit_at_same_commit_is_picked_up(self):
+        self.render()
+        self.plugin.env_variables.all().delete()
+        self.plugin.readme = "<h2>Edited</h2>"
+        self.plugin.save()
+        plugin_updated.send(sender=Plugin, plugin=self.plugin, created=False)
+        response, _ = self.render()
+        assert b"<h2>Edited</h2>" in response.content
+        assert b"API_TOKEN" not in response.content
+
+    def test_edit_in_another_process_is_picked_up(self):
+        self.render()
+        with mock.patch('plugins.signals.forget_plugin_fragments'):
+            self.plugin.readme = "<h2>Edited elsewhere</h2>"
+            self.plugin.save()
+            plugin_updated.send(sender=Plugin, plugin=self.plugin, created=False)
+        response, _ = self.render()
+        assert b"<h2>Edited elsewhere</h2>" in response.content
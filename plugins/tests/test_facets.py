@@ -0,0 +1,100 @@
+import json
+
+import pytest
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from plugins.models import Plugin, Runtime, Input, Output, Tag, PluginTag, FacetCount
+from plugins.signals import plugin_updated, plugins_status_changed
+
+
+@pytest.mark.django_db
+class TestPluginFacets:
+    def setup_method(self):
+        self.client = APIClient()
+        self.python_plugin = self.make_plugin('py-plugin', ['python'], 'file', 'csv', tag='proteomics')
+        self.r_plugin = self.make_plugin('r-plugin', ['r'], 'file', 'image', diagram_enabled=True)
+
+    def make_plugin(self, plugin_id, environments, input_type, output_type, tag=None, status='approved', **fields):
+        plugin = Plugin.objects.create(id=plugin_id, name=plugin_id, description="", version="1", status=status, **fields)
+        Runtime.objects.create(plugin=plugin, environments=environments, entrypoint='main')
+        Input.objects.create(plugin=plugin, name='in', label='In', type=input_type)
+        Output.objects.create(plugin=plugin, name='out', path='out', type=output_type)
+        if tag:
+            PluginTag.objects.create(plugin=plugin, tag=Tag.objects.get_or_create(name=tag)[0])
+        plugin_updated.send(sender=Plugin, plugin=plugin, created=True)
+        return plugin
+
+    def ids(self, params):
+        return sorted(p['id'] for p in self.client.get('/api/plugins/', params).data)
+
+    def test_filters(self):
+        assert self.ids({'environment': 'python'}) == ['py-plugin']
+        assert self.ids({'environment': ['python', 'r']}) == ['py-plugin', 'r-plugin']
+        assert self.ids({'tag': 'proteomics'}) == ['py-plugin']
+        assert self.ids({'output_type': 'image'}) == ['r-plugin']
+        assert self.ids({'input_type': 'file', 'diagram_enabled': 'true'}) == ['r-plugin']
+        assert self.ids({'requires_authentication': 'false'}) == ['py-plugin', 'r-plugin']
+
+    def test_paginated_list_carries_counts(self):
+        response = self.client.get('/api/plugins/', {'limit': 1})
+        facets = response.data['facets']
+        assert facets['environment'] == {'python': 1, 'r': 1}
+        assert facets['input_type'] == {'file': 2}
+        assert facets['diagram_enabled'] == {'true': 1, 'false': 1}
+
+    def test_counts_follow_the_active_filter(self):
+        facets = self.client.get('/api/plugins/', {'limit': 10, 'environment': 'python'}).data['facets']
+        assert facets['environment'] == {'python': 1}
+        assert facets['output_type'] == {'csv': 1}
+        assert facets['tag'] == {'proteomics': 1}
+
+        facets = self.client.get('/api/plugins/facets/', {'diagram_enabled': 'true'}).data
+        assert facets['environment'] == {'r': 1}
+        assert facets['tag'] == {}
+
+    def test_unpaginated_list_sends_counts_in_a_header(self):
+        response = self.client.get('/api/plugins/', {'tag': 'proteomics'})
+        assert [p['id'] for p in response.data] == ['py-plugin']
+        assert json.loads(response['X-Facet-Counts'])['environment'] == {'python': 1}
+
+        response = self.client.get('/api/plugins/')
+        assert json.loads(response['X-Facet-Counts'])['environment'] == {'python': 1, 'r': 1}
+
+    def test_staff_counts_include_unapproved_plugins(self):
+        self.make_plugin('pending', ['python'], 'text', 'csv', status='pending')
+        assert self.client.get('/api/plugins/facets/').data['environment'] == {'python': 1, 'r': 1}
+        self.client.force_authenticate(User.objects.create_user(username='staff', password='x', is_staff=True))
+        assert self.client.get('/api/plugins/facets/').data['environment'] == {'python': 2, 'r': 1}
+
+    def test_tag_rename_and_delete_update_facets(self):
+        tag = Tag.objects.get(name='proteomics')
+        tag.name = 'lipidomics'
+        tag.save()
+        assert self.ids({'tag': 'lipidomics'}) == ['py-plugin']
+        assert self.ids({'tag': 'proteomics'}) == []
+        assert self.client.get('/api/plugins/facets/').data['tag'] == {'lipidomics': 1}
+
+        tag.delete()
+        assert self.ids({'tag': 'lipidomics'}) == []
+        assert self.client.get('/api/plugins/facets/').data['tag'] == {}
+
+    def test_counts_follow_status_edits_and_deletes(self):
+        pending = self.make_plugin('pending', ['python'], 'text', 'csv', status='pending')
+        assert self.client.get('/api/plugins/facets/').data['environment'] == {'python': 1, 'r': 1}
+
+        Plugin.objects.filter(id='pending').update(status='approved')
+        plugins_status_changed.send(sender=Plugin, plugin_ids=['pending'], status='approved')
+        assert self.client.get('/api/plugins/facets/').data['environment'] == {'python': 2, 'r': 1}
+
+        pending.refresh_from_db()
+        pending.runtime.environments = ['r']
+        pending.runtime.save()
+        plugin_updated.send(sender=Plugin, plugin=pending, created=False)
+        assert self.client.get('/api/plugins/facets/').data['environment'] == {'python': 1, 'r': 2}
+
+        pending.delete()
+        self.r_plugin.delete()
+        facets = self.client.get('/api/plugins/facets/').data
+        assert facets['environment'] == {'python': 1}
+        assert facets['input_type'] == {'file': 1}
+        assert FacetCount.objects.get(facet='input_type', value='text').count == 0
@@ -0,0 +1,104 @@
+from io import StringIO
+
+import pytest
+import yaml
+from django.core.management import call_command
+
+from plugins.models import Plugin
+from plugins.signals import mark_registry_index_stale
+
+
+def manifest(i):
+    return {
+        'plugin': {
+            'id': f'imported-{i:03d}', 'name': f'Imported {i:03d}', 'version': '2.0.0',
+            'description': 'Seeded from disk', 'category': 'analysis',
+        },
+        'runtime': {'environments': ['python'], 'entrypoint': 'main.py'},
+        'inputs': [{'name': 'table', 'label': 'Table', 'type': 'file', 'file_types': ['.tsv']}],
+        'outputs': [{'name': 'plot', 'path': 'plot.png', 'type': 'image', 'format': 'png'}],
+        'execution': {'outputDir': 'out', 'envVariables': [{'name': 'TOKEN', 'label': 'Token', 'type': 'text'}]},
+        'plots': [{'id': 'volcano', 'name': 'Volcano', 'type': 'scatter', 'component': 'Scatter', 'dataSource': 'plot'}],
+        'annotation': {'samplesFrom': 'table', 'annotationFile': 'samples.tsv'},
+        'example': {'enabled': True, 'values': {'table': 'example.tsv'}},
+        'citation': {'enabled': True},
+    }
+
+
+@pytest.fixture
+def plugin_tree(tmp_path):
+    for i in range(12):
+        plugin_dir = tmp_path / 'plugins' / f'plugin-{i:03d}'
+        plugin_dir.mkdir(parents=True)
+        (plugin_dir / 'plugin.yaml').write_text(yaml.safe_dump(manifest(i)))
+        (plugin_dir / 'README.md').write_text(f'# Imported {i:03d}\n\nUsage notes.')
+    return tmp_path / 'plugins'
+
+
+def run(*args):
+    out = StringIO()
+    call_command('import_plugin', *map(str, args), stdout=out)
+    return out.getvalue()
+
+
+@pytest.mark.django_db
+class TestImportPlugin:
+    def test_directory_import_in_parallel(self, plugin_tree, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks() as callbacks:
+            output = run(plugin_tree, '--workers', '2')
+        assert 'Imported 12 plugins (12 created, 0 updated, 0 failed)' in output
+        assert 'plugins/s' in output
+        # One index rebuild for the whole import
+        assert [c for c in callbacks if c is mark_registry_index_stale] == [mark_registry_index_stale]
+
+        plugin = Plugin.objects.get(pk='imported-007')
+        assert plugin.status == 'approved'
+        assert plugin.author.name == 'CauldronGO Team'
+        assert plugin.category.name == 'analysis'
+        assert plugin.citation_enabled is True
+        assert '<h1>Imported 007</h1>' in plugin.readme
+        assert plugin.env_variables.get().name == 'TOKEN'
+        assert plugin.plots.get().plot_id == 'volcano'
+        assert plugin.annotation.annotationFile == 'samples.tsv'
+        assert plugin.example.values == {'table': 'example.tsv'}
+        assert plugin.inputs.get().file_types == ['.tsv']
+        assert plugin.spec['execution']['outputDir'] == 'out'
+
+    def test_reimport_updates(self, plugin_tree):
+        run(plugin_tree, '--workers', '1')
+        output = run(plugin_tree / 'plugin-000' / 'plugin.yaml')
+        assert 'Imported 1 plugins (0 created, 1 updated, 0 failed)' in output
+        assert Plugin.objects.get(pk='imported-000').inputs.count() == 1
+
+    def test_bad_manifests_are_reported_and_skipped(self, plugin_tree, tmp_path):
+        (plugin_tree / 'plugin-003' / 'plugin.yaml').write_text('plugin: [unclosed')
+        (plugin_tree / 'plugin-004' / 'plugin.yaml').write_text(yaml.safe_dump({'plugin': {'name': 'No id'}}))
+        listing = tmp_path / 'manifests.txt'
+        listing.write_text(f'{plugin_tree}\n{tmp_path / "missing" / "plugin.yaml"}\n')
+
+        output = run('--manifest-list', listing, '--workers', '2')
+        assert '(10 created, 0 updated, 3 failed)' in output
+        assert 'Plugin ID not found in YAML' in output
+        assert Plugin.objects.count() == 10
+
+    def test_misshapen_sections_are_reported_and_skipped(self, plugin_tree):
+        (plugin_tree / 'plugin-001' / 'plugin.yaml').write_text(yaml.safe_dump({'plugin': 'just a string'}))
+        (plugin_tree / 'plugin-002' / 'plugin.yaml').write_text(yaml.safe_dump({**manifest(2), 'runtime': 'python'}))
+        (plugin_tree / 'plugin-003' / 'plugin.yaml').write_text(yaml.safe_dump({**manifest(3), 'inputs': ['table']}))
+
+        output = run(plugin_tree, '--workers', '2')
+        assert '(9 created, 0 updated, 3 failed)' in output
+        assert "'plugin' must be a mapping" in output
+        assert "'runtime' must be a mapping" in output
+        assert "'inputs' must be a list of mappings" in output
+
+    def test_invalid_field_values_roll_back_only_that_plugin(self, plugin_tree):
+        bad = manifest(5)
+        bad['inputs'] = [{'name': 'cutoff', 'label': 'Cutoff', 'type': 'number', 'min': 'abc'}]
+        (plugin_tree / 'plugin-005' / 'plugin.yaml').write_text(yaml.safe_dump(bad))
+
+        output = run(plugin_tree, '--workers', '1')
+        assert '(11 created, 0 updated, 1 failed)' in output
+        assert 'plugin-005/plugin.yaml' in output
+        assert not Plugin.objects.filter(pk='imported-005').exists()
+        assert Plugin.objects.get(pk='imported-006').inputs.count() == 1
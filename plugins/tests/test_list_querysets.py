@@ -0,0 +1,231 @@
+from unittest import mock
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from plugins.models import Plugin, Author, Category, Input, Output, Runtime
+from plugins.signals import plugin_updated
+from plugins.search import update_search_index
+
+HEAVY_COLUMNS = ('"spec"', '"search_document"', '"readme"')
+
+
+def plugin_selects(queries):
+    return [q['sql'] for q in queries if q['sql'].startswith('SELECT') and 'FROM "plugins_plugin"' in q['sql']]
+
+
+@pytest.mark.django_db
+class TestListQuerysets:
+    def setup_method(self):
+        self.client = Client()
+        self.owner = User.objects.create_user(username="owner", password="x")
+        author = Author.objects.create(name="Lister")
+        category = Category.objects.create(name="Plots")
+        for i in range(5):
+            Plugin.objects.create(
+                id=f"listed-{i}",
+                name=f"Listed {i}",
+                description="Short description",
+                version="1.0.0",
+                author=author,
+                category=category,
+                status='approved',
+                submitted_by=self.owner,
+                readme="<p>README</p>" * 100,
+                spec={'plugin': {'id': f"listed-{i}"}},
+            )
+
+    def assert_light(self, queries):
+        selects = plugin_selects(queries)
+        assert selects
+        for sql in selects:
+            assert not any(column in sql for column in HEAVY_COLUMNS), sql
+
+    def test_plugin_list_view(self, deferred_loads):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/plugins/')
+        assert response.status_code == 200
+        assert b"Listed 4" in response.content
+        assert deferred_loads == []
+        self.assert_light(queries)
+
+    def test_plugin_list_search(self, deferred_loads):
+        for plugin in Plugin.objects.all():
+            update_search_index(plugin)
+        deferred_loads.clear()
+        response = self.client.get('/plugins/', {'q': 'listed'})
+        assert b"Listed 0" in response.content
+        assert deferred_loads == []
+
+    def test_user_plugin_list_view(self, deferred_loads):
+        self.client.force_login(self.owner)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/plugins/my-plugins/')
+        assert response.status_code == 200
+        assert b"Approved" in response.content
+        assert deferred_loads == []
+        self.assert_light(queries)
+
+    def test_user_plugin_list_query_count_is_flat(self, django_assert_num_queries):
+        self.client.force_login(self.owner)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/plugins/my-plugins/')
+        for i in range(5):
+            Plugin.objects.create(
+                id=f"own-{i}", name=f"Own {i}", description="d", version="1.0.0", submitted_by=self.owner,
+                author=Author.objects.create(name=f"Own author {i}"),
+                category=Category.objects.create(name=f"Own category {i}"),
+            )
+        with django_assert_num_queries(len(queries)):
+            response = self.client.get('/plugins/my-plugins/')
+        assert b"Own author 4" in response.content and b"Own category 4" in response.content
+
+    def test_my_plugins_api(self, deferred_loads):
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/plugins/my_plugins/')
+        assert len(response.data) == 5
+        assert response.data[0]['readme'] == "<p>README</p>" * 100
+        assert deferred_loads == []
+        self.assert_light(queries)
+
+    def test_admin_changelist(self, deferred_loads):
+        self.client.force_login(User.objects.create_superuser(username="admin", password="x"))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/admin/plugins/plugin/')
+        assert response.status_code == 200
+        assert deferred_loads == []
+        self.assert_light(queries)
+
+
+@pytest.mark.django_db
+class TestAdminChangelistCounts:
+    def setup_method(self):
+        self.client = Client()
+        self.client.force_login(User.objects.create_superuser(username="admin", password="x"))
+
+    def add_plugins(self, count, start=0):
+        for i in range(start, start + count):
+            plugin = Plugin.objects.create(
+                id=f"counted-{i}", name=f"Counted {i}", description="d", version="1.0.0",
+                author=Author.objects.create(name=f"Author {i}"),
+                category=Category.objects.create(name=f"Category {i}"),
+            )
+            for n in range(i % 3):
+                Input.objects.create(plugin=plugin, name=f"in{n}", label="In", type='text')
+            Output.objects.create(plugin=plugin, name="out", path="out.txt", type='text', format='txt')
+
+    def query_count(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        assert response.status_code == 200
+        return len(queries)
+
+    @pytest.mark.parametrize('url', ['/admin/plugins/plugin/', '/admin/plugins/author/', '/admin/plugins/category/'])
+    def test_query_count_does_not_grow_with_rows(self, url):
+        self.add_plugins(2)
+        few = self.query_count(url)
+        self.add_plugins(10, start=2)
+        assert self.query_count(url) == few
+
+    def test_counts_are_sortable(self):
+        self.add_plugins(3)
+        response = self.client.get('/admin/plugins/plugin/', {'o': '-9'})
+        names = [plugin.name for plugin in response.context['cl'].result_list]
+        assert names[0] == "Counted 2"
+        assert [p.input_count for p in response.context['cl'].result_list] == [2, 1, 0]
+        assert {p.output_count for p in response.context['cl'].result_list} == {1}
+
+        response = self.client.get('/admin/plugins/author/', {'o': '3'})
+        assert [a.plugin_count for a in response.context['cl'].result_list] == [1, 1, 1]
+
+
+@pytest.mark.django_db
+class TestPluginListPage:
+    def setup_method(self):
+        self.client = Client()
+        self.author = Author.objects.create(name="Row Author")
+
+    def add_plugins(self, count, start=0):
+        for i in range(start, start + count):
+            plugin = Plugin.objects.create(
+                id=f"row-{i:03d}", name=f"Row {i:03d}", description="d", version="1.0.0",
+                author=self.author, status='approved',
+            )
+            Runtime.objects.create(plugin=plugin, environments=['python'], entrypoint='main.py')
+
+    def render(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/plugins/', params)
+        assert response.status_code == 200
+        return response, len(queries)
+
+    def test_list_is_paginated(self):
+        self.add_plugins(30)
+        response, _ = self.render()
+        assert len(response.context['object_list']) == 25
+        response, _ = self.render(page=2)
+        assert [p.name for p in response.context['object_list']] == [f"Row {i:03d}" for i in range(25, 30)]
+
+    def test_query_count_does_not_grow_with_rows(self):
+        self.add_plugins(3)
+        _, few = self.render()
+        self.add_plugins(40, start=3)
+        _, many = self.render()
+        assert many == few
+
+    def test_rows_are_cached_per_revision(self):
+        self.add_plugins(1)
+        response, _ = self.render()
+        assert b"Row 000" in response.content
+
+        # A write that bypasses save() does not change the revision key
+        Plugin.objects.filter(pk="row-000").update(name="Renamed quietly")
+        response, _ = self.render()
+        assert b"Row 000" in response.content
+
+        plugin = Plugin.objects.get(pk="row-000")
+        plugin.name = "Renamed"
+        plugin.save()
+        response, _ = self.render()
+        assert b"Renamed" in response.content
+
+    def test_component_and_author_changes_invalidate_rows(self):
+        self.add_plugins(1)
+        self.render()
+
+        plugin = Plugin.objects.get(pk="row-000")
+        plugin.runtime.environments = ['r']
+        plugin.runtime.save()
+        plugin_updated.send(sender=Plugin, plugin=plugin, created=False)
+        response, _ = self.render()
+        assert b'<span class="chip">r</span>' in response.content
+
+        self.author.name = "Renamed Author"
+        self.author.save()
+        response, _ = self.render()
+        assert b"Renamed Author" in response.content
+
+    def test_rows_follow_writes_made_in_other_processes(self):
+        self.add_plugins(1)
+        self.render()
+        # Another worker's receivers can't reach this process's cache
+        with mock.patch('plugins.signals.forget_plugin_fragments'), \
+                mock.patch('plugins.signals.forget_plugin_representation'):
+            plugin = Plugin.objects.get(pk="row-000")
+            plugin.runtime.environments = ['r']
+            plugin.runtime.save()
+            plugin.save()
+            plugin_updated.send(sender=Plugin, plugin=plugin, created=False)
+            response, _ = self.render()
+            assert b'<span class="chip">r</span>' in response.content
+
+            self.author.name = "Renamed Author"
+            self.author.save()
+            response, _ = self.render()
+            assert b"Renamed Author" in response.content
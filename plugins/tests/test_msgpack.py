@@ -0,0 +1,73 @@
+import json
+import os
+
+import pytest
+from django.test import Client
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from plugins import registry_index
+from plugins.models import Plugin, Author, Category, Runtime
+from plugins.registry_index import build_registry_index
+
+msgpack = pytest.importorskip('msgpack')
+
+
+@pytest.mark.django_db
+class TestMessagePackNegotiation:
+    def setup_method(self):
+        self.client = APIClient()
+        self.author = Author.objects.create(name="Packed Author")
+        self.category = Category.objects.create(name="Packed Category")
+        self.plugin = Plugin.objects.create(
+            id="packed-plugin",
+            name="Packed Plugin",
+            description="Sent as MessagePack",
+            version="1.0.0",
+            author=self.author,
+            category=self.category,
+            status='approved'
+        )
+        Runtime.objects.create(plugin=self.plugin, environments=['python'], entrypoint='main.py')
+
+    def assert_same_resource(self, url, **kwargs):
+        response = self.client.get(url, **kwargs)
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'application/msgpack'
+        expected = json.loads(self.client.get(url.split('?')[0].replace('.msgpack', '/')).content)
+        assert msgpack.unpackb(response.content) == expected
+
+    def test_accept_header(self):
+        self.assert_same_resource('/api/plugins/', HTTP_ACCEPT='application/msgpack')
+
+    def test_format_query_param(self):
+        self.assert_same_resource(f'/api/plugins/{self.plugin.id}/?format=msgpack')
+        self.assert_same_resource('/api/authors/?format=msgpack')
+        self.assert_same_resource('/api/categories/?format=msgpack')
+
+    def test_format_suffix(self):
+        self.assert_same_resource('/api/authors.msgpack')
+
+    def test_json_is_still_the_default(self):
+        response = self.client.get('/api/plugins/')
+        assert response['Content-Type'] == 'application/json'
+        assert response.json()[0]['id'] == self.plugin.id
+
+    def test_registry_index_has_msgpack_artifact(self, registry_index_root):
+        manifest = build_registry_index()
+        packed_name = manifest['msgpack']['url'].rsplit('/', 1)[-1]
+        assert packed_name.endswith('.msgpack')
+
+        with open(os.path.join(registry_index_root, packed_name), 'rb') as f:
+            packed = msgpack.unpackb(f.read())
+        json_name = manifest['url'].rsplit('/', 1)[-1]
+        with open(os.path.join(registry_index_root, json_name), 'rb') as f:
+            assert packed == json.loads(f.read())
+
+        response = Client().get(f'/registry/{packed_name}')
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'application/msgpack'
+
+    def test_registry_index_without_msgpack(self, monkeypatch):
+        monkeypatch.setattr(registry_index, 'msgpack', None)
+        assert 'msgpack' not in build_registry_index()
@@ -0,0 +1,69 @@
+from django.utils import timezone
+
+import pytest
+from rest_framework.test import APIClient
+from rest_framework import status
+from plugins.models import Plugin
+
+
+@pytest.mark.django_db
+class TestPluginPagination:
+    def setup_method(self):
+        self.client = APIClient()
+        for i in range(7):
+            Plugin.objects.create(
+                id=f"page-plugin-{i}", name=f"Plugin {i}", description="", version="1.0.0", status='approved'
+            )
+
+    def test_default_listing_is_unchanged(self):
+        response = self.client.get('/api/plugins/')
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data) == 7
+
+    def test_limit_offset_still_works(self):
+        response = self.client.get('/api/plugins/', {'limit': 3, 'offset': 3})
+        assert response.data['count'] == 7
+        assert len(response.data['results']) == 3
+
+    def test_cursor_pages_cover_catalogue_once(self):
+        seen = []
+        response = self.client.get('/api/plugins/', {'pagination': 'cursor', 'page_size': 3, 'ordering': 'name'})
+        while True:
+            assert 'count' not in response.data
+            seen.extend(p['id'] for p in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        assert seen == [f"page-plugin-{i}" for i in range(7)]
+
+    def test_cursor_pages_are_stable_under_ingestion(self):
+        response = self.client.get('/api/plugins/', {'pagination': 'cursor', 'page_size': 3, 'ordering': 'name'})
+        first_page = [p['id'] for p in response.data['results']]
+        Plugin.objects.create(id="aaa-new", name="Plugin 0a", description="", version="1", status='approved')
+
+        response = self.client.get(response.data['next'])
+        assert [p['id'] for p in response.data['results']] == ["page-plugin-3", "page-plugin-4", "page-plugin-5"]
+        assert first_page == ["page-plugin-0", "page-plugin-1", "page-plugin-2"]
+
+    def pages(self, response, key='next'):
+        seen = []
+        while True:
+            seen.append([p['id'] for p in response.data['results']])
+            if not response.data[key]:
+                return seen, response
+            response = self.client.get(response.data[key])
+
+    def test_ties_are_broken_by_id(self):
+        # Every plugin shares one updated_at, so only the id orders them
+        Plugin.objects.update(updated_at=timezone.now())
+        first = self.client.get('/api/plugins/', {'pagination': 'cursor', 'page_size': 2, 'ordering': '-updated_at'})
+        pages, last = self.pages(first)
+        assert sum(pages, []) == [f"page-plugin-{i}" for i in reversed(range(7))]
+        assert all(len(page) == 2 for page in pages[:-1])
+
+        back, _ = self.pages(self.client.get(last.data['previous']), key='previous')
+        assert sum(reversed(back), []) == [f"page-plugin-{i}" for i in reversed(range(1, 7))]
+
+    def test_invalid_cursor_position(self):
+        response = self.client.get('/api/plugins/', {'cursor': 'cD1ub3QtanNvbg=='})
+        assert response.status_code == status.HTTP_404_NOT_FOUND
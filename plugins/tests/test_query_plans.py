@@ -0,0 +1,129 @@
+from datetime import timedelta
+
+import pytest
+from cryptography.fernet import Fernet
+from django.contrib.auth.models import User
+from django.db import connection
+from django.utils import timezone
+
+from plugins.models import Plugin, PluginChange, RepositorySSHKey
+from plugins.repository_keys import repository_key
+
+PLUGIN_COUNT = 3000
+OWNER_COUNT = 20
+
+
+def analyze():
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def full_scans(plan, table):
+    """Plan lines that read every row of `table` instead of walking an index."""
+    if connection.vendor == 'postgresql':
+        return [line for line in plan.splitlines() if f'Seq Scan on {table}' in line]
+    return [line for line in plan.splitlines() if f'SCAN {table}' in line and 'USING' not in line]
+
+
+def sorts(plan):
+    """Plan lines that sort rows in memory rather than reading them in index order."""
+    if connection.vendor == 'postgresql':
+        return [line for line in plan.splitlines() if line.strip().lstrip('->').strip().startswith('Sort ')]
+    return [line for line in plan.splitlines() if 'USE TEMP B-TREE FOR ORDER BY' in line]
+
+
+@pytest.mark.django_db
+class TestQueryPlans:
+    """
+    The registry's hot API predicates must be answered from an index. Builds a
+    catalogue large enough for the planner to prefer an index when one exists,
+    then inspects EXPLAIN output for full table scans and, on paged listings,
+    for in-memory sorts.
+    """
+
+    def setup_method(self):
+        self.owners = User.objects.bulk_create(
+            [User(username=f"owner-{i}") for i in range(OWNER_COUNT)]
+        )
+        now = timezone.now()
+        plugins = Plugin.objects.bulk_create([
+            Plugin(
+                id=f"plan-plugin-{i:05d}",
+                name=f"Plugin {(i * 7919) % PLUGIN_COUNT:05d}",
+                description="",
+                version="1.0.0",
+                status='pending' if i % 10 == 0 else 'approved',
+                submitted_by=self.owners[i % OWNER_COUNT],
+                repository=f"https://github.com/org/repo-{i}",
+                repository_key=f"github.com/org/repo-{i}",
+            )
+            for i in range(PLUGIN_COUNT)
+        ])
+        for i, plugin in enumerate(plugins):
+            plugin.updated_at = now - timedelta(minutes=i)
+        Plugin.objects.bulk_update(plugins, ['updated_at'], batch_size=500)
+        self.middle = now - timedelta(minutes=PLUGIN_COUNT // 2)
+
+        PluginChange.objects.bulk_create([
+            PluginChange(plugin_id=plugin.id, action='created', status=plugin.status)
+            for plugin in plugins
+        ])
+        self.recent_change = PluginChange.objects.order_by('-id').values_list('id', flat=True)[100]
+
+        analyze()
+
+    def assert_indexed(self, queryset, table='plugins_plugin', ordered=True):
+        plan = queryset.explain()
+        assert full_scans(plan, table) == [], plan
+        if ordered:
+            assert sorts(plan) == [], plan
+
+    def test_approved_listing_by_updated_at(self):
+        approved = Plugin.objects.filter(status='approved')
+        self.assert_indexed(approved.order_by('-updated_at', '-id')[:50])
+
+    def test_approved_listing_deep_cursor_page(self):
+        approved = Plugin.objects.filter(status='approved', updated_at__lt=self.middle)
+        self.assert_indexed(approved.order_by('-updated_at', '-id')[:50])
+
+    def test_approved_listing_by_name(self):
+        approved = Plugin.objects.filter(status='approved')
+        self.assert_indexed(approved.order_by('name', 'id')[:50])
+
+    def test_staff_status_listing(self):
+        self.assert_indexed(Plugin.objects.filter(status='pending').order_by('-updated_at')[:50])
+
+    def test_owner_listing(self):
+        owned = Plugin.objects.filter(submitted_by=self.owners[3]).order_by('-updated_at')
+        self.assert_indexed(owned, ordered=False)
+
+    def test_plugin_detail(self):
+        self.assert_indexed(Plugin.objects.filter(pk="plan-plugin-01234"), ordered=False)
+
+    def test_change_log_cursor(self):
+        changes = PluginChange.objects.filter(id__gt=self.recent_change).order_by('id')[:500]
+        self.assert_indexed(changes, table='plugins_pluginchange')
+
+    def test_ssh_key_lookup(self, settings):
+        settings.ENCRYPTION_KEY = Fernet.generate_key().decode()
+        RepositorySSHKey.objects.bulk_create([
+            RepositorySSHKey(
+                user=self.owners[i % OWNER_COUNT],
+                repository_url=f"git@github.com:org/repo-{i}.git",
+                repository_key=f"github.com/org/repo-{i}",
+                ssh_private_key="key",
+            )
+            for i in range(PLUGIN_COUNT // 5)
+        ])
+        analyze()
+
+        keys = RepositorySSHKey.objects.filter(
+            user=self.owners[5], repository_key=repository_key("https://github.com/org/repo-5"),
+        )
+        self.assert_indexed(keys, table='plugins_repositorysshkey', ordered=False)
+
+    def test_repository_fan_out(self):
+        plugins = Plugin.objects.filter(
+            status='approved', repository_key__in=[repository_key("git@github.com:org/repo-7.git")],
+        )
+        self.assert_indexed(plugins, ordered=False)
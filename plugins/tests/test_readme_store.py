@@ -0,0 +1,90 @@
+import gzip
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from plugins.admin import PluginAdmin
+from plugins.forms import PluginAdminForm
+from plugins.models import Plugin, PluginReadme
+
+README = "<h1>Volcano</h1>" + "<p>Plots fold change against significance.</p>" * 50
+
+
+@pytest.mark.django_db
+class TestReadmeStore:
+    def setup_method(self):
+        self.client = APIClient()
+        self.plugin = Plugin.objects.create(
+            id="readme-plugin",
+            name="Readme Plugin",
+            description="Has a long README",
+            version="1.0.0",
+            status='approved',
+            readme=README,
+        )
+
+    def test_readme_is_stored_compressed(self):
+        store = PluginReadme.objects.get(plugin=self.plugin)
+        assert store.size == len(README.encode('utf-8'))
+        assert len(bytes(store.data)) < store.size
+        assert Plugin.objects.get(pk=self.plugin.pk).readme == README
+
+    def test_plugin_rows_do_not_carry_the_readme(self):
+        with CaptureQueriesContext(connection) as queries:
+            list(Plugin.objects.all())
+        assert 'plugins_pluginreadme' not in queries[0]['sql']
+        assert 'readme' not in [field.column for field in Plugin._meta.concrete_fields]
+
+    def test_update_or_create_writes_through(self):
+        Plugin.objects.update_or_create(id=self.plugin.id, defaults={'readme': "<p>New</p>"})
+        assert Plugin.objects.get(pk=self.plugin.pk).readme == "<p>New</p>"
+
+        self.plugin.readme = None
+        self.plugin.save()
+        assert not PluginReadme.objects.filter(plugin=self.plugin).exists()
+        assert Plugin.objects.get(pk=self.plugin.pk).readme is None
+
+    def test_api_representation_includes_readme(self):
+        response = self.client.get(f'/api/plugins/{self.plugin.id}/')
+        assert response.data['readme'] == README
+
+    def test_gzip_clients_get_the_stored_bytes(self):
+        response = self.client.get(f'/api/plugins/{self.plugin.id}/readme/', HTTP_ACCEPT_ENCODING='gzip, br')
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Encoding'] == 'gzip'
+        assert response.content == bytes(PluginReadme.objects.get(plugin=self.plugin).data)
+        assert gzip.decompress(response.content).decode('utf-8') == README
+        assert 'Accept-Encoding' in response['Vary']
+
+    def test_other_clients_get_plain_html(self):
+        response = self.client.get(f'/api/plugins/{self.plugin.id}/readme/')
+        assert response.status_code == status.HTTP_200_OK
+        assert not response.has_header('Content-Encoding')
+        assert response.content.decode('utf-8') == README
+
+        response = self.client.get(f'/api/plugins/{self.plugin.id}/readme/', HTTP_ACCEPT_ENCODING='gzip;q=0, br')
+        assert not response.has_header('Content-Encoding')
+        assert response.content.decode('utf-8') == README
+
+        response = self.client.get(f'/api/plugins/{self.plugin.id}/readme/', HTTP_IF_NONE_MATCH=response['ETag'])
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_readme_endpoint_hides_unapproved(self):
+        Plugin.objects.filter(pk=self.plugin.pk).update(status='pending')
+        response = self.client.get(f'/api/plugins/{self.plugin.id}/readme/')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_admin_form_edits_readme(self):
+        assert PluginAdmin.form is PluginAdminForm
+        form = PluginAdminForm(instance=self.plugin)
+        assert form.fields['readme'].initial == README
+
+        data = {name: form[name].value() for name in form.fields if form[name].value() is not None}
+        data['readme'] = "<p>Edited</p>"
+        form = PluginAdminForm(data, instance=Plugin.objects.get(pk=self.plugin.pk))
+        assert form.is_valid(), form.errors
+        form.save()
+        assert Plugin.objects.get(pk=self.plugin.pk).readme == "<p>Edited</p>"
@@ -0,0 +1,117 @@
+import gzip
+import json
+import os
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from django.db import OperationalError
+from django.test import Client
+from rest_framework import status
+from plugins.models import Plugin, Author, Category, Runtime
+from plugins.registry_index import build_registry_index, build_stale_registry_index, mark_registry_index_stale
+from plugins.signals import plugins_status_changed
+
+
+@pytest.mark.django_db
+class TestRegistryIndex:
+    def setup_method(self):
+        self.client = Client()
+        self.author = Author.objects.create(name="Index Author")
+        self.category = Category.objects.create(name="Index Category")
+        self.plugin = Plugin.objects.create(
+            id="index-plugin",
+            name="Index Plugin",
+            description="Listed in the index",
+            version="1.0.0",
+            author=self.author,
+            category=self.category,
+            status='approved'
+        )
+        Runtime.objects.create(plugin=self.plugin, environments=['python'], entrypoint='main.py')
+        Plugin.objects.create(id="pending-plugin", name="Pending", description="", version="0.1.0")
+
+    def test_build_writes_hashed_and_compressed_artifacts(self, registry_index_root):
+        manifest = build_registry_index()
+        name = manifest['url'].rsplit('/', 1)[-1]
+        path = os.path.join(registry_index_root, name)
+
+        with open(path, 'rb') as f:
+            content = f.read()
+        with open(path + '.gz', 'rb') as f:
+            assert gzip.decompress(f.read()) == content
+
+        data = json.loads(content)
+        assert manifest['count'] == 1
+        assert [p['id'] for p in data] == ['index-plugin']
+        assert data[0]['runtime']['environments'] == ['python']
+
+        with open(os.path.join(registry_index_root, 'latest.json')) as f:
+            assert json.load(f)['sha256'] == manifest['sha256']
+
+    def test_index_matches_api_representation(self):
+        manifest = build_registry_index()
+        response = self.client.get(manifest['url'])
+        api_response = self.client.get('/api/plugins/')
+        assert json.loads(b''.join(response.streaming_content)) == api_response.json()
+
+    def test_fallback_view_serves_gzip_variant(self):
+        manifest = build_registry_index()
+        response = self.client.get(manifest['url'], HTTP_ACCEPT_ENCODING='gzip')
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Encoding'] == 'gzip'
+        assert 'immutable' in response['Cache-Control']
+
+        response = self.client.get('/registry/latest.json')
+        assert response['Cache-Control'] == 'no-cache'
+
+    def test_fallback_view_honours_q_values(self):
+        manifest = build_registry_index()
+        response = self.client.get(manifest['url'], HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+        assert not response.has_header('Content-Encoding')
+        assert json.loads(b''.join(response.streaming_content))[0]['id'] == 'index-plugin'
+
+        response = self.client.get(manifest['url'], HTTP_ACCEPT_ENCODING='*;q=0.5, br;q=0')
+        assert response['Content-Encoding'] == 'gzip'
+
+    def test_status_change_marks_index_stale(self, django_capture_on_commit_callbacks):
+        build_registry_index()
+        assert build_stale_registry_index() is None
+        with django_capture_on_commit_callbacks(execute=True):
+            Plugin.objects.filter(id='pending-plugin').update(status='approved')
+            plugins_status_changed.send(sender=Plugin, plugin_ids=['pending-plugin'], status='approved')
+            plugins_status_changed.send(sender=Plugin, plugin_ids=['index-plugin'], status='approved')
+
+        assert json.loads(b''.join(self.client.get('/registry/latest.json').streaming_content))['count'] == 1
+        assert build_stale_registry_index()['count'] == 2
+        assert build_stale_registry_index() is None
+
+        response = self.client.get('/registry/latest.json')
+        manifest = json.loads(b''.join(response.streaming_content))
+        assert manifest['count'] == 2
+
+    def test_watch_rebuilds_only_when_stale(self):
+        mark_registry_index_stale()
+        out = StringIO()
+        with mock.patch('time.sleep', side_effect=[None, KeyboardInterrupt]):
+            call_command('build_registry_index', '--watch', stdout=out)
+        assert out.getvalue().count('Wrote 1 plugins') == 1
+        assert out.getvalue().endswith('Stopped.\n')
+
+    def test_watch_survives_a_failed_rebuild(self):
+        mark_registry_index_stale()
+        calls = []
+
+        def flaky_build():
+            calls.append(1)
+            if len(calls) == 1:
+                raise OperationalError('gone')
+            return build_registry_index()
+
+        out = StringIO()
+        with mock.patch('plugins.registry_index.build_registry_index', side_effect=flaky_build), \
+                mock.patch('time.sleep', side_effect=[None, None, KeyboardInterrupt]):
+            call_command('build_registry_index', '--watch', stdout=out)
+        assert 'Rebuild failed: gone' in out.getvalue()
+        assert 'Wrote 1 plugins' in out.getvalue()
@@ -0,0 +1,110 @@
+import datetime
+import decimal
+import io
+import uuid
+
+import pytest
+from django.core.management import call_command
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from plugins import parsers, renderers
+from plugins.models import Plugin, Author, Runtime, Input
+from plugins.parsers import FastJSONParser
+from plugins.renderers import EncodedJSON, FastJSONRenderer
+from plugins.serializers import PluginSerializer
+
+PAYLOADS = [
+    {'name': 'Ünïcode – plugin ✓', 'count': 3, 'enabled': True, 'missing': None},
+    {'line': 'one\u2028two\u2029three', 'quote': 'say "hi"\n\t\\'},
+    {'floats': [0.1, 100.0, -0.0, 123456789.123, 1e-07, 1e16, 1e15]},
+    {'big': 2 ** 70, 'negative': -(2 ** 63)},
+    {'when': datetime.datetime(2026, 10, 19, 12, 30, 1, 123456, tzinfo=datetime.timezone.utc),
+     'day': datetime.date(2026, 10, 19), 'at': datetime.time(8, 15)},
+    {'amount': decimal.Decimal('12.50'), 'id': uuid.UUID('12345678-1234-5678-1234-567812345678')},
+    {1: 'non-string key', 'nested': [[[], {}], ('tuple', 'values')]},
+    [],
+]
+
+
+@pytest.fixture(params=['orjson', 'stdlib'])
+def json_backend(request, monkeypatch):
+    if request.param == 'orjson':
+        pytest.importorskip('orjson')
+    else:
+        monkeypatch.setattr(renderers, 'orjson', None)
+        monkeypatch.setattr(parsers, 'orjson', None)
+    return request.param
+
+
+class TestFastJSONRenderer:
+    @pytest.mark.parametrize('data', PAYLOADS)
+    def test_output_matches_json_renderer(self, json_backend, data):
+        assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+    def test_indent_request_is_honoured(self, json_backend):
+        data = {'a': [1, 2]}
+        media_type = 'application/json; indent=2'
+        assert FastJSONRenderer().render(data, media_type) == JSONRenderer().render(data, media_type)
+
+    def test_none_renders_empty(self, json_backend):
+        assert FastJSONRenderer().render(None) == b''
+
+    def test_encoded_fragments_are_spliced(self, json_backend):
+        items = [{'id': 'a', 'text': 'ü\u2028'}, {'id': 'b', 'values': [1.5, None]}]
+        fragments = [EncodedJSON(FastJSONRenderer().render(item)) for item in items]
+        for wrap in (lambda v: v, lambda v: {'count': 2, 'results': v}):
+            assert FastJSONRenderer().render(wrap(fragments)) == JSONRenderer().render(wrap(items))
+        assert FastJSONRenderer().render(fragments[0]) == JSONRenderer().render(items[0])
+        nested = {'outer': {'inner': fragments}}
+        assert FastJSONRenderer().render(nested) == JSONRenderer().render({'outer': {'inner': items}})
+
+
+class TestFastJSONParser:
+    @pytest.mark.parametrize('body', [
+        b'{"name": "\\u00fcber", "values": [1, 2.5, null, true]}',
+        b'{"big": 123456789012345678901234567890}',
+        b'"\\ud800"',
+        b'1.0e400',
+    ])
+    def test_parses_like_json_parser(self, json_backend, body):
+        assert FastJSONParser().parse(io.BytesIO(body)) == JSONParser().parse(io.BytesIO(body))
+
+    @pytest.mark.parametrize('body', [b'{"a": NaN}', b'{"a": 1', b''])
+    def test_rejects_like_json_parser(self, json_backend, body):
+        with pytest.raises(ParseError) as expected:
+            JSONParser().parse(io.BytesIO(body))
+        with pytest.raises(ParseError) as raised:
+            FastJSONParser().parse(io.BytesIO(body))
+        assert str(raised.value) == str(expected.value)
+
+
+@pytest.mark.django_db
+class TestFastJSONApi:
+    def setup_method(self):
+        self.client = APIClient()
+        author = Author.objects.create(name="Jörg Ångström")
+        self.plugin = Plugin.objects.create(
+            id="json-plugin",
+            name="JSON Plugin",
+            description="Line\u2028separated",
+            version="1.0.0",
+            author=author,
+            status='approved',
+        )
+        Runtime.objects.create(plugin=self.plugin, environments=['python'], entrypoint='main.py')
+        Input.objects.create(plugin=self.plugin, name="alpha", label="Alpha", type="number", min=1e-07, step=0.5)
+
+    def test_api_response_matches_json_renderer(self, json_backend):
+        response = self.client.get(f'/api/plugins/{self.plugin.id}/')
+        expected = JSONRenderer().render(PluginSerializer(self.plugin).data)
+        assert response['Content-Type'] == 'application/json'
+        assert response.content == expected
+
+    def test_benchmark_command_checks_output(self, json_backend):
+        out = io.StringIO()
+        call_command('benchmark_json', iterations=2, copies=3, stdout=out)
+        assert 'Payload: 3 plugins' in out.getvalue()
+        assert 'encode:' in out.getvalue()
@@ -0,0 +1,99 @@
+from unittest import mock
+
+import pytest
+from django.contrib.auth.models import User
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from plugins.models import Plugin, PluginRevision, RevisionBlob
+from plugins.revisions import read_blob
+from plugins.viewsets import sync_plugin_components
+
+FIRST = 'a' * 40
+SECOND = 'b' * 40
+
+
+def manifest(*input_names):
+    return {
+        'runtime': {'environments': ['python'], 'entrypoint': 'main.py'},
+        'inputs': [{'name': name, 'label': name.title(), 'type': 'text'} for name in input_names],
+    }
+
+
+@pytest.mark.django_db
+class TestPluginRevisions:
+    def setup_method(self):
+        self.client = APIClient()
+        self.owner = User.objects.create_user(username="owner", password="x")
+        self.plugin = Plugin.objects.create(
+            id="revised-plugin",
+            name="Revised Plugin",
+            description="Has history",
+            version="1.0.0",
+            status='approved',
+            submitted_by=self.owner,
+        )
+        self.ingest(FIRST, "1.0.0", "<p>First readme</p>", manifest('alpha'))
+        self.ingest(SECOND, "2.0.0", "<p>Second readme</p>", manifest('alpha', 'beta'))
+
+    def ingest(self, commit_hash, version, readme, data):
+        self.plugin.commit_hash = commit_hash
+        self.plugin.version = version
+        self.plugin.readme = readme
+        self.plugin.save()
+        sync_plugin_components(self.plugin, data)
+
+    def test_each_commit_is_recorded(self):
+        revisions = {r.commit_hash: r for r in PluginRevision.objects.filter(plugin=self.plugin)}
+        assert set(revisions) == {FIRST, SECOND}
+        readme = revisions[FIRST].readme_blob
+        assert read_blob(readme) == b"<p>First readme</p>"
+        assert readme.size == len(b"<p>First readme</p>")
+
+    def test_identical_content_is_stored_once(self):
+        blobs = RevisionBlob.objects.count()
+        third = 'c' * 40
+        self.plugin.commit_hash = third
+        self.plugin.save()
+        sync_plugin_components(self.plugin, manifest('alpha', 'beta'))
+        revision = PluginRevision.objects.get(plugin=self.plugin, commit_hash=third)
+        assert revision.spec_blob_id == PluginRevision.objects.get(commit_hash=SECOND).spec_blob_id
+        assert RevisionBlob.objects.count() == blobs
+
+    def test_history_endpoints(self):
+        response = self.client.get(f'/api/plugins/{self.plugin.id}/revisions/')
+        assert [r['commit_hash'] for r in response.data] == [SECOND, FIRST]
+        assert response.data[0]['current'] is True
+
+        response = self.client.get(f'/api/plugins/{self.plugin.id}/revisions/{FIRST[:7]}/')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['version'] == "1.0.0"
+        assert response.data['readme'] == "<p>First readme</p>"
+        assert [i['name'] for i in response.data['spec']['inputs']] == ['alpha']
+
+        response = self.client.get(f'/api/plugins/{self.plugin.id}/revisions/{"d" * 40}/')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_rollback_without_network(self):
+        self.client.force_authenticate(self.owner)
+        with mock.patch('git.Repo.clone_from', side_effect=AssertionError("network used")):
+            response = self.client.post(f'/api/plugins/{self.plugin.id}/rollback/', {'commit_hash': FIRST[:10]})
+        assert response.status_code == status.HTTP_200_OK
+
+        self.plugin.refresh_from_db()
+        assert self.plugin.commit_hash == FIRST
+        assert self.plugin.recommended_commit == FIRST
+        assert self.plugin.version == "1.0.0"
+        assert self.plugin.readme == "<p>First readme</p>"
+        assert list(self.plugin.inputs.values_list('name', flat=True)) == ['alpha']
+        assert self.plugin.runtime.entrypoint == 'main.py'
+        assert response.data['inputs'][0]['name'] == 'alpha'
+
+    def test_rollback_requires_owner(self):
+        self.client.force_authenticate(User.objects.create_user(username="stranger", password="x"))
+        response = self.client.post(f'/api/plugins/{self.plugin.id}/rollback/', {'commit_hash': FIRST})
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_deleting_plugin_prunes_blobs(self):
+        self.plugin.delete()
+        assert RevisionBlob.objects.count() == 0
@@ -0,0 +1,66 @@
+import pytest
+from django.test import Client
+from rest_framework.test import APIClient
+from plugins.models import Plugin, Author, Category, Input
+from plugins.signals import plugin_updated
+
+
+@pytest.mark.django_db
+class TestPluginSearch:
+    def setup_method(self):
+        self.client = APIClient()
+        author = Author.objects.create(name="Jane Proteomics")
+        category = Category.objects.create(name="Visualization")
+        self.volcano = Plugin.objects.create(
+            id="volcano", name="Volcano Plot", description="Differential abundance plot",
+            version="1.0.0", author=author, status='approved'
+        )
+        Input.objects.create(plugin=self.volcano, name="fc", label="Fold change cutoff", type="number")
+        self.heatmap = Plugin.objects.create(
+            id="heatmap", name="Heatmap", description="Clustered heatmap of a volcano of data",
+            version="1.0.0", category=category, status='approved'
+        )
+        for plugin in (self.volcano, self.heatmap):
+            plugin_updated.send(sender=Plugin, plugin=plugin, created=True)
+
+    def search(self, term):
+        response = self.client.get('/api/plugins/', {'search': term})
+        return [p['id'] for p in response.data]
+
+    def test_name_matches_rank_first(self):
+        assert self.search('volcano') == ['volcano', 'heatmap']
+
+    def test_matches_author_category_and_input_labels(self):
+        assert self.search('proteomics') == ['volcano']
+        assert self.search('visualization') == ['heatmap']
+        assert self.search('fold cutoff') == ['volcano']
+
+    def test_no_match(self):
+        assert self.search('spectral') == []
+
+    def test_document_refreshed_on_ingestion(self):
+        self.heatmap.description = "Now about spectra"
+        self.heatmap.save()
+        plugin_updated.send(sender=Plugin, plugin=self.heatmap, created=False)
+        assert self.search('spectra') == ['heatmap']
+
+    def test_renamed_author_and_category_are_searchable(self):
+        author = self.volcano.author
+        author.name = "Bobby Lipidomics"
+        author.save()
+        category = self.heatmap.category
+        category.name = "Charts"
+        category.save()
+        assert self.search('lipidomics') == ['volcano']
+        assert self.search('proteomics') == []
+        assert self.search('charts') == ['heatmap']
+        assert self.search('visualization') == []
+
+    def test_browse_page_uses_search_index(self):
+        response = Client().get('/plugins/', {'q': 'visualization'})
+        assert [p.id for p in response.context['object_list']] == ['heatmap']
+
+    def test_search_columns_stay_out_of_the_api(self):
+        response = self.client.get(f'/api/plugins/{self.volcano.id}/')
+        assert 'search_document' not in response.data
+        assert 'search_vector' not in response.data
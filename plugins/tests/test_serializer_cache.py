@@ -0,0 +1,125 @@
+import json
+from unittest import mock
+
+import pytest
+from django.contrib.auth.models import User
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from plugins.models import Plugin, PluginChange, Author, Input, Runtime, Tag
+from plugins.serializer_cache import plugin_representations
+from plugins.serializers import PluginSerializer
+from plugins.signals import plugin_updated
+
+
+@pytest.mark.django_db
+class TestSerializerCache:
+    def setup_method(self):
+        self.client = APIClient()
+        self.author = Author.objects.create(name="Cache Author")
+        self.plugins = []
+        for i in range(3):
+            plugin = Plugin.objects.create(
+                id=f"cached-plugin-{i}",
+                name=f"Cached Plugin {i}",
+                description="Serialized once",
+                version="1.0.0",
+                author=self.author,
+                commit_hash=f"{i}" * 40,
+                status='approved',
+            )
+            Runtime.objects.create(plugin=plugin, environments=['python'], entrypoint='main.py')
+            Input.objects.create(plugin=plugin, name="alpha", label="Alpha", type="number", min=0.5)
+            self.plugins.append(plugin)
+
+    def expected(self, queryset):
+        return JSONRenderer().render(PluginSerializer(queryset, many=True).data)
+
+    def test_list_matches_uncached_output(self):
+        response = self.client.get('/api/plugins/', {'ordering': 'name'})
+        assert response.content == self.expected(Plugin.objects.order_by('name'))
+
+    def test_detail_matches_uncached_output(self):
+        plugin = self.plugins[1]
+        response = self.client.get(f'/api/plugins/{plugin.id}/')
+        assert response.content == JSONRenderer().render(PluginSerializer(plugin).data)
+
+    def test_paginated_list_splices_fragments(self):
+        response = self.client.get('/api/plugins/', {'limit': 2, 'ordering': 'name'})
+        body = json.loads(response.content)
+        assert [p['id'] for p in body['results']] == ["cached-plugin-0", "cached-plugin-1"]
+        assert [p['id'] for p in response.data['results']] == ["cached-plugin-0", "cached-plugin-1"]
+        assert 'facets' in body
+
+    def test_indented_and_browsable_output(self):
+        response = self.client.get('/api/plugins/', HTTP_ACCEPT='application/json; indent=2')
+        assert json.loads(response.content) == json.loads(self.expected(Plugin.objects.all()))
+        assert b'\n  {' in response.content
+
+        response = self.client.get('/api/plugins/', HTTP_ACCEPT='text/html')
+        assert response.status_code == 200
+        assert b'cached-plugin-0' in response.content
+
+    def test_warm_list_skips_serialization(self, django_assert_num_queries):
+        self.client.get('/api/plugins/')
+        # The key columns, plus the facet summary for the X-Facet-Counts header
+        with django_assert_num_queries(2):
+            response = self.client.get('/api/plugins/')
+        assert len(response.data) == 3
+
+    def test_plugin_save_changes_key(self):
+        plugin = self.plugins[0]
+        assert plugin_representations([plugin])[0]['description'] == "Serialized once"
+        plugin.description = "Edited"
+        plugin.save()
+        assert plugin_representations([plugin])[0]['description'] == "Edited"
+
+    def test_status_update_without_save(self):
+        plugin_representations(self.plugins)
+        Plugin.objects.filter(id=self.plugins[0].id).update(status='rejected')
+        user = User.objects.create_user(username="staff", password="x", is_staff=True)
+        self.client.force_authenticate(user)
+        response = self.client.get(f'/api/plugins/{self.plugins[0].id}/')
+        assert response.data['status'] == 'rejected'
+
+    def test_component_change_is_forgotten_on_plugin_updated(self):
+        plugin = self.plugins[0]
+        plugin_representations([plugin])
+        Input.objects.filter(plugin=plugin).update(label="Renamed")
+        plugin_updated.send(sender=Plugin, plugin=plugin, created=False)
+        assert plugin_representations([plugin])[0]['inputs'][0]['label'] == "Renamed"
+
+    def reloaded(self):
+        return plugin_representations(Plugin.objects.filter(author=self.author).order_by('id'))
+
+    def test_author_edit_invalidates_embedded_copies(self):
+        plugin_representations(self.plugins)
+        self.author.name = "Renamed Author"
+        self.author.save()
+        assert {p['author']['name'] for p in self.reloaded()} == {"Renamed Author"}
+        assert PluginChange.objects.filter(action='updated').count() == 3
+
+    def test_tag_delete_invalidates_embedded_copies(self):
+        tag = Tag.objects.create(name="volcano")
+        self.plugins[0].tags.add(tag)
+        self.plugins[0].save()
+        plugin = Plugin.objects.get(pk=self.plugins[0].pk)
+        assert [t['name'] for t in plugin_representations([plugin])[0]['tags']] == ["volcano"]
+        tag.delete()
+        plugin = Plugin.objects.get(pk=self.plugins[0].pk)
+        assert plugin_representations([plugin])[0]['tags'] == []
+
+    def test_other_processes_see_writes_without_invalidation(self):
+        """Keys come from columns, so a cache no forget_* call reaches is never stale."""
+        plugin_representations(self.plugins)
+        with mock.patch('plugins.signals.forget_plugin_representation'), \
+                mock.patch('plugins.signals.forget_plugin_fragments'):
+            plugin = Plugin.objects.get(pk=self.plugins[0].pk)
+            plugin.description = "Edited elsewhere"
+            plugin.save()
+            plugin_updated.send(sender=Plugin, plugin=plugin, created=False)
+            Plugin.objects.filter(pk=self.plugins[1].pk).update(status='rejected')
+        plugins = Plugin.objects.filter(pk__in=[self.plugins[0].pk, self.plugins[1].pk]).order_by('id')
+        first, second = plugin_representations(plugins)
+        assert first['description'] == "Edited elsewhere"
+        assert second['status'] == 'rejected'
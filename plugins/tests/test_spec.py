@@ -0,0 +1,111 @@
+from unittest import mock
+
+import pytest
+from django.contrib.auth.models import User
+from django.contrib import admin
+from django.db import IntegrityError
+from django.test import RequestFactory
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from plugins.admin import InputAdmin
+from plugins.models import Plugin, Author, Category, Input, Tag
+from plugins.spec import plugin_spec_from_rows
+from plugins.viewsets import sync_plugin_components
+
+PLUGIN_DATA = {
+    'runtime': {'environments': ['python'], 'entrypoint': 'main.py'},
+    'inputs': [
+        {'name': 'threshold', 'label': 'Threshold', 'type': 'number', 'min': 0, 'max': 1, 'default': 0.05},
+        {'name': 'table', 'label': 'Table', 'type': 'file', 'required': True, 'file_types': ['.tsv']},
+    ],
+    'outputs': [{'name': 'plot', 'path': 'plot.png', 'type': 'image', 'format': 'png'}],
+    'execution': {'outputDir': 'out', 'envVariables': [{'name': 'TOKEN', 'label': 'Token', 'type': 'text'}]},
+    'plots': [{'id': 'volcano', 'name': 'Volcano', 'type': 'scatter', 'component': 'Scatter', 'dataSource': 'plot'}],
+    'example': {'enabled': True, 'values': {'threshold': 0.01}},
+}
+
+
+@pytest.mark.django_db
+class TestPluginSpec:
+    def setup_method(self):
+        self.client = APIClient()
+        self.plugin = Plugin.objects.create(
+            id="spec-plugin",
+            name="Spec Plugin",
+            description="One document",
+            version="1.2.0",
+            author=Author.objects.create(name="Spec Author"),
+            status='approved',
+        )
+        sync_plugin_components(self.plugin, PLUGIN_DATA, created=True)
+
+    def test_ingestion_stores_normalized_spec(self):
+        self.plugin.refresh_from_db()
+        spec = self.plugin.spec
+        assert spec == plugin_spec_from_rows(self.plugin)
+        assert spec['plugin']['author'] == "Spec Author"
+        assert spec['runtime']['entrypoint'] == 'main.py'
+        assert spec['inputs'][0]['min'] == 0.0
+        assert spec['inputs'][0]['default'] == '0.05'
+        assert spec['env_variables'][0]['name'] == 'TOKEN'
+        assert spec['annotation'] is None
+
+    def test_spec_endpoint_is_single_row_fetch(self, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            response = self.client.get(f'/api/plugins/{self.plugin.id}/spec/')
+        assert response.status_code == status.HTTP_200_OK
+        assert [i['name'] for i in response.data['inputs']] == ['threshold', 'table']
+        assert 'spec' not in self.client.get(f'/api/plugins/{self.plugin.id}/').data
+
+    def test_renames_reach_the_stored_spec(self):
+        author = self.plugin.author
+        author.name = "Renamed Author"
+        author.save()
+        category = Category.objects.create(name="Charts")
+        Plugin.objects.filter(pk=self.plugin.pk).update(category=category)
+        self.plugin.tags.add(Tag.objects.create(name="volcano"))
+        category.delete()
+        Tag.objects.filter(name="volcano").update(name="lipid")
+        Tag.objects.get(name="lipid").save()
+
+        spec = self.client.get(f'/api/plugins/{self.plugin.id}/spec/').data
+        assert spec['plugin']['author'] == "Renamed Author"
+        assert spec['plugin']['category'] is None
+        assert spec['tags'] == ["lipid"]
+        assert spec == plugin_spec_from_rows(Plugin.objects.get(pk=self.plugin.pk))
+
+    def test_spec_endpoint_hides_unapproved(self):
+        Plugin.objects.filter(pk=self.plugin.pk).update(status='pending')
+        response = self.client.get(f'/api/plugins/{self.plugin.id}/spec/')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_rows_without_spec_are_rebuilt(self):
+        Plugin.objects.filter(pk=self.plugin.pk).update(spec=None)
+        response = self.client.get(f'/api/plugins/{self.plugin.id}/spec/')
+        assert response.data['outputs'][0]['path'] == 'plot.png'
+        assert Plugin.objects.get(pk=self.plugin.pk).spec == response.data
+
+    def test_failed_ingestion_leaves_tables_and_spec_together(self):
+        broken = {**PLUGIN_DATA, 'outputs': [{'name': None}]}
+        with pytest.raises(IntegrityError):
+            sync_plugin_components(self.plugin, broken)
+        self.plugin.refresh_from_db()
+        assert self.plugin.inputs.count() == 2
+        assert self.plugin.spec == plugin_spec_from_rows(self.plugin)
+
+    def test_failed_sync_leaves_the_plugin_row_alone(self, git_repository):
+        repository = git_repository('spec-plugin', '2.0.0')
+        Plugin.objects.filter(pk=self.plugin.pk).update(repository=repository, commit_hash='old')
+        self.client.force_authenticate(User.objects.create_user(username='staff', password='x', is_staff=True))
+        with mock.patch('plugins.viewsets.sync_plugin_components', side_effect=ValueError('bad manifest')):
+            response = self.client.post(f'/api/plugins/{self.plugin.id}/sync_to_latest/')
+        assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+        plugin = Plugin.objects.get(pk=self.plugin.pk)
+        assert (plugin.commit_hash, plugin.version) == ('old', '1.2.0')
+
+    def test_admin_component_edit_refreshes_spec(self):
+        request = RequestFactory().post('/')
+        InputAdmin(Input, admin.site).delete_model(request, self.plugin.inputs.get(name='table'))
+        self.plugin.refresh_from_db()
+        assert [i['name'] for i in self.plugin.spec['inputs']] == ['threshold']
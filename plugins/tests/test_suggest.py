@@ -0,0 +1,54 @@
+import pytest
+from rest_framework.test import APIClient
+from plugins.models import Plugin, Category, Tag, PluginTag
+from plugins.signals import plugin_updated
+from plugins.suggest import SuggestionTrie
+
+
+class TestSuggestionTrie:
+    def setup_method(self):
+        self.trie = SuggestionTrie()
+        self.trie.add('plugins', 'Volcano Plot', 'volcano')
+        self.trie.add('plugins', 'Venn Diagram', 'venn')
+        self.trie.add('tags', 'visualization', 'visualization')
+
+    def test_prefix_matches_any_word(self):
+        assert self.trie.suggest('plo', 5)['plugins'] == ['volcano']
+        assert self.trie.suggest('v', 5)['plugins'] == ['venn', 'volcano']
+
+    def test_tolerates_typos(self):
+        assert self.trie.suggest('volcna', 5)['plugins'] == ['volcano']
+        assert self.trie.suggest('vizual', 5)['tags'] == ['visualization']
+
+    def test_short_prefix_is_exact(self):
+        assert self.trie.suggest('x', 5) == {'plugins': [], 'tags': [], 'categories': []}
+
+
+@pytest.mark.django_db
+class TestSuggestEndpoint:
+    def setup_method(self):
+        self.client = APIClient()
+        category = Category.objects.create(name="Visualization")
+        self.plugin = Plugin.objects.create(
+            id="volcano", name="Volcano Plot", description="", version="1.0.0",
+            category=category, status='approved'
+        )
+        PluginTag.objects.create(plugin=self.plugin, tag=Tag.objects.create(name="volcano-plot"))
+        Plugin.objects.create(id="hidden", name="Volcanic Pending", description="", version="1.0.0")
+        plugin_updated.send(sender=Plugin, plugin=self.plugin, created=True)
+
+    def test_suggest_returns_ranked_names(self):
+        response = self.client.get('/api/plugins/suggest/', {'q': 'volc'})
+        assert response.data['plugins'] == [{'id': 'volcano', 'name': 'Volcano Plot'}]
+        assert response.data['tags'] == ['volcano-plot']
+        assert response['Cache-Control'] == 'public, max-age=60'
+
+    def test_trie_rebuilt_when_registry_changes(self):
+        assert self.client.get('/api/plugins/suggest/', {'q': 'heat'}).data['plugins'] == []
+        heatmap = Plugin.objects.create(id="heatmap", name="Heatmap", description="", version="1", status='approved')
+        plugin_updated.send(sender=Plugin, plugin=heatmap, created=True)
+        assert self.client.get('/api/plugins/suggest/', {'q': 'heat'}).data['plugins'] == [{'id': 'heatmap', 'name': 'Heatmap'}]
+
+    def test_empty_query(self):
+        response = self.client.get('/api/plugins/suggest/')
+        assert response.data == {'plugins': [], 'tags': [], 'categories': []}
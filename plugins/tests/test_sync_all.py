@@ -0,0 +1,128 @@
+import json
+from io import StringIO
+from unittest import mock
+
+import pytest
+import yaml
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from plugins import repositories
+from plugins.models import Plugin
+from plugins.repositories import HostRateLimiter, repository_host
+from plugins.sync import SyncCheckpoint
+
+
+@pytest.mark.django_db
+class TestSyncAll:
+    @pytest.fixture(autouse=True)
+    def plugins_with_repositories(self, tmp_path, git_repository):
+        self.tmp_path = tmp_path
+        self.make_repository = git_repository
+        self.checkpoint = tmp_path / 'checkpoint.json'
+        for i in range(3):
+            plugin_id = f'synced-{i}'
+            Plugin.objects.create(
+                id=plugin_id, name=plugin_id, description='Stale', version='0.1.0', status='approved',
+                repository=git_repository(plugin_id, '1.0.0', tag='v1.0.0'),
+            )
+        Plugin.objects.create(
+            id='pending-plugin', name='Pending', description='Not approved', version='0.1.0',
+            status='pending', repository=git_repository('pending-plugin'),
+        )
+
+    def run(self, *args):
+        out = StringIO()
+        call_command('sync_all', *args, '--checkpoint', str(self.checkpoint), '--per-host-rate', '0', stdout=out)
+        return out.getvalue()
+
+    def test_syncs_approved_plugins(self):
+        output = self.run('--workers', '3')
+        assert 'Synced 3 plugins (3 updated, 0 unchanged, 0 failed)' in output
+        assert 'p95' in output
+
+        plugin = Plugin.objects.get(pk='synced-1')
+        assert plugin.version == '1.0.0'
+        assert plugin.latest_stable_tag == 'v1.0.0'
+        assert len(plugin.commit_hash) == 40
+        assert '<h1>synced-1 1.0.0</h1>' in plugin.readme
+        assert plugin.inputs.get().name == 'table'
+        assert Plugin.objects.get(pk='pending-plugin').version == '0.1.0'
+        assert not self.checkpoint.exists()
+
+    def test_unchanged_remotes_are_not_cloned(self):
+        self.run()
+        self.make_repository('synced-2', '2.0.0')
+        with mock.patch('plugins.sync.clone_repo_with_timeout', wraps=repositories.clone_repo_with_timeout) as clone:
+            output = self.run()
+        assert 'Synced 3 plugins (1 updated, 2 unchanged, 0 failed)' in output
+        assert clone.call_count == 1
+        assert Plugin.objects.get(pk='synced-2').version == '2.0.0'
+
+    def write_checkpoint(self, done, **scope):
+        scope = {'plugin_ids': [], 'status': 'approved', 'category': None, **scope}
+        self.checkpoint.write_text(json.dumps({'scope': scope, 'done': done}))
+
+    def test_resumes_from_checkpoint(self):
+        self.write_checkpoint(['synced-0', 'synced-1'])
+        output = self.run()
+        assert 'Resuming' in output
+        assert 'Synced 1 plugins (1 updated' in output
+        assert Plugin.objects.get(pk='synced-0').version == '0.1.0'
+        assert Plugin.objects.get(pk='synced-2').version == '1.0.0'
+
+        self.write_checkpoint(['synced-0', 'synced-1'])
+        assert 'Synced 3 plugins' in self.run('--restart')
+
+    def test_checkpoint_of_other_filters_is_refused(self):
+        self.write_checkpoint(['synced-0', 'synced-1'], plugin_ids=['synced-0', 'synced-1'])
+        with pytest.raises(CommandError, match='--restart'):
+            self.run()
+        assert Plugin.objects.get(pk='synced-2').version == '0.1.0'
+
+    def test_default_checkpoint_is_per_filter_set(self):
+        approved = SyncCheckpoint.default_path({'plugin_ids': [], 'status': 'approved', 'category': None})
+        everything = SyncCheckpoint.default_path({'plugin_ids': [], 'status': 'all', 'category': None})
+        assert approved != everything
+
+    def test_bad_manifest_values_fail_only_that_plugin(self):
+        self.make_repository('synced-1', '2.0.0', files={'plugin.yaml': yaml.safe_dump({
+            'plugin': {'id': 'synced-1', 'name': 'Synced', 'version': '2.0.0'},
+            'inputs': [{'name': 'cutoff', 'label': 'Cutoff', 'type': 'number', 'min': 'abc'}],
+        })})
+        with mock.patch.object(SyncCheckpoint, 'clear'):
+            output = self.run()
+        assert 'Synced 3 plugins (2 updated, 0 unchanged, 1 failed)' in output
+        assert Plugin.objects.get(pk='synced-1').version == '0.1.0'
+        assert Plugin.objects.get(pk='synced-2').version == '1.0.0'
+        assert set(json.loads(self.checkpoint.read_text())['done']) == {'synced-0', 'synced-2'}
+
+    def test_failures_are_reported_and_retried_on_resume(self):
+        Plugin.objects.filter(pk='synced-1').update(repository=f'file://{self.tmp_path}/missing')
+        with mock.patch.object(SyncCheckpoint, 'clear'):
+            output = self.run('--batch-size', '1')
+        assert 'Synced 3 plugins (2 updated, 0 unchanged, 1 failed)' in output
+        assert 'synced-1:' in output
+        assert set(json.loads(self.checkpoint.read_text())['done']) == {'synced-0', 'synced-2'}
+
+    def test_filters(self):
+        output = self.run('synced-0', '--status', 'all')
+        assert 'Synced 1 plugins' in output
+        self.run('pending-plugin', '--status', 'all')
+        assert Plugin.objects.get(pk='pending-plugin').version == '1.0.0'
+
+
+class TestHostRateLimiter:
+    def test_spaces_requests_per_host(self):
+        limiter = HostRateLimiter(rate=2)
+        with mock.patch('plugins.repositories.time.monotonic', return_value=100.0), \
+                mock.patch('plugins.repositories.time.sleep') as sleep:
+            limiter.wait('github.com')
+            limiter.wait('github.com')
+            limiter.wait('gitlab.com')
+            limiter.wait('github.com')
+        assert [call.args[0] for call in sleep.call_args_list] == [0.5, 1.0]
+
+    def test_repository_host(self):
+        assert repository_host('git@GitHub.com:org/repo.git') == 'github.com'
+        assert repository_host('https://gitlab.com/org/repo') == 'gitlab.com'
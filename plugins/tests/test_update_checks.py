@@ -0,0 +1,168 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import OperationalError
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from plugins.models import Plugin, PluginChange
+from plugins.signals import mark_registry_index_stale
+from plugins.updates import MAX_BACKOFF, due_plugins, newest_tag, next_check_delay, record_check, resolve_remote
+
+
+def run(*args):
+    out = StringIO()
+    call_command('check_updates', '--once', '--per-host-rate', '0', *args, stdout=out)
+    return out.getvalue()
+
+
+@pytest.mark.django_db
+class TestUpdateChecks:
+    @pytest.fixture(autouse=True)
+    def plugin_with_repository(self, git_repository):
+        self.make_repository = git_repository
+        self.client = APIClient()
+        self.repository = git_repository('checked-plugin', '1.0.0', tag='v1.0.0')
+        head, _ = resolve_remote(self.repository)
+        self.plugin = Plugin.objects.create(
+            id='checked-plugin', name='Checked', description='Scheduled', version='1.0.0',
+            status='approved', repository=self.repository, commit_hash=head,
+        )
+
+    def test_scheduler_records_remote_state(self):
+        self.make_repository('checked-plugin', '1.1.0', tag='v1.1.0')
+        output = run()
+        assert 'Checked 1 plugins (1 with updates, 0 failed)' in output
+
+        plugin = Plugin.objects.get(pk=self.plugin.pk)
+        assert plugin.has_update is True
+        assert plugin.latest_stable_tag == 'v1.1.0'
+        assert plugin.latest_commit != plugin.commit_hash
+        assert plugin.last_checked_at is not None
+        assert plugin.next_check_at > timezone.now() + timedelta(hours=5)
+        # Not due again until next_check_at
+        assert 'Checked' not in run()
+
+    def test_check_update_answers_from_database(self):
+        run()
+        with mock.patch('plugins.viewsets.check_remote', side_effect=AssertionError("network used")):
+            response = self.client.get(f'/api/plugins/{self.plugin.id}/check_update/')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['has_update'] is False
+        assert response.data['latest_stable_tag'] == 'v1.0.0'
+        assert response.data['last_checked_at'] is not None
+
+    def test_new_tag_reaches_cached_representations(self):
+        run()
+        assert self.client.get(f'/api/plugins/{self.plugin.id}/').data['latest_stable_tag'] == 'v1.0.0'
+        self.make_repository('checked-plugin', '1.1.0', tag='v1.1.0')
+        Plugin.objects.filter(pk=self.plugin.pk).update(next_check_at=None)
+        run()
+        assert self.client.get(f'/api/plugins/{self.plugin.id}/').data['latest_stable_tag'] == 'v1.1.0'
+        assert self.client.get('/api/plugins/').data[0]['latest_stable_tag'] == 'v1.1.0'
+
+    def test_new_tag_reaches_change_feed_and_index(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks() as callbacks:
+            run()
+        assert PluginChange.objects.filter(plugin_id=self.plugin.id, action='updated').count() == 1
+        assert mark_registry_index_stale in callbacks
+
+        # Same tag again: nothing the API returns changed
+        Plugin.objects.filter(pk=self.plugin.pk).update(next_check_at=None)
+        with django_capture_on_commit_callbacks() as callbacks:
+            run()
+        assert PluginChange.objects.filter(plugin_id=self.plugin.id).count() == 1
+        assert mark_registry_index_stale not in callbacks
+
+    def test_live_check(self):
+        run()
+        self.make_repository('checked-plugin', '1.1.0')
+        assert self.client.get(f'/api/plugins/{self.plugin.id}/check_update/').data['has_update'] is False
+
+        response = self.client.get(f'/api/plugins/{self.plugin.id}/check_update/?live=1')
+        assert response.data['has_update'] is True
+        assert response.data['changelog_url'].endswith(response.data['latest_commit'])
+        assert Plugin.objects.get(pk=self.plugin.pk).has_update is True
+
+    def test_syncing_clears_has_update(self):
+        self.make_repository('checked-plugin', '1.1.0')
+        run()
+        plugin = Plugin.objects.get(pk=self.plugin.pk)
+        assert plugin.has_update is True
+        plugin.commit_hash = plugin.latest_commit
+        plugin.save()
+        assert Plugin.objects.get(pk=self.plugin.pk).has_update is False
+
+    def test_failing_remote_backs_off(self):
+        Plugin.objects.filter(pk=self.plugin.pk).update(repository='file:///nonexistent/repository')
+        output = run()
+        assert 'Checked 1 plugins (0 with updates, 1 failed)' in output
+        plugin = Plugin.objects.get(pk=self.plugin.pk)
+        assert plugin.check_failures == 1
+        assert plugin.last_check_error
+        assert plugin.last_checked_at is None
+
+        Plugin.objects.filter(pk=self.plugin.pk).update(next_check_at=None)
+        run()
+        plugin = Plugin.objects.get(pk=self.plugin.pk)
+        assert plugin.check_failures == 2
+        assert plugin.next_check_at > timezone.now() + timedelta(hours=20)
+
+    def test_batch_check_uses_recorded_state(self):
+        run()
+        admin = User.objects.create_user(username="admin", password="x", is_staff=True)
+        self.client.force_authenticate(admin)
+        with mock.patch('git.Repo.clone_from', side_effect=AssertionError("network used")):
+            response = self.client.post(
+                '/api/plugins/batch_check_updates/', {'plugin_ids': [self.plugin.id]}, format='json',
+            )
+        assert response.data['results'][0]['success'] is True
+        assert response.data['results'][0]['latest_stable_tag'] == 'v1.0.0'
+
+    def test_loop_survives_a_failed_round(self):
+        calls = []
+
+        def flaky_record(*args):
+            calls.append(1)
+            if len(calls) == 1:
+                raise OperationalError('gone')
+            return record_check(*args)
+
+        def stop_after_recovery(seconds):
+            if len(calls) > 1:
+                raise KeyboardInterrupt
+
+        out = StringIO()
+        with mock.patch('plugins.management.commands.check_updates.record_check', side_effect=flaky_record), \
+                mock.patch('time.sleep', side_effect=stop_after_recovery):
+            call_command('check_updates', '--per-host-rate', '0', stdout=out)
+        assert 'Round failed: gone' in out.getvalue()
+        assert 'Checked 1 plugins' in out.getvalue()
+        assert Plugin.objects.get(pk=self.plugin.pk).last_checked_at is not None
+
+    def test_due_plugins_skip_unapproved_and_scheduled(self):
+        Plugin.objects.create(id='pending', name='Pending', description='', version='1', repository=self.repository)
+        Plugin.objects.create(
+            id='later', name='Later', description='', version='1', status='approved', repository=self.repository,
+            next_check_at=timezone.now() + timedelta(hours=1),
+        )
+        assert [p.id for p in due_plugins()] == ['checked-plugin']
+
+
+class TestSchedule:
+    def test_backoff_is_capped_and_jittered(self):
+        assert next_check_delay(0, interval=100, jitter=0) == 100
+        assert next_check_delay(3, interval=100, jitter=0) == 800
+        assert next_check_delay(30, interval=100, jitter=0) == MAX_BACKOFF
+        delays = {next_check_delay(0, interval=100, jitter=0.1) for _ in range(20)}
+        assert len(delays) > 1 and all(90 <= d <= 110 for d in delays)
+
+    def test_newest_tag_prefers_versions(self):
+        assert newest_tag({'v1.9.0', 'v1.10.0', 'v2.0.0-rc1'}) == 'v1.10.0'
+        assert newest_tag({'release-a', 'release-b'}) == 'release-b'
+        assert newest_tag(set()) is None
@@ -0,0 +1,66 @@
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from plugins.models import UserProfile
+
+
+def profile_writes(queries):
+    return [
+        q['sql'] for q in queries
+        if 'plugins_userprofile' in q['sql'] and not q['sql'].startswith('SELECT')
+    ]
+
+
+@pytest.mark.django_db
+class TestUserSignals:
+    def setup_method(self):
+        self.user = User.objects.create_user(username="orcid-user", password="x")
+
+    def test_new_user_gets_one_profile(self):
+        assert UserProfile.objects.filter(user=self.user).count() == 1
+
+    def test_login_save_touches_nothing_but_the_user(self):
+        self.user.last_login = timezone.now()
+        with CaptureQueriesContext(connection) as queries:
+            self.user.save(update_fields=['last_login'])
+        assert len(queries) == 1
+        assert queries[0]['sql'].startswith('UPDATE "auth_user"')
+
+    def test_full_save_with_untouched_profile_writes_no_profile(self):
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = "Ada"
+        with CaptureQueriesContext(connection) as queries:
+            user.save()
+        assert profile_writes(queries) == []
+
+        user.userprofile
+        with CaptureQueriesContext(connection) as queries:
+            user.save()
+        assert profile_writes(queries) == []
+
+    def test_profile_edits_are_saved_with_the_user(self):
+        user = User.objects.get(pk=self.user.pk)
+        user.userprofile.orcid = "0000-0002-1825-0097"
+        with CaptureQueriesContext(connection) as queries:
+            user.save()
+        writes = profile_writes(queries)
+        assert len(writes) == 1 and '"orcid"' in writes[0] and '"user_id"' not in writes[0]
+        assert UserProfile.objects.get(user=user).orcid == "0000-0002-1825-0097"
+
+        with CaptureQueriesContext(connection) as queries:
+            user.save()
+        assert profile_writes(queries) == []
+
+    def test_users_without_a_profile_get_one_on_the_profile_page(self):
+        UserProfile.objects.filter(user=self.user).delete()
+        self.user.save()
+        assert not UserProfile.objects.filter(user=self.user).exists()
+
+        client = Client()
+        client.force_login(self.user)
+        assert client.get('/plugins/profile/').status_code == 200
+        assert UserProfile.objects.filter(user=self.user).exists()
@@ -0,0 +1,291 @@
+import hashlib
+import hmac
+import json
+from io import StringIO
+
+import pytest
+import yaml
+from cryptography.fernet import Fernet
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from plugins.models import Plugin, PluginRefreshRequest, PluginWebhook, RepositorySSHKey, Runtime
+from plugins.repositories import find_ssh_key
+from plugins.repository_keys import repository_key
+from plugins.webhooks import MAX_REFRESH_ATTEMPTS, finish_refresh
+
+SECRET = 'webhook-secret'
+HEAD = 'f' * 40
+
+
+def github_push(files, ref='refs/heads/main', clone_url='https://github.com/cauldron/volcano.git'):
+    return {
+        'ref': ref,
+        'after': HEAD,
+        'repository': {
+            'html_url': 'https://github.com/cauldron/volcano',
+            'clone_url': clone_url,
+            'ssh_url': 'git@github.com:cauldron/volcano.git',
+            'default_branch': 'main',
+        },
+        'commits': [{'id': HEAD, 'added': [], 'modified': files, 'removed': []}],
+    }
+
+
+def gitlab_push(files):
+    return {
+        'object_kind': 'push',
+        'ref': 'refs/heads/main',
+        'after': HEAD,
+        'project': {
+            'web_url': 'https://gitlab.com/Cauldron/Volcano',
+            'git_ssh_url': 'git@gitlab.com:cauldron/volcano.git',
+            'default_branch': 'main',
+        },
+        'commits': [{'id': HEAD, 'added': files, 'modified': [], 'removed': []}],
+        'total_commits_count': 1,
+    }
+
+
+@pytest.mark.django_db
+class TestWebhooks:
+    @pytest.fixture(autouse=True)
+    def plugins(self, settings):
+        settings.ENCRYPTION_KEY = Fernet.generate_key().decode()
+        self.client = APIClient()
+        self.owner = User.objects.create_user(username='owner', password='x')
+        self.plugin = Plugin.objects.create(
+            id='volcano', name='Volcano', description='Plots', version='1.0.0', status='approved',
+            repository='https://github.com/Cauldron/Volcano.git', submitted_by=self.owner,
+        )
+        Runtime.objects.create(plugin=self.plugin, environments=['python'], entrypoint='./src/main.py')
+        PluginWebhook.objects.create(plugin=self.plugin, secret=SECRET)
+        self.gitlab_plugin = Plugin.objects.create(
+            id='volcano-gitlab', name='Volcano', description='Plots', version='1.0.0', status='approved',
+            repository='https://gitlab.com/cauldron/volcano',
+        )
+        PluginWebhook.objects.create(plugin=self.gitlab_plugin, secret=SECRET)
+
+    def github(self, payload, event='push', secret=SECRET):
+        body = json.dumps(payload).encode('utf-8')
+        signature = hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+        return self.client.post(
+            '/api/webhooks/', body, content_type='application/json',
+            HTTP_X_GITHUB_EVENT=event, HTTP_X_HUB_SIGNATURE_256=f'sha256={signature}',
+        )
+
+    def queued(self):
+        return set(PluginRefreshRequest.objects.values_list('plugin_id', 'kind'))
+
+    def test_manifest_change_queues_refresh(self):
+        response = self.github(github_push(['plugin.yaml']))
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        assert response.data['queued'] == [{'plugin_id': 'volcano', 'kind': 'refresh'}]
+        request = PluginRefreshRequest.objects.get()
+        assert (request.commit, request.source) == (HEAD, 'github')
+
+    def test_entrypoint_change_queues_refresh(self):
+        self.github(github_push(['src/main.py']))
+        assert self.queued() == {('volcano', 'refresh')}
+
+    def test_unrelated_change_only_queues_check(self):
+        self.github(github_push(['docs/usage.md', 'tests/test_main.py']))
+        assert self.queued() == {('volcano', 'check')}
+
+    def test_tags_queue_check(self):
+        self.github(github_push([], ref='refs/tags/v1.1.0'))
+        self.github({'ref': 'v1.2.0', 'ref_type': 'tag', 'repository': github_push([])['repository']}, event='create')
+        assert self.queued() == {('volcano', 'check')}
+
+    def test_other_branches_are_ignored(self):
+        response = self.github(github_push(['plugin.yaml'], ref='refs/heads/feature'))
+        assert response.data['queued'] == []
+        assert not PluginRefreshRequest.objects.exists()
+
+    def test_repeat_deliveries_collapse(self):
+        self.github(github_push(['README.md']))
+        self.github(github_push(['README.md']))
+        assert PluginRefreshRequest.objects.count() == 1
+
+    def test_bad_signatures_are_rejected(self):
+        assert self.github(github_push(['plugin.yaml']), secret='wrong').status_code == status.HTTP_403_FORBIDDEN
+        PluginWebhook.objects.filter(plugin=self.plugin).delete()
+        assert self.github(github_push(['plugin.yaml'])).status_code == status.HTTP_403_FORBIDDEN
+        assert self.github(github_push(['plugin.yaml']), secret='').status_code == status.HTTP_403_FORBIDDEN
+        assert not PluginRefreshRequest.objects.exists()
+        response = self.client.post('/api/webhooks/', {}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_secrets_are_per_plugin(self):
+        other = Plugin.objects.create(
+            id='other', name='Other', description='', version='1', status='approved',
+            repository='https://github.com/someone/other',
+        )
+        PluginWebhook.objects.create(plugin=other, secret='other-secret')
+        # Another plugin's secret can't sign deliveries for this repository
+        response = self.github(github_push(['plugin.yaml']), secret='other-secret')
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+        # Plugins sharing a repository are only refreshed by the secret that signed
+        fork = Plugin.objects.create(
+            id='volcano-fork', name='Fork', description='', version='1', status='approved',
+            repository='git@github.com:cauldron/volcano.git',
+        )
+        PluginWebhook.objects.create(plugin=fork, secret='fork-secret')
+        response = self.github(github_push(['plugin.yaml']), secret='fork-secret')
+        assert response.data['queued'] == [{'plugin_id': 'volcano-fork', 'kind': 'refresh'}]
+
+    def test_recommended_commit_is_not_moved_by_pushes(self):
+        Plugin.objects.filter(pk=self.plugin.pk).update(recommended_commit='a' * 40)
+        response = self.github(github_push(['plugin.yaml']))
+        assert response.data['queued'] == [{'plugin_id': 'volcano', 'kind': 'check'}]
+        assert self.queued() == {('volcano', 'check')}
+
+    def test_owner_manages_secret(self):
+        url = f'/api/plugins/{self.plugin.id}/webhook/'
+        self.client.force_authenticate(User.objects.create_user(username='stranger', password='x'))
+        assert self.client.get(url).status_code == status.HTTP_403_FORBIDDEN
+        assert self.client.post(url).status_code == status.HTTP_403_FORBIDDEN
+
+        self.client.force_authenticate(self.owner)
+        assert self.client.get(url).data['secret'] == SECRET
+        response = self.client.post(url)
+        assert response.data['url'].endswith('/api/webhooks/')
+        rotated = response.data['secret']
+        assert rotated != SECRET and PluginWebhook.objects.get(plugin=self.plugin).secret == rotated
+        self.client.force_authenticate(None)
+        assert self.github(github_push(['plugin.yaml'])).status_code == status.HTTP_403_FORBIDDEN
+        assert self.github(github_push(['plugin.yaml']), secret=rotated).status_code == status.HTTP_202_ACCEPTED
+
+    def test_ping(self):
+        ping = {'zen': 'Keep it simple.', 'repository': github_push([])['repository']}
+        assert self.github(ping, event='ping').data == {'status': 'pong'}
+        assert self.github(ping, event='ping', secret='wrong').status_code == status.HTTP_403_FORBIDDEN
+
+    def test_gitlab_token(self):
+        response = self.client.post(
+            '/api/webhooks/', json.dumps(gitlab_push(['README.md'])), content_type='application/json',
+            HTTP_X_GITLAB_EVENT='Push Hook', HTTP_X_GITLAB_TOKEN=SECRET,
+        )
+        assert response.data['queued'] == [{'plugin_id': 'volcano-gitlab', 'kind': 'refresh'}]
+
+        response = self.client.post(
+            '/api/webhooks/', json.dumps(gitlab_push(['README.md'])), content_type='application/json',
+            HTTP_X_GITLAB_EVENT='Push Hook', HTTP_X_GITLAB_TOKEN='wrong',
+        )
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_gitea_signature(self):
+        body = json.dumps(github_push(['plugin.yaml'])).encode('utf-8')
+        response = self.client.post(
+            '/api/webhooks/', body, content_type='application/json',
+            HTTP_X_GITEA_EVENT='push', HTTP_X_GITHUB_EVENT='push',
+            HTTP_X_GITEA_SIGNATURE=hmac.new(SECRET.encode('utf-8'), body, hashlib.sha256).hexdigest(),
+        )
+        assert response.data['queued'] == [{'plugin_id': 'volcano', 'kind': 'refresh'}]
+        assert PluginRefreshRequest.objects.get().source == 'gitea'
+
+    def test_failed_requests_are_retried_then_dropped(self):
+        self.github(github_push(['plugin.yaml']))
+        for _ in range(MAX_REFRESH_ATTEMPTS - 1):
+            finish_refresh(PluginRefreshRequest.objects.get(), error='unreachable')
+        assert PluginRefreshRequest.objects.get().attempts == MAX_REFRESH_ATTEMPTS - 1
+        finish_refresh(PluginRefreshRequest.objects.get(), error='unreachable')
+        assert not PluginRefreshRequest.objects.exists()
+
+    def test_newer_delivery_survives_finish(self):
+        self.github(github_push(['plugin.yaml']))
+        drained = PluginRefreshRequest.objects.get()
+        self.github(github_push(['plugin.yaml']))
+        finish_refresh(drained)
+        assert PluginRefreshRequest.objects.exists()
+
+
+@pytest.mark.django_db
+def test_queue_is_drained_by_scheduler(settings, git_repository):
+    settings.ENCRYPTION_KEY = Fernet.generate_key().decode()
+    repository = git_repository('pushed-plugin', '1.0.0')
+    plugin = Plugin.objects.create(
+        id='pushed-plugin', name='Pushed', description='Stale', version='0.1.0', status='approved',
+        repository=repository,
+    )
+    PluginWebhook.objects.create(plugin=plugin, secret=SECRET)
+    git_repository('pushed-plugin', '2.0.0')
+
+    payload = github_push(['plugin.yaml'], clone_url=repository)
+    body = json.dumps(payload).encode('utf-8')
+    APIClient().post(
+        '/api/webhooks/', body, content_type='application/json', HTTP_X_GITHUB_EVENT='push',
+        HTTP_X_HUB_SIGNATURE_256='sha256=' + hmac.new(SECRET.encode('utf-8'), body, hashlib.sha256).hexdigest(),
+    )
+    assert PluginRefreshRequest.objects.filter(plugin=plugin, kind='refresh').exists()
+
+    out = StringIO()
+    call_command('check_updates', '--once', '--per-host-rate', '0', stdout=out)
+    assert 'Processed 1 queued requests (1 refreshed, 0 checked, 0 failed)' in out.getvalue()
+    plugin.refresh_from_db()
+    assert plugin.version == '2.0.0'
+    assert '<h1>pushed-plugin 2.0.0</h1>' in plugin.readme
+    assert not PluginRefreshRequest.objects.exists()
+
+
+class TestRepositoryKey:
+    def test_spellings_agree(self):
+        spellings = [
+            'https://github.com/Org/Repo',
+            'https://github.com/org/repo.git',
+            'http://github.com/org/repo/',
+            'git@github.com:org/repo.git',
+            'ssh://git@github.com/org/repo.git',
+            'ssh://git@github.com:22/org/repo',
+            'git://github.com/org/repo.git',
+        ]
+        assert {repository_key(url) for url in spellings} == {'github.com/org/repo'}
+        assert repository_key(None) == ''
+        assert repository_key('file:///srv/git/plugin/') == '/srv/git/plugin'
+
+    @pytest.mark.django_db
+    def test_kept_on_save(self):
+        plugin = Plugin.objects.create(
+            id='keyed', name='Keyed', description='', version='1', repository='git@GitLab.com:a/b.git',
+        )
+        assert Plugin.objects.get(pk='keyed').repository_key == 'gitlab.com/a/b'
+        plugin.repository = 'https://example.org/c/d'
+        plugin.save()
+        assert Plugin.objects.get(pk='keyed').repository_key == 'example.org/c/d'
+
+    @pytest.mark.django_db
+    def test_ssh_key_found_under_any_spelling(self, settings, django_assert_num_queries):
+        settings.ENCRYPTION_KEY = Fernet.generate_key().decode()
+        owner = User.objects.create_user(username='owner', password='x')
+        key = RepositorySSHKey.objects.create(
+            user=owner, repository_url='git@github.com:Org/Private.git', ssh_private_key='key',
+        )
+        assert key.repository_key == 'github.com/org/private'
+        for url in ('https://github.com/org/private', 'ssh://git@github.com/org/private.git'):
+            with django_assert_num_queries(1):
+                assert find_ssh_key(url, owner) == key
+        assert find_ssh_key('https://github.com/org/other', owner) is None
+
+
+@pytest.mark.django_db
+def test_unsavable_manifest_counts_as_failed_refresh(git_repository):
+    repository = git_repository('broken-plugin', '1.0.0')
+    plugin = Plugin.objects.create(
+        id='broken-plugin', name='Broken', description='Stale', version='0.1.0', status='approved',
+        repository=repository,
+    )
+    git_repository('broken-plugin', '2.0.0', files={'plugin.yaml': yaml.safe_dump({
+        'plugin': {'id': 'broken-plugin', 'name': 'Broken', 'version': '2.0.0'},
+        'inputs': [{'name': 'cutoff', 'label': 'Cutoff', 'type': 'number', 'min': 'abc'}],
+    })})
+    PluginRefreshRequest.objects.create(plugin=plugin, kind='refresh', commit=HEAD, source='github')
+
+    out = StringIO()
+    call_command('check_updates', '--once', '--per-host-rate', '0', stdout=out)
+    assert 'Processed 1 queued requests (0 refreshed, 0 checked, 1 failed)' in out.getvalue()
+    assert 'broken-plugin (refresh)' in out.getvalue()
+    assert Plugin.objects.get(pk='broken-plugin').version == '0.1.0'
+    assert PluginRefreshRequest.objects.get().attempts == 1
@@ -0,0 +1,154 @@
+"""
+Scheduled update checks: which plugins have new commits or tags upstream.
+
+check_remote resolves HEAD and tags with one ls-remote and never touches
+the database, so the check_updates command runs it in worker threads;
+record_check stores the outcome and schedules the next check, backing off
+exponentially while a remote keeps failing. check_update answers from the
+stored columns.
+"""
+import random
+import re
+import subprocess
+import time
+from datetime import timedelta
+
+import git
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Plugin, PluginChange
+from .repositories import GIT_TIMEOUT, cleanup_ssh_key_file, ls_remote, repository_host, write_ssh_key
+from .signals import queue_registry_index_rebuild
+
+# Seconds between checks of a healthy plugin
+CHECK_INTERVAL = 6 * 60 * 60
+# Longest a failing remote waits between attempts
+MAX_BACKOFF = 7 * 24 * 60 * 60
+# Intervals are spread by up to this fraction either way so checks don't bunch up
+JITTER = 0.1
+
+STABLE_TAG = re.compile(r'^v?\d+(\.\d+)*$')
+
+# Columns the scheduler reads
+CHECK_FIELDS = (
+    'id', 'repository', 'commit_hash', 'recommended_commit', 'latest_commit', 'latest_stable_tag',
+    'check_failures', 'requires_authentication', 'submitted_by', 'status', 'updated_at',
+)
+
+
+def version_key(tag):
+    return [(0, int(part), '') if part.isdigit() else (1, 0, part) for part in re.findall(r'\d+|[A-Za-z]+', tag)]
+
+
+def newest_tag(tags):
+    """Highest plain version tag (v1.2.3), else the highest tag of any name, else None."""
+    candidates = [tag for tag in tags if STABLE_TAG.match(tag)] or list(tags)
+    return max(candidates, key=version_key) if candidates else None
+
+
+def resolve_remote(repo_url, timeout=GIT_TIMEOUT, env=None):
+    """(HEAD commit, newest tag) of a remote from a single ls-remote."""
+    head = None
+    tags = set()
+    for sha, ref in ls_remote(repo_url, 'HEAD', 'refs/tags/*', timeout=timeout, env=env):
+        if ref == 'HEAD':
+            head = sha
+        elif ref.startswith('refs/tags/'):
+            tags.add(ref[len('refs/tags/'):].removesuffix('^{}'))
+    return head, newest_tag(tags)
+
+
+def check_remote(plugin_id, repository, ssh_key=None, limiter=None, timeout=GIT_TIMEOUT):
+    """
+    Remote refs of one plugin's repository. Returns a dict with plugin_id,
+    seconds and either error or latest_commit and latest_stable_tag.
+    """
+    started = time.perf_counter()
+    result = {'plugin_id': plugin_id, 'error': None}
+    key_path = None
+    try:
+        env = None
+        if ssh_key is not None:
+            ssh_command, key_path = write_ssh_key(ssh_key)
+            env = {'GIT_SSH_COMMAND': ssh_command}
+        if limiter:
+            limiter.wait(repository_host(repository))
+        result['latest_commit'], result['latest_stable_tag'] = resolve_remote(repository, timeout, env)
+        if result['latest_commit'] is None:
+            result['error'] = 'Remote has no HEAD'
+    except (git.exc.GitError, subprocess.TimeoutExpired, OSError) as e:
+        result['error'] = str(e).strip() or type(e).__name__
+    finally:
+        cleanup_ssh_key_file(key_path)
+        result['seconds'] = time.perf_counter() - started
+    return result
+
+
+def next_check_delay(failures, interval=CHECK_INTERVAL, max_backoff=MAX_BACKOFF, jitter=JITTER):
+    """Seconds until the next check: the interval, doubled per consecutive failure, jittered."""
+    delay = min(max_backoff, interval * 2 ** failures) if failures else interval
+    return delay * random.uniform(1 - jitter, 1 + jitter)
+
+
+def due_plugins(now=None, limit=None):
+    """Approved plugins with a repository whose next check is due, never-checked first."""
+    plugins = (
+        Plugin.objects.filter(status='approved')
+        .exclude(repository__isnull=True).exclude(repository='')
+        .filter(Q(next_check_at__isnull=True) | Q(next_check_at__lte=now or timezone.now()))
+        .only(*CHECK_FIELDS)
+        .order_by(F('next_check_at').asc(nulls_first=True), 'id')
+    )
+    return plugins[:limit] if limit else plugins
+
+
+def record_check(plugin, result, interval=CHECK_INTERVAL, max_backoff=MAX_BACKOFF, jitter=JITTER):
+    """
+    Store a check_remote result on the plugin row and schedule its next
+    check. Written with update() so updated_at is left alone;
+    latest_stable_tag is part of the representation key, so a new tag
+    reaches the API in every worker. It is also the one column written here
+    that the API returns, so a new tag is logged for the change feed and
+    marks the registry index stale.
+    """
+    now = timezone.now()
+    previous_tag = plugin.latest_stable_tag
+    if result['error'] is None:
+        plugin.latest_commit = result['latest_commit']
+        plugin.latest_stable_tag = result['latest_stable_tag']
+        plugin.has_update = plugin.pending_update()
+        plugin.last_checked_at = now
+        plugin.check_failures = 0
+        plugin.last_check_error = ''
+        fields = ('latest_commit', 'latest_stable_tag', 'has_update', 'last_checked_at')
+    else:
+        plugin.check_failures += 1
+        plugin.last_check_error = result['error']
+        fields = ()
+    plugin.next_check_at = now + timedelta(
+        seconds=next_check_delay(plugin.check_failures, interval, max_backoff, jitter)
+    )
+    fields += ('check_failures', 'last_check_error', 'next_check_at')
+    with transaction.atomic():
+        Plugin.objects.filter(pk=plugin.pk).update(**{name: getattr(plugin, name) for name in fields})
+        if plugin.latest_stable_tag != previous_tag:
+            PluginChange.objects.create(plugin_id=plugin.pk, action='updated', status=plugin.status)
+            queue_registry_index_rebuild()
+    return plugin
+
+
+def update_status(plugin):
+    """check_update's response body, from the stored columns."""
+    recommended = plugin.recommended_commit or plugin.latest_commit
+    return {
+        'plugin_id': plugin.id,
+        'current_commit': plugin.commit_hash,
+        'latest_commit': plugin.latest_commit,
+        'recommended_commit': recommended,
+        'latest_stable_tag': plugin.latest_stable_tag,
+        'has_update': plugin.has_update,
+        'changelog_url': f"{plugin.repository}/compare/{plugin.commit_hash}...{recommended}" if plugin.has_update else None,
+        'last_checked_at': plugin.last_checked_at,
+    }
@@ -1,3 +1,7 @@
+import os
+
+from django.conf import settings
+from django.http import FileResponse, Http404
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.generic import ListView, DetailView, FormView, UpdateView, CreateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin
@@ -10,10 +14,46 @@ from django.contrib.admin.views.decorators import staff_member_required
 from django.utils.decorators import method_decorator
 from .forms import PluginSubmitForm, SSHKeyForm, BulkPluginSubmitForm
 from .viewsets import PluginSubmissionViewSet
+from .search import search_plugins
+from .fragments import FRAGMENT_TIMEOUT, with_row_keys
+from .encodings import accepts_encoding
+
+# Plugin columns the list templates read. The spec and search columns
+# never leave the database on listing pages.
+PLUGIN_LIST_FIELDS = (
+    'id', 'name', 'description', 'version', 'author', 'category', 'status', 'commit_hash', 'updated_at',
+    'latest_stable_tag',
+)
 
 def home_view(request):
     return render(request, 'home.html')
 
+def registry_index_view(request, name):
+    """
+    Fallback for serving the precomputed catalogue when nginx is not in front.
+    Never touches the database; picks a pre-compressed variant when accepted.
+    """
+    path = os.path.join(str(settings.REGISTRY_INDEX_ROOT), name)
+    if not os.path.exists(path):
+        raise Http404
+
+    encoding = None
+    for candidate, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if accepts_encoding(request, candidate) and os.path.exists(path + suffix):
+            path, encoding = path + suffix, candidate
+            break
+
+    content_type = 'application/msgpack' if name.endswith('.msgpack') else 'application/json'
+    response = FileResponse(open(path, 'rb'), content_type=content_type)
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Vary'] = 'Accept-Encoding'
+    if name == 'latest.json':
+        response['Cache-Control'] = 'no-cache'
+    else:
+        response['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
 class CustomLoginView(LoginView):
     template_name = 'registration/login.html'
 
@@ -28,14 +68,19 @@ class UserProfileView(LoginRequiredMixin, UpdateView):
     success_url = '/profile/'
 
     def get_object(self):
-        return self.request.user.userprofile
+        return UserProfile.objects.get_or_create(user=self.request.user)[0]
 
 class UserPluginListView(LoginRequiredMixin, ListView):
     model = Plugin
     template_name = 'plugins/user_plugin_list.html'
 
     def get_queryset(self):
-        return Plugin.objects.filter(submitted_by=self.request.user)
+        return (
+            Plugin.objects.filter(submitted_by=self.request.user)
+            .select_related('author', 'category')
+            .only(*PLUGIN_LIST_FIELDS, 'author__name', 'category__name')
+            .order_by('-updated_at')
+        )
 
 class PluginSubmitView(LoginRequiredMixin, FormView):
     template_name = 'plugins/plugin_submit.html'
@@ -105,25 +150,50 @@ class BulkPluginSubmitView(LoginRequiredMixin, FormView):
 class PluginListView(ListView):
     model = Plugin
     template_name = 'plugins/plugin_list.html'
+    paginate_by = 25
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = (
+            super().get_queryset()
+            .select_related('author', 'category', 'runtime')
+            .only(*PLUGIN_LIST_FIELDS, 'author__name', 'category__name', 'runtime__environments')
+            .order_by('name', 'id')
+        )
         if not self.request.user.is_staff:
             queryset = queryset.filter(status='approved')
         query = self.request.GET.get('q')
         if query:
-            queryset = queryset.filter(name__icontains=query)
+            queryset = search_plugins(queryset, query)
         return queryset
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Rows are rendered once per plugin revision and served from the cache
+        context['object_list'] = with_row_keys(context['object_list'])
+        context['fragment_timeout'] = FRAGMENT_TIMEOUT
+        return context
+
 class PluginDetailView(DetailView):
     model = Plugin
     template_name = 'plugins/plugin_detail.html'
+
     def get_queryset(self):
-        queryset = super().get_queryset()
+        # The README and env variables are only loaded when their cached
+        # fragments miss, so they are left to the template
+        queryset = (
+            super().get_queryset()
+            .select_related('author', 'category')
+            .defer('spec', 'search_document', 'search_vector')
+        )
         if not self.request.user.is_staff:
             queryset = queryset.filter(status='approved')
         return queryset
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['fragment_timeout'] = FRAGMENT_TIMEOUT
+        return context
+
 class SSHKeyListView(LoginRequiredMixin, ListView):
     model = RepositorySSHKey
     template_name = 'plugins/ssh_key_list.html'
@@ -1,269 +1,207 @@
+import json
 import tempfile
-import subprocess
 import git
 import yaml
 import os
-import stat
 
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from .models import Plugin, Author, Category, Runtime, Input, Output, PluginEnvVariable, RepositorySSHKey, Execution, Plot, Annotation, Example
+from rest_framework.reverse import reverse
+from .models import Plugin, PluginReadme, PluginWebhook, Author, Category, Runtime, Input, Output, PluginEnvVariable, Execution, Plot, Annotation, Example
 from .serializers import PluginSerializer, AuthorSerializer, CategorySerializer, PluginSubmissionSerializer, BulkPluginSubmissionSerializer
 from .permissions import IsOwnerOrAdmin
+from .pagination import PluginPagination
+from .renderers import machine_renderer_classes
+from .serializer_cache import KEY_FIELDS, plugin_representations
+from .search import PluginSearchFilter
+from .suggest import suggest_names
+from .changes import settled_changes
+from .facets import FACETS, facet_counts, filter_by_facets
+from .signals import plugin_updated
+from .spec import build_plugin_spec, load_plugin_spec, store_plugin_spec
+from .revisions import find_revision, revision_content, restore_plugin_revision
+from .readme import readme_response
+from .manifests import render_readme
+from .repositories import check_repo_requires_auth, setup_git_ssh_auth, cleanup_ssh_key_file
+from .updates import check_remote, record_check, update_status
+from .webhooks import enqueue_push, parse_push, signed_plugins, webhook_event, webhook_plugins
 
 from django.conf import settings
-import markdown
-import re
-
-def normalize_repo_url(repo_url):
-    if repo_url.startswith('git@'):
-        repo_url = repo_url.replace(':', '/', 1).replace('git@', 'ssh://git@')
-    return repo_url
-
-def check_repo_requires_auth(repo_url):
-    """Check if repository requires authentication using git ls-remote (faster than clone)."""
-    try:
-        result = subprocess.run(
-            ['git', 'ls-remote', '--exit-code', '-h', repo_url],
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
-        return result.returncode != 0
-    except subprocess.TimeoutExpired:
-        return True
-    except Exception:
-        return True
-
-
-def clone_repo_with_timeout(repo_url, temp_dir, timeout=60, env=None, depth=None):
-    """Clone a repository with timeout support."""
-    cmd = ['git', 'clone']
-    if depth:
-        cmd.extend(['--depth', str(depth)])
-    cmd.extend([repo_url, temp_dir])
-
-    clone_env = os.environ.copy()
-    if env:
-        clone_env.update(env)
-
-    result = subprocess.run(
-        cmd,
-        capture_output=True,
-        text=True,
-        timeout=timeout,
-        env=clone_env
-    )
-
-    if result.returncode != 0:
-        raise git.exc.GitCommandError(cmd, result.returncode, result.stderr)
-
-    return git.Repo(temp_dir)
-
-def setup_git_ssh_auth(repo_url, user):
-    normalized_url = normalize_repo_url(repo_url)
-
-    try:
-        ssh_key = RepositorySSHKey.objects.filter(
-            user=user,
-            repository_url__in=[repo_url, normalized_url]
-        ).first()
-
-        if not ssh_key:
-            alt_url = repo_url.replace('ssh://git@', 'git@').replace('/', ':', 1) if 'ssh://' in repo_url else repo_url
-            ssh_key = RepositorySSHKey.objects.filter(
-                user=user,
-                repository_url=alt_url
-            ).first()
-
-        if ssh_key:
-            ssh_key_file = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.key')
-            ssh_key_file.write(ssh_key.ssh_private_key)
-            ssh_key_file.close()
-
-            os.chmod(ssh_key_file.name, stat.S_IRUSR | stat.S_IWUSR)
-
-            ssh_command = f'ssh -i {ssh_key_file.name} -o StrictHostKeyChecking=no'
-            if ssh_key.passphrase:
-                ssh_command = f'sshpass -p "{ssh_key.passphrase}" {ssh_command}'
-
-            return ssh_command, ssh_key_file.name
-    except Exception:
-        pass
-
-    return None, None
-
-def cleanup_ssh_key_file(ssh_key_file_path):
-    if ssh_key_file_path and os.path.exists(ssh_key_file_path):
-        try:
-            os.unlink(ssh_key_file_path)
-        except Exception:
-            pass
-
-def get_primary_environment(runtime_info):
-    environments = runtime_info.get('environments', [])
-    if environments and len(environments) > 0:
-        return environments[0]
-    return ''
-
-def generate_mermaid_diagram(script_path, runtime_info):
-    if not os.path.exists(script_path):
-        return ""
-
-    try:
-        with open(script_path, 'r') as f:
-            content = f.read()
-    except Exception:
-        return ""
-
-    lines = content.split('\n')
-    steps = []
-
-    primary_env = get_primary_environment(runtime_info)
-
-    if primary_env == 'r':
-        pattern = re.compile(r'message\(.*\[(\d+)/(\d+)\]\s*(.+?)["\')]')
-    elif primary_env == 'python':
-        pattern = re.compile(r'(?:print|logger\.info)\(.*\[(\d+)/(\d+)\]\s*(.+?)["\')]')
-    else:
-        return ""
-        
-    for line in lines:
-        match = pattern.search(line.strip())
-        if match:
-            label = match.group(3).strip()
-            if label and not label.startswith('='):
-                steps.append(label)
-                
-    if not steps:
-        return ""
-        
-    mermaid = ["```mermaid", "flowchart TD", "    Start([Start]) --> step1"]
-    for i, label in enumerate(steps):
-        step_id = f"step{i+1}"
-        mermaid.append(f"    {step_id}[{label}]")
-        if i < len(steps) - 1:
-            mermaid.append(f"    {step_id} --> step{i+2}")
-            
-    mermaid.append(f"    step{len(steps)} --> End([End])")
-    mermaid.append("```")
-    
-    return "\n## Workflow Diagram\n\n" + "\n".join(mermaid) + "\n"
-
-def sync_plugin_components(plugin, plugin_data):
-    runtime_info = plugin_data.get('runtime', {})
-    Runtime.objects.filter(plugin=plugin).delete()
-    if runtime_info:
-        Runtime.objects.create(
-            plugin=plugin,
-            environments=runtime_info.get('environments', []),
-            entrypoint=runtime_info.get('entrypoint', ''),
-            docker=runtime_info.get('docker')
-        )
-
-    Input.objects.filter(plugin=plugin).delete()
-    inputs_data = plugin_data.get('inputs', [])
-    for inp in inputs_data:
-        Input.objects.create(
-            plugin=plugin,
-            name=inp.get('name', ''),
-            label=inp.get('label', ''),
-            type=inp.get('type', ''),
-            required=inp.get('required', False),
-            default=str(inp.get('default', '')) if inp.get('default') is not None else None,
-            description=inp.get('description', ''),
-            placeholder=inp.get('placeholder', ''),
-            file_types=inp.get('file_types', []),
-            accept=inp.get('accept', ''),
-            multiple=inp.get('multiple', False),
-            sourceFile=inp.get('sourceFile', ''),
-            min=inp.get('min'),
-            max=inp.get('max'),
-            step=inp.get('step'),
-            options=inp.get('options'),
-            optionsFromFile=inp.get('optionsFromFile', ''),
-            groups=inp.get('groups'),
-            groupsFromFile=inp.get('groupsFromFile', ''),
-            visibleWhen=inp.get('visibleWhen'),
-            disableAnnotationManagement=inp.get('disableAnnotationManagement', False),
-            tableColumns=inp.get('tableColumns')
-        )
-
-    Output.objects.filter(plugin=plugin).delete()
-    outputs_data = plugin_data.get('outputs', [])
-    for out in outputs_data:
-        Output.objects.create(
-            plugin=plugin,
-            name=out.get('name', ''),
-            path=out.get('path', ''),
-            type=out.get('type', ''),
-            description=out.get('description', ''),
-            format=out.get('format', '')
-        )
-
-    PluginEnvVariable.objects.filter(plugin=plugin).delete()
-    execution_info = plugin_data.get('execution', {})
-    env_vars_data = execution_info.get('envVariables', [])
-    for ev in env_vars_data:
-        PluginEnvVariable.objects.create(
-            plugin=plugin,
-            name=ev.get('name', ''),
-            label=ev.get('label', ''),
-            type=ev.get('type', ''),
-            required=ev.get('required', False),
-            default=str(ev.get('default', '')) if ev.get('default') is not None else None,
-            description=ev.get('description', ''),
-            placeholder=ev.get('placeholder', ''),
-            accept=ev.get('accept', ''),
-            multiple=ev.get('multiple', False),
-            sourceFile=ev.get('sourceFile', ''),
-            min=ev.get('min'),
-            max=ev.get('max'),
-            step=ev.get('step')
-        )
-
-    Execution.objects.filter(plugin=plugin).delete()
-    if execution_info:
-        Execution.objects.create(
-            plugin=plugin,
-            argsMapping=execution_info.get('argsMapping'),
-            outputDir=execution_info.get('outputDir', ''),
-            requirements=execution_info.get('requirements')
-        )
-
-    Plot.objects.filter(plugin=plugin).delete()
-    plots_data = plugin_data.get('plots', [])
-    for plot in plots_data:
-        Plot.objects.create(
-            plugin=plugin,
-            plot_id=plot.get('id', ''),
-            name=plot.get('name', ''),
-            type=plot.get('type', ''),
-            component=plot.get('component', ''),
-            dataSource=plot.get('dataSource', ''),
-            config=plot.get('config'),
-            customization=plot.get('customization')
-        )
-
-    Annotation.objects.filter(plugin=plugin).delete()
-    annotation_data = plugin_data.get('annotation')
-    if annotation_data:
-        Annotation.objects.create(
-            plugin=plugin,
-            samplesFrom=annotation_data.get('samplesFrom', ''),
-            annotationFile=annotation_data.get('annotationFile', '')
-        )
-
-    Example.objects.filter(plugin=plugin).delete()
-    example_data = plugin_data.get('example')
-    if example_data:
-        Example.objects.create(
-            plugin=plugin,
-            enabled=example_data.get('enabled', False),
-            values=example_data.get('values')
+from django.core.exceptions import ValidationError
+from django.db import DatabaseError, transaction
+from django.http import Http404
+
+def sync_plugin_components(plugin, plugin_data, created=False):
+    """
+    Replace the plugin's manifest components with those in plugin_data.
+    Each component table is one delete and at most one bulk insert.
+    """
+    with transaction.atomic():
+        # A plugin row created just now has nothing to replace
+        if not created:
+            for model in (Runtime, Input, Output, PluginEnvVariable, Execution, Plot, Annotation, Example):
+                model.objects.filter(plugin=plugin).delete()
+
+        components = {}
+        runtime_info = plugin_data.get('runtime', {})
+        if runtime_info:
+            components['runtime'] = Runtime.objects.create(
+                plugin=plugin,
+                environments=runtime_info.get('environments', []),
+                entrypoint=runtime_info.get('entrypoint', ''),
+                docker=runtime_info.get('docker')
+            )
+
+        components['inputs'] = Input.objects.bulk_create([
+            Input(
+                plugin=plugin,
+                name=inp.get('name', ''),
+                label=inp.get('label', ''),
+                type=inp.get('type', ''),
+                required=inp.get('required', False),
+                default=str(inp.get('default', '')) if inp.get('default') is not None else None,
+                description=inp.get('description', ''),
+                placeholder=inp.get('placeholder', ''),
+                file_types=inp.get('file_types', []),
+                accept=inp.get('accept', ''),
+                multiple=inp.get('multiple', False),
+                sourceFile=inp.get('sourceFile', ''),
+                min=inp.get('min'),
+                max=inp.get('max'),
+                step=inp.get('step'),
+                options=inp.get('options'),
+                optionsFromFile=inp.get('optionsFromFile', ''),
+                groups=inp.get('groups'),
+                groupsFromFile=inp.get('groupsFromFile', ''),
+                visibleWhen=inp.get('visibleWhen'),
+                disableAnnotationManagement=inp.get('disableAnnotationManagement', False),
+                tableColumns=inp.get('tableColumns')
+            )
+            for inp in plugin_data.get('inputs', [])
+        ])
+
+        components['outputs'] = Output.objects.bulk_create([
+            Output(
+                plugin=plugin,
+                name=out.get('name', ''),
+                path=out.get('path', ''),
+                type=out.get('type', ''),
+                description=out.get('description', ''),
+                format=out.get('format', '')
+            )
+            for out in plugin_data.get('outputs', [])
+        ])
+
+        execution_info = plugin_data.get('execution', {})
+        components['env_variables'] = PluginEnvVariable.objects.bulk_create([
+            PluginEnvVariable(
+                plugin=plugin,
+                name=ev.get('name', ''),
+                label=ev.get('label', ''),
+                type=ev.get('type', ''),
+                required=ev.get('required', False),
+                default=str(ev.get('default', '')) if ev.get('default') is not None else None,
+                description=ev.get('description', ''),
+                placeholder=ev.get('placeholder', ''),
+                accept=ev.get('accept', ''),
+                multiple=ev.get('multiple', False),
+                sourceFile=ev.get('sourceFile', ''),
+                min=ev.get('min'),
+                max=ev.get('max'),
+                step=ev.get('step')
+            )
+            for ev in execution_info.get('envVariables', [])
+        ])
+
+        if execution_info:
+            components['execution'] = Execution.objects.create(
+                plugin=plugin,
+                argsMapping=execution_info.get('argsMapping'),
+                outputDir=execution_info.get('outputDir', ''),
+                requirements=execution_info.get('requirements')
+            )
+
+        components['plots'] = Plot.objects.bulk_create([
+            Plot(
+                plugin=plugin,
+                plot_id=plot.get('id', ''),
+                name=plot.get('name', ''),
+                type=plot.get('type', ''),
+                component=plot.get('component', ''),
+                dataSource=plot.get('dataSource', ''),
+                config=plot.get('config'),
+                customization=plot.get('customization')
+            )
+            for plot in plugin_data.get('plots', [])
+        ])
+
+        annotation_data = plugin_data.get('annotation')
+        if annotation_data:
+            components['annotation'] = Annotation.objects.create(
+                plugin=plugin,
+                samplesFrom=annotation_data.get('samplesFrom', ''),
+                annotationFile=annotation_data.get('annotationFile', '')
+            )
+
+        example_data = plugin_data.get('example')
+        if example_data:
+            components['example'] = Example.objects.create(
+                plugin=plugin,
+                enabled=example_data.get('enabled', False),
+                values=example_data.get('values')
+            )
+
+        tags = plugin.tags.values_list('name', flat=True)
+        store_plugin_spec(plugin, build_plugin_spec(plugin, components, tags))
+
+    plugin_updated.send(sender=Plugin, plugin=plugin, created=created)
+
+def manifest_fields(plugin_data, readme, default_author=None, default_category=None):
+    """Plugin field values a parsed plugin.yaml (and its rendered README) define."""
+    plugin_info = plugin_data.get('plugin', {})
+    author_name = plugin_info.get('author') or default_author
+    category_name = plugin_info.get('category') or default_category
+    return {
+        'name': plugin_info.get('name', plugin_info.get('id')),
+        'description': plugin_info.get('description', ''),
+        'version': plugin_info.get('version', '1.0.0'),
+        'author': Author.objects.get_or_create(name=author_name)[0] if author_name else None,
+        'category': Category.objects.get_or_create(name=category_name)[0] if category_name else None,
+        'subcategory': plugin_info.get('subcategory'),
+        'icon': plugin_info.get('icon'),
+        'readme': readme,
+        'diagram_enabled': (plugin_data.get('diagram') or {}).get('enabled', False),
+        'citation_enabled': (plugin_data.get('citation') or {}).get('enabled', False),
+    }
+
+# What saving a malformed manifest raises: bad field values, wrong shapes, constraint failures
+MANIFEST_ERRORS = (DatabaseError, ValidationError, ValueError, TypeError, AttributeError, KeyError)
+
+def ingest_manifest(plugin_data, readme, default_author=None, default_category=None, **fields):
+    """
+    Create or update the plugin a parsed plugin.yaml describes, then its
+    components, the same way repository submissions do. fields carries
+    what the manifest can't (repository, commit_hash, status, ...).
+    Returns (plugin, created).
+    """
+    with transaction.atomic():
+        plugin, created = Plugin.objects.update_or_create(
+            id=plugin_data['plugin']['id'],
+            defaults={**manifest_fields(plugin_data, readme, default_author, default_category), **fields},
         )
+        sync_plugin_components(plugin, plugin_data, created=created)
+    return plugin, created
+
+def apply_manifest(plugin, plugin_data, readme, **fields):
+    """Update an existing plugin and its components from a parsed manifest, as sync_to_latest does."""
+    with transaction.atomic():
+        for name, value in {**manifest_fields(plugin_data, readme), **fields}.items():
+            setattr(plugin, name, value)
+        plugin.save()
+        sync_plugin_components(plugin, plugin_data)
+    return plugin
 
 class PluginSubmissionViewSet(viewsets.ViewSet):
     serializer_class = PluginSubmissionSerializer
@@ -323,52 +261,33 @@ class PluginSubmissionViewSet(viewsets.ViewSet):
                     citation_config = plugin_data.get('citation', {})
                     citation_enabled = citation_config.get('enabled', False)
                     
-                    readme_path = os.path.join(temp_dir, 'README.md')
-                    raw_readme = ""
-                    if os.path.exists(readme_path):
-                        with open(readme_path, 'r') as f:
-                            raw_readme = f.read()
-                    
-                    # Autogenerate diagram if enabled and not already in README
-                    if diagram_enabled and "```mermaid" not in raw_readme:
-                        runtime_info = plugin_data.get('runtime', {})
-                        entrypoint = runtime_info.get('entrypoint')
-                        if entrypoint and runtime_info:
-                            script_path = os.path.join(temp_dir, entrypoint)
-                            diagram_md = generate_mermaid_diagram(script_path, runtime_info)
-                            raw_readme += diagram_md
-
-                    readme_content = markdown.markdown(raw_readme, extensions=['fenced_code', 'tables'])
-
-                    # Post-process mermaid blocks for frontend rendering
-                    mermaid_pattern = re.compile(r'<pre><code class="language-mermaid">([\s\S]*?)</code></pre>')
-                    readme_content = mermaid_pattern.sub(r'<pre class="mermaid">\1</pre>', readme_content)
+                    readme_content = render_readme(temp_dir, plugin_data)
 
                     # Check if plugin already exists
                     existing_plugin = Plugin.objects.filter(id=plugin_id).first()
 
-                    plugin, created = Plugin.objects.update_or_create(
-                        id=plugin_id,
-                        defaults={
-                            'name': plugin_info.get('name'),
-                            'description': plugin_info.get('description'),
-                            'version': plugin_info.get('version'),
-                            'author': author,
-                            'category': category,
-                            'subcategory': plugin_info.get('subcategory'),
-                            'icon': plugin_info.get('icon'),
-                            'repository': repo_url,
-                            'commit_hash': commit_hash,
-                            'status': initial_status,
-                            'readme': readme_content,
-                            'diagram_enabled': diagram_enabled,
-                            'citation_enabled': citation_enabled,
-                            'requires_authentication': requires_auth,
-                            'submitted_by': request.user if not existing_plugin else existing_plugin.submitted_by,
-                        }
-                    )
-                    
-                    sync_plugin_components(plugin, plugin_data)
+                    with transaction.atomic():
+                        plugin, created = Plugin.objects.update_or_create(
+                            id=plugin_id,
+                            defaults={
+                                'name': plugin_info.get('name'),
+                                'description': plugin_info.get('description'),
+                                'version': plugin_info.get('version'),
+                                'author': author,
+                                'category': category,
+                                'subcategory': plugin_info.get('subcategory'),
+                                'icon': plugin_info.get('icon'),
+                                'repository': repo_url,
+                                'commit_hash': commit_hash,
+                                'status': initial_status,
+                                'readme': readme_content,
+                                'diagram_enabled': diagram_enabled,
+                                'citation_enabled': citation_enabled,
+                                'requires_authentication': requires_auth,
+                                'submitted_by': request.user if not existing_plugin else existing_plugin.submitted_by,
+                            }
+                        )
+                        sync_plugin_components(plugin, plugin_data, created=created)
                     
                     return Response(PluginSerializer(plugin).data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
 
@@ -457,49 +376,32 @@ class PluginSubmissionViewSet(viewsets.ViewSet):
                     citation_config = plugin_data.get('citation', {})
                     citation_enabled = citation_config.get('enabled', False)
 
-                    readme_path = os.path.join(temp_dir, 'README.md')
-                    raw_readme = ""
-                    if os.path.exists(readme_path):
-                        with open(readme_path, 'r') as f:
-                            raw_readme = f.read()
-
-                    if diagram_enabled and "```mermaid" not in raw_readme:
-                        runtime_info = plugin_data.get('runtime', {})
-                        entrypoint = runtime_info.get('entrypoint')
-                        if entrypoint and runtime_info:
-                            script_path = os.path.join(temp_dir, entrypoint)
-                            diagram_md = generate_mermaid_diagram(script_path, runtime_info)
-                            raw_readme += diagram_md
-
-                    readme_content = markdown.markdown(raw_readme, extensions=['fenced_code', 'tables'])
-
-                    mermaid_pattern = re.compile(r'<pre><code class="language-mermaid">([\s\S]*?)</code></pre>')
-                    readme_content = mermaid_pattern.sub(r'<pre class="mermaid">\1</pre>', readme_content)
+                    readme_content = render_readme(temp_dir, plugin_data)
 
                     existing_plugin = Plugin.objects.filter(id=plugin_id).first()
 
-                    plugin_obj, created = Plugin.objects.update_or_create(
-                        id=plugin_id,
-                        defaults={
-                            'name': plugin_info.get('name'),
-                            'description': plugin_info.get('description'),
-                            'version': plugin_info.get('version'),
-                            'author': author,
-                            'category': category,
-                            'subcategory': plugin_info.get('subcategory'),
-                            'icon': plugin_info.get('icon'),
-                            'repository': repo_url,
-                            'commit_hash': commit_hash,
-                            'status': initial_status,
-                            'readme': readme_content,
-                            'diagram_enabled': diagram_enabled,
-                            'citation_enabled': citation_enabled,
-                            'requires_authentication': requires_auth,
-                            'submitted_by': request.user if not existing_plugin else existing_plugin.submitted_by,
-                        }
-                    )
-
-                    sync_plugin_components(plugin_obj, plugin_data)
+                    with transaction.atomic():
+                        plugin_obj, created = Plugin.objects.update_or_create(
+                            id=plugin_id,
+                            defaults={
+                                'name': plugin_info.get('name'),
+                                'description': plugin_info.get('description'),
+                                'version': plugin_info.get('version'),
+                                'author': author,
+                                'category': category,
+                                'subcategory': plugin_info.get('subcategory'),
+                                'icon': plugin_info.get('icon'),
+                                'repository': repo_url,
+                                'commit_hash': commit_hash,
+                                'status': initial_status,
+                                'readme': readme_content,
+                                'diagram_enabled': diagram_enabled,
+                                'citation_enabled': citation_enabled,
+                                'requires_authentication': requires_auth,
+                                'submitted_by': request.user if not existing_plugin else existing_plugin.submitted_by,
+                            }
+                        )
+                        sync_plugin_components(plugin_obj, plugin_data, created=created)
 
                     results.append({
                         'repo_url': repo_url,
@@ -542,9 +444,11 @@ class PluginSubmissionViewSet(viewsets.ViewSet):
 
 class PluginViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = PluginSerializer
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [PluginSearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'description', 'author__name', 'category__name']
     ordering_fields = ['name', 'updated_at', 'created_at']
+    pagination_class = PluginPagination
+    renderer_classes = machine_renderer_classes()
     permission_classes = [AllowAny]
 
     def get_queryset(self):
@@ -560,40 +464,125 @@ class PluginViewSet(viewsets.ReadOnlyModelViewSet):
         if author_name:
             queryset = queryset.filter(author__name=author_name)
 
-        return queryset
+        return filter_by_facets(queryset, self.request.query_params)
+
+    def list_facets(self, queryset):
+        """
+        Facet counts for the plugins a listing matched: the summary table
+        while the listing is the whole approved catalogue, otherwise counted
+        over the filtered queryset.
+        """
+        params = self.request.query_params
+        narrowing = ('category__name', 'author__name', PluginSearchFilter.search_param, *FACETS)
+        if self.request.user.is_staff or any(params.get(name) for name in narrowing):
+            return facet_counts(queryset)
+        return facet_counts()
+
+    def list(self, request, *args, **kwargs):
+        # Representations come from the serializer cache, so the page only needs the key columns
+        queryset = self.filter_queryset(self.get_queryset()).only(*KEY_FIELDS, 'name', 'created_at')
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            # Unpaginated responses stay a bare list for existing clients, so the counts go in a header
+            response = Response(plugin_representations(queryset))
+            response['X-Facet-Counts'] = json.dumps(self.list_facets(queryset), separators=(',', ':'))
+            return response
+        response = self.get_paginated_response(plugin_representations(page))
+        response.data['facets'] = self.list_facets(queryset)
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        return Response(plugin_representations([self.get_object()])[0])
+
+    @action(detail=False, methods=['get'], permission_classes=[AllowAny], pagination_class=None)
+    def facets(self, request):
+        """
+        Plugin counts per tag, environment, input/output type and feature
+        flag, narrowed by the same filters and search as the list.
+        """
+        return Response(self.list_facets(self.filter_queryset(self.get_queryset())))
 
     @action(detail=True, methods=['get'], permission_classes=[AllowAny])
-    def check_update(self, request, pk=None):
+    def spec(self, request, pk=None):
+        """The plugin's full normalized manifest, read from its spec column in one row."""
+        try:
+            return Response(load_plugin_spec(self.get_queryset(), pk))
+        except Plugin.DoesNotExist:
+            raise Http404
+
+    @action(detail=True, methods=['get'], permission_classes=[AllowAny])
+    def readme(self, request, pk=None):
+        """The rendered README, sent straight from its gzip-compressed store."""
+        store = PluginReadme.objects.filter(plugin__in=self.get_queryset().filter(pk=pk)).first()
+        if store is None:
+            raise Http404
+        return readme_response(request, store)
+
+    @action(detail=True, methods=['get'], permission_classes=[AllowAny])
+    def revisions(self, request, pk=None):
+        """Stored revisions of this plugin, newest first."""
         plugin = self.get_object()
-        if not plugin.repository:
-            return Response({'error': 'Plugin has no repository URL.'}, status=status.HTTP_400_BAD_REQUEST)
+        revisions = plugin.revisions.select_related('spec_blob', 'readme_blob').order_by('-created_at', '-id')
+        return Response([
+            {
+                'commit_hash': revision.commit_hash,
+                'version': revision.version,
+                'created_at': revision.created_at,
+                'updated_at': revision.updated_at,
+                'spec_sha256': revision.spec_blob.sha256,
+                'readme_sha256': revision.readme_blob.sha256 if revision.readme_blob_id else None,
+                'current': revision.commit_hash == plugin.commit_hash,
+            }
+            for revision in revisions
+        ])
+
+    @action(detail=True, methods=['get'], permission_classes=[AllowAny],
+            url_path=r'revisions/(?P<commit_hash>[0-9a-fA-F]{4,64})')
+    def revision(self, request, pk=None, commit_hash=None):
+        """Spec and rendered README of one historical commit, served from the database."""
+        revision = find_revision(self.get_object(), commit_hash)
+        if revision is None:
+            return Response({'error': 'No stored revision for that commit'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(revision_content(revision))
 
-        try:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                repo = git.Repo.clone_from(plugin.repository, temp_dir, depth=1)
-                latest_commit = repo.head.commit.hexsha
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated, IsOwnerOrAdmin])
+    def rollback(self, request, pk=None):
+        """
+        Roll the plugin back to a stored revision without touching the network.
+        Request body: {"commit_hash": "<full hash or unique prefix>"}
+        """
+        plugin = self.get_object()
 
-                tags = sorted(repo.tags, key=lambda t: t.commit.committed_datetime, reverse=True)
-                latest_tag = tags[0].name if tags else None
+        commit_hash = request.data.get('commit_hash')
+        if not commit_hash:
+            return Response({'error': 'commit_hash is required'}, status=status.HTTP_400_BAD_REQUEST)
 
-                recommended = plugin.recommended_commit if plugin.recommended_commit else latest_commit
+        revision = find_revision(plugin, commit_hash)
+        if revision is None:
+            return Response({'error': 'No stored revision for that commit'}, status=status.HTTP_404_NOT_FOUND)
 
-                has_update = recommended != plugin.commit_hash
+        restore_plugin_revision(plugin, revision)
+        plugin_updated.send(sender=Plugin, plugin=plugin, created=False)
+        return Response(plugin_representations([plugin])[0], status=status.HTTP_200_OK)
 
-                return Response({
-                    'plugin_id': plugin.id,
-                    'current_commit': plugin.commit_hash,
-                    'latest_commit': latest_commit,
-                    'recommended_commit': recommended,
-                    'latest_stable_tag': latest_tag,
-                    'has_update': has_update,
-                    'changelog_url': f"{plugin.repository}/compare/{plugin.commit_hash}...{recommended}" if has_update else None
-                }, status=status.HTTP_200_OK)
+    @action(detail=True, methods=['get'], permission_classes=[AllowAny])
+    def check_update(self, request, pk=None):
+        """
+        Update status as last recorded by the check_updates scheduler.
+        ?live=1 (or a plugin never checked yet) resolves the remote now and
+        records the result.
+        """
+        plugin = self.get_object()
+        if not plugin.repository:
+            return Response({'error': 'Plugin has no repository URL.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        except git.exc.GitCommandError as e:
-            return Response({'error': f'Failed to check repository: {e}'}, status=status.HTTP_400_BAD_REQUEST)
-        except Exception as e:
-            return Response({'error': f'An unexpected error occurred: {e}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        if plugin.last_checked_at is None or request.query_params.get('live') in ('1', 'true'):
+            result = check_remote(plugin.id, plugin.repository)
+            record_check(plugin, result)
+            if result['error'] is not None:
+                return Response({'error': f"Failed to check repository: {result['error']}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(update_status(plugin), status=status.HTTP_200_OK)
 
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated, IsOwnerOrAdmin])
     def set_recommended_commit(self, request, pk=None):
@@ -609,12 +598,37 @@ class PluginViewSet(viewsets.ReadOnlyModelViewSet):
 
         plugin.recommended_commit = commit_hash
         plugin.save()
+        plugin_updated.send(sender=Plugin, plugin=plugin, created=False)
 
         return Response({
             'plugin_id': plugin.id,
             'recommended_commit': plugin.recommended_commit
         }, status=status.HTTP_200_OK)
 
+    @action(detail=True, methods=['get', 'post'], permission_classes=[IsAuthenticated, IsOwnerOrAdmin])
+    def webhook(self, request, pk=None):
+        """
+        The secret to configure on the plugin's repository webhook, and the
+        URL to deliver to. POST creates the secret or replaces it.
+        """
+        plugin = self.get_object()
+
+        if not request.user.is_staff and plugin.submitted_by != request.user:
+            return Response({'error': 'You do not have permission to modify this plugin'}, status=status.HTTP_403_FORBIDDEN)
+
+        if request.method == 'POST':
+            webhook = PluginWebhook.rotate(plugin)
+        else:
+            webhook = PluginWebhook.objects.filter(plugin=plugin).first()
+            if webhook is None:
+                return Response({'error': 'No webhook secret yet; POST to create one.'}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response({
+            'plugin_id': plugin.id,
+            'url': reverse('webhook-list', request=request),
+            'secret': webhook.secret,
+        }, status=status.HTTP_200_OK)
+
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated, IsOwnerOrAdmin])
     def refresh(self, request, pk=None):
         plugin = self.get_object()
@@ -663,26 +677,7 @@ class PluginViewSet(viewsets.ReadOnlyModelViewSet):
                 citation_config = plugin_data.get('citation', {})
                 citation_enabled = citation_config.get('enabled', False)
 
-                readme_path = os.path.join(temp_dir, 'README.md')
-                raw_readme = ""
-                if os.path.exists(readme_path):
-                    with open(readme_path, 'r') as f:
-                        raw_readme = f.read()
-
-                # Autogenerate diagram if enabled and not already in README
-                if diagram_enabled and "```mermaid" not in raw_readme:
-                    runtime_info = plugin_data.get('runtime', {})
-                    entrypoint = runtime_info.get('entrypoint')
-                    if entrypoint and runtime_info:
-                        script_path = os.path.join(temp_dir, entrypoint)
-                        diagram_md = generate_mermaid_diagram(script_path, runtime_info)
-                        raw_readme += diagram_md
-
-                readme_content = markdown.markdown(raw_readme, extensions=['fenced_code', 'tables'])
-                
-                # Post-process mermaid blocks for frontend rendering
-                mermaid_pattern = re.compile(r'<pre><code class="language-mermaid">([\s\S]*?)</code></pre>')
-                readme_content = mermaid_pattern.sub(r'<pre class="mermaid">\1</pre>', readme_content)
+                readme_content = render_readme(temp_dir, plugin_data)
                 
                 plugin.name = plugin_info.get('name')
                 plugin.description = plugin_info.get('description')
@@ -694,9 +689,9 @@ class PluginViewSet(viewsets.ReadOnlyModelViewSet):
                 plugin.readme = readme_content
                 plugin.diagram_enabled = diagram_enabled
                 plugin.citation_enabled = citation_enabled
-                plugin.save()
-                
-                sync_plugin_components(plugin, plugin_data)
+                with transaction.atomic():
+                    plugin.save()
+                    sync_plugin_components(plugin, plugin_data)
                 
                 return Response(PluginSerializer(plugin).data, status=status.HTTP_200_OK)
 
@@ -707,11 +702,55 @@ class PluginViewSet(viewsets.ReadOnlyModelViewSet):
         finally:
             cleanup_ssh_key_file(ssh_key_file_path)
 
+    @action(detail=False, methods=['get'], permission_classes=[AllowAny], pagination_class=None)
+    def suggest(self, request):
+        """
+        Typeahead suggestions for the search box.
+        Query params: q (prefix, typos tolerated), limit (per kind, max 20).
+        """
+        try:
+            limit = min(max(int(request.query_params.get('limit', 8)), 1), 20)
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+        response = Response(suggest_names(request.query_params.get('q', '')[:100], limit))
+        response['Cache-Control'] = 'public, max-age=60'
+        return response
+
+    @action(detail=False, methods=['get'], permission_classes=[AllowAny])
+    def changes(self, request):
+        """
+        Delta sync against the plugin change log.
+        Query params: since=<cursor from the previous response> (0 for a full sync), limit.
+        Plugins that were deleted, rejected or are otherwise no longer visible come back in `removed`.
+        """
+        try:
+            since = int(request.query_params.get('since', 0))
+            limit = min(int(request.query_params.get('limit', 500)), 1000)
+        except ValueError:
+            return Response({'error': 'since and limit must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if since < 0 or limit < 1:
+            return Response({'error': 'since must be >= 0 and limit >= 1'}, status=status.HTTP_400_BAD_REQUEST)
+
+        entries = settled_changes(since, limit)
+        if not entries:
+            return Response({'cursor': since, 'has_more': False, 'changed': [], 'removed': []})
+
+        plugin_ids = list(dict.fromkeys(plugin_id for _, plugin_id in entries))
+        visible = list(self.get_queryset().filter(id__in=plugin_ids).only(*KEY_FIELDS))
+        visible_ids = {plugin.id for plugin in visible}
+
+        return Response({
+            'cursor': entries[-1][0],
+            'has_more': len(entries) == limit,
+            'changed': plugin_representations(visible),
+            'removed': [plugin_id for plugin_id in plugin_ids if plugin_id not in visible_ids],
+        })
+
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def my_plugins(self, request):
-        plugins = Plugin.objects.filter(submitted_by=request.user)
-        serializer = self.get_serializer(plugins, many=True)
-        return Response(serializer.data)
+        plugins = Plugin.objects.filter(submitted_by=request.user).only(*KEY_FIELDS).order_by('-updated_at')
+        return Response(plugin_representations(plugins))
 
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated, IsOwnerOrAdmin])
     def check_my_update(self, request, pk=None):
@@ -804,24 +843,7 @@ class PluginViewSet(viewsets.ReadOnlyModelViewSet):
                 citation_config = plugin_data.get('citation', {})
                 citation_enabled = citation_config.get('enabled', False)
 
-                readme_path = os.path.join(temp_dir, 'README.md')
-                raw_readme = ""
-                if os.path.exists(readme_path):
-                    with open(readme_path, 'r') as f:
-                        raw_readme = f.read()
-
-                if diagram_enabled and "```mermaid" not in raw_readme:
-                    runtime_info = plugin_data.get('runtime', {})
-                    entrypoint = runtime_info.get('entrypoint')
-                    if entrypoint and runtime_info:
-                        script_path = os.path.join(temp_dir, entrypoint)
-                        diagram_md = generate_mermaid_diagram(script_path, runtime_info)
-                        raw_readme += diagram_md
-
-                readme_content = markdown.markdown(raw_readme, extensions=['fenced_code', 'tables'])
-
-                mermaid_pattern = re.compile(r'<pre><code class="language-mermaid">([\s\S]*?)</code></pre>')
-                readme_content = mermaid_pattern.sub(r'<pre class="mermaid">\1</pre>', readme_content)
+                readme_content = render_readme(temp_dir, plugin_data)
 
                 plugin.name = plugin_info.get('name')
                 plugin.description = plugin_info.get('description')
@@ -834,9 +856,9 @@ class PluginViewSet(viewsets.ReadOnlyModelViewSet):
                 plugin.readme = readme_content
                 plugin.diagram_enabled = diagram_enabled
                 plugin.citation_enabled = citation_enabled
-                plugin.save()
-
-                sync_plugin_components(plugin, plugin_data)
+                with transaction.atomic():
+                    plugin.save()
+                    sync_plugin_components(plugin, plugin_data)
 
                 return Response(PluginSerializer(plugin).data, status=status.HTTP_200_OK)
 
@@ -853,7 +875,9 @@ class PluginViewSet(viewsets.ReadOnlyModelViewSet):
         Check updates for multiple plugins at once.
         Admin-only endpoint for batch update checking.
         Request body: {"plugin_ids": ["plugin-id-1", "plugin-id-2", ...]}
+        Plugins the scheduler has checked answer from the database unless ?live=1.
         """
+        live = request.query_params.get('live') in ('1', 'true')
         if not request.user.is_staff:
             return Response({'error': 'Admin access required'}, status=status.HTTP_403_FORBIDDEN)
 
@@ -873,6 +897,10 @@ class PluginViewSet(viewsets.ReadOnlyModelViewSet):
                     })
                     continue
 
+                if plugin.last_checked_at is not None and not live:
+                    results.append({**update_status(plugin), 'plugin_name': plugin.name, 'success': True})
+                    continue
+
                 ssh_key_file_path = None
                 try:
                     ssh_command, ssh_key_file_path = setup_git_ssh_auth(plugin.repository, request.user)
@@ -999,24 +1027,7 @@ class PluginViewSet(viewsets.ReadOnlyModelViewSet):
                         citation_config = plugin_data.get('citation', {})
                         citation_enabled = citation_config.get('enabled', False)
 
-                        readme_path = os.path.join(temp_dir, 'README.md')
-                        raw_readme = ""
-                        if os.path.exists(readme_path):
-                            with open(readme_path, 'r') as f:
-                                raw_readme = f.read()
-
-                        if diagram_enabled and "```mermaid" not in raw_readme:
-                            runtime_info = plugin_data.get('runtime', {})
-                            entrypoint = runtime_info.get('entrypoint')
-                            if entrypoint and runtime_info:
-                                script_path = os.path.join(temp_dir, entrypoint)
-                                diagram_md = generate_mermaid_diagram(script_path, runtime_info)
-                                raw_readme += diagram_md
-
-                        readme_content = markdown.markdown(raw_readme, extensions=['fenced_code', 'tables'])
-
-                        mermaid_pattern = re.compile(r'<pre><code class="language-mermaid">([\s\S]*?)</code></pre>')
-                        readme_content = mermaid_pattern.sub(r'<pre class="mermaid">\1</pre>', readme_content)
+                        readme_content = render_readme(temp_dir, plugin_data)
 
                         old_commit = plugin.commit_hash
                         plugin.name = plugin_info.get('name')
@@ -1030,9 +1041,9 @@ class PluginViewSet(viewsets.ReadOnlyModelViewSet):
                         plugin.readme = readme_content
                         plugin.diagram_enabled = diagram_enabled
                         plugin.citation_enabled = citation_enabled
-                        plugin.save()
-
-                        sync_plugin_components(plugin, plugin_data)
+                        with transaction.atomic():
+                            plugin.save()
+                            sync_plugin_components(plugin, plugin_data)
 
                         results.append({
                             'plugin_id': plugin.id,
@@ -1074,10 +1085,47 @@ class AuthorViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Author.objects.all()
     serializer_class = AuthorSerializer
     filterset_fields = ['name']
+    renderer_classes = machine_renderer_classes()
     permission_classes = [AllowAny]
 
 class CategoryViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     filterset_fields = ['name']
-    permission_classes = [AllowAny]
\ No newline at end of file
+    renderer_classes = machine_renderer_classes()
+    permission_classes = [AllowAny]
+
+
+class WebhookViewSet(viewsets.ViewSet):
+    """
+    POST /api/webhooks/ receives GitHub, GitLab and Gitea push and tag
+    events and queues refreshes for plugins built from the pushed
+    repository. Deliveries are authenticated by their signature alone,
+    checked against the secret of each plugin the repository backs.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def create(self, request):
+        body = request.body
+        provider, event = webhook_event(request.headers)
+        if provider is None:
+            return Response({'error': 'Unrecognised webhook'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return Response({'error': 'Payload must be JSON'}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(payload, dict):
+            return Response({'error': 'Payload must be a JSON object'}, status=status.HTTP_400_BAD_REQUEST)
+
+        plugins = signed_plugins(provider, request.headers, body, webhook_plugins(payload))
+        if not plugins:
+            return Response({'error': 'Invalid signature'}, status=status.HTTP_403_FORBIDDEN)
+        if event == 'ping':
+            return Response({'status': 'pong'}, status=status.HTTP_200_OK)
+
+        push = parse_push(provider, event, payload)
+        queued = enqueue_push(push, provider, plugins) if push else []
+        return Response({
+            'queued': [{'plugin_id': plugin_id, 'kind': kind} for plugin_id, kind in queued],
+        }, status=status.HTTP_202_ACCEPTED)
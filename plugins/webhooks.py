@@ -0,0 +1,183 @@
+"""
+Push and tag webhooks from GitHub, GitLab and Gitea.
+
+A delivery is matched to plugins by Plugin.repository_key and verified
+against each matching plugin's own PluginWebhook secret; only plugins
+whose secret signed it are acted on. Those become PluginRefreshRequest
+rows for the check_updates loop: a 'refresh' when plugin.yaml, README.md
+or the plugin's entrypoint changed on the default branch, otherwise a
+'check' so the recorded remote state catches up without a clone. A plugin
+pinned to a recommended_commit is never moved by a push; it only gets a
+'check', which records latest_commit and has_update.
+"""
+import hashlib
+import hmac
+import posixpath
+
+from django.db.models import F
+
+from .models import Plugin, PluginRefreshRequest
+from .repository_keys import repository_key
+
+WATCHED_FILES = ('plugin.yaml', 'README.md')
+
+# Event header per provider; Gitea also sends X-GitHub-Event, so it is tried first
+EVENT_HEADERS = (
+    ('gitea', 'X-Gitea-Event'),
+    ('gitlab', 'X-Gitlab-Event'),
+    ('github', 'X-GitHub-Event'),
+)
+
+# A queued refresh that keeps failing is dropped after this many tries
+MAX_REFRESH_ATTEMPTS = 3
+
+# GitHub lists at most this many commits in a push payload
+GITHUB_COMMIT_LIMIT = 20
+
+URL_KEYS = ('html_url', 'clone_url', 'ssh_url', 'git_url', 'url', 'web_url', 'homepage', 'git_http_url', 'git_ssh_url')
+
+
+def webhook_event(headers):
+    """(provider, event name) from the delivery headers, or (None, None)."""
+    for provider, header in EVENT_HEADERS:
+        if header in headers:
+            return provider, headers[header]
+    return None, None
+
+
+def verify_signature(provider, headers, body, secret):
+    """
+    GitHub and Gitea sign the raw body with HMAC-SHA256; GitLab echoes the
+    secret token. An empty secret never verifies.
+    """
+    if not secret:
+        return False
+    if provider == 'gitlab':
+        return hmac.compare_digest(headers.get('X-Gitlab-Token', ''), secret)
+    expected = hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+    if provider == 'gitea':
+        signature = headers.get('X-Gitea-Signature', '')
+    else:
+        signature = headers.get('X-Hub-Signature-256', '').removeprefix('sha256=')
+    return hmac.compare_digest(signature, expected)
+
+
+def repository_urls(payload):
+    """Every URL the payload gives for the pushed repository."""
+    urls = set()
+    for section in ('repository', 'project'):
+        values = payload.get(section) or {}
+        urls.update(values[key] for key in URL_KEYS if isinstance(values.get(key), str))
+    return urls
+
+
+def changed_paths(provider, payload):
+    """
+    Paths added, modified or removed by the pushed commits, or None when
+    the payload can't tell (no commit list, or one cut short).
+    """
+    commits = payload.get('commits') or []
+    total = payload.get('total_commits_count', payload.get('total_commits'))
+    if not commits or (total and total > len(commits)):
+        return None
+    if provider == 'github' and len(commits) >= GITHUB_COMMIT_LIMIT:
+        return None
+    paths = set()
+    for commit in commits:
+        for key in ('added', 'modified', 'removed'):
+            paths.update(commit.get(key) or [])
+    return paths
+
+
+def parse_push(provider, event, payload):
+    """
+    Normalize a push or tag delivery to {'urls', 'tag', 'commit', 'paths'},
+    or None for events and branches the registry doesn't track.
+    """
+    event = (event or '').lower()
+    ref = payload.get('ref') or ''
+    if event == 'tag push hook' or (event == 'create' and payload.get('ref_type') == 'tag') \
+            or (event in ('push', 'push hook') and ref.startswith('refs/tags/')):
+        return {'urls': repository_urls(payload), 'tag': True, 'commit': payload.get('after'), 'paths': None}
+    if event not in ('push', 'push hook'):
+        return None
+
+    default_branch = (payload.get('repository') or {}).get('default_branch') \
+        or (payload.get('project') or {}).get('default_branch')
+    if default_branch and ref != f'refs/heads/{default_branch}':
+        return None
+    return {
+        'urls': repository_urls(payload),
+        'tag': False,
+        'commit': payload.get('after') or payload.get('checkout_sha'),
+        'paths': changed_paths(provider, payload),
+    }
+
+
+def watched_paths(plugin):
+    paths = set(WATCHED_FILES)
+    runtime = getattr(plugin, 'runtime', None)
+    if runtime is not None and runtime.entrypoint:
+        paths.add(posixpath.normpath(runtime.entrypoint))
+    return paths
+
+
+def webhook_plugins(payload):
+    """Plugins built from the repository a payload names that have a webhook secret."""
+    keys = {repository_key(url) for url in repository_urls(payload)} - {''}
+    if not keys:
+        return []
+    return list(
+        Plugin.objects.filter(repository_key__in=keys, webhook__isnull=False)
+        .select_related('webhook', 'runtime')
+        .only('id', 'status', 'recommended_commit', 'runtime__entrypoint', 'webhook__secret')
+    )
+
+
+def signed_plugins(provider, headers, body, plugins):
+    """The plugins whose own secret verifies the delivery."""
+    return [plugin for plugin in plugins if verify_signature(provider, headers, body, plugin.webhook.secret)]
+
+
+def enqueue_push(push, source, plugins):
+    """
+    Queue work for the approved plugins among those the delivery was
+    verified for. Plugins with a recommended_commit only get a 'check'.
+    Returns [(plugin_id, kind)].
+    """
+    queued = []
+    for plugin in plugins:
+        if plugin.status != 'approved':
+            continue
+        refresh = not push['tag'] and not plugin.recommended_commit \
+            and (push['paths'] is None or bool(push['paths'] & watched_paths(plugin)))
+        kind = 'refresh' if refresh else 'check'
+        PluginRefreshRequest.objects.update_or_create(
+            plugin=plugin, kind=kind,
+            defaults={'commit': push['commit'], 'source': source, 'attempts': 0},
+        )
+        queued.append((plugin.id, kind))
+    return queued
+
+
+def pending_refreshes(limit=None):
+    """Queued requests, oldest first, with their plugin (minus the bulky columns)."""
+    requests = (
+        PluginRefreshRequest.objects.select_related('plugin')
+        .defer('plugin__spec', 'plugin__search_document', 'plugin__search_vector')
+        .order_by('requested_at', 'id')
+    )
+    return requests[:limit] if limit else requests
+
+
+def finish_refresh(request, error=None):
+    """
+    Drop a drained request, or count a failed attempt until
+    MAX_REFRESH_ATTEMPTS. A delivery that arrived while it ran has bumped
+    requested_at, and that newer request is left queued.
+    """
+    current = PluginRefreshRequest.objects.filter(pk=request.pk, requested_at=request.requested_at)
+    if error is None or request.attempts + 1 >= MAX_REFRESH_ATTEMPTS:
+        current.delete()
+    else:
+        current.update(attempts=F('attempts') + 1)
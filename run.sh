@@ -6,9 +6,18 @@ set -e
 # Run database migrations
 poetry run python manage.py migrate
 
+# Create the cache table when CACHE_BACKEND is the database cache (no-op otherwise)
+poetry run python manage.py createcachetable
+
 # Collect static files
 poetry run python manage.py collectstatic --noinput
 
+# Write the precomputed plugin catalogue served from /registry/
+poetry run python manage.py build_registry_index
+
+# Drop change log entries superseded by newer changes to the same plugin
+poetry run python manage.py prune_changes
+
 # Create initial superuser if one does not exist and environment variables are set
 if [ -n "$ADMIN_USER" ] && [ -n "$ADMIN_PASSWORD" ]; then
     echo "Creating initial superuser..."
@@ -17,5 +26,8 @@ else
     echo "ADMIN_USER or ADMIN_PASSWORD not set. Skipping initial superuser creation."
 fi
 
+# Rebuild the registry index in the background as plugin changes mark it stale
+poetry run python manage.py build_registry_index --watch &
+
 # Start gunicorn
 poetry run gunicorn cauldronPluginRegistry.wsgi:application --bind 0.0.0.0:8000